@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.routers.metrics import inc_api_key_rejected, inc_api_key_reload, inc_api_key_request
+
+logger = logging.getLogger("app.auth")
+
+# Verified keys remembered (in plaintext) per process so repeat callers skip hashing;
+# 0 disables the LRU
+API_KEY_CACHE_SIZE = int(os.getenv("TODO_API_KEY_CACHE_SIZE", "1024"))
+# Seconds between checks of TODO_API_KEYS_FILE for changes; 0 disables the watcher
+API_KEYS_RELOAD_INTERVAL = float(os.getenv("TODO_API_KEYS_RELOAD_INTERVAL", "5"))
+
+# Identity of the single key given in TODO_API_KEY
+DEFAULT_IDENTITY = "default"
+
+
+def hash_key(key: str) -> str:
+    """Hex SHA-256 of an API key, as listed in ``TODO_API_KEYS_FILE``."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def parse_key_file(text: str) -> dict[bytes, str]:
+    """Map key digests to identities from ``<identity> <sha256 hex>`` lines.
+
+    Blank lines and ``#`` comments are skipped; malformed lines raise ``ValueError``.
+    """
+    keys: dict[bytes, str] = {}
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        if len(parts) != 2:
+            raise ValueError(f"line {lineno}: expected '<identity> <sha256 hex>'")
+        identity, hexdigest = parts
+        try:
+            digest = bytes.fromhex(hexdigest)
+        except ValueError:
+            digest = b""
+        if len(digest) != hashlib.sha256().digest_size:
+            raise ValueError(f"line {lineno}: not a SHA-256 hex digest")
+        if digest in keys:
+            raise ValueError(f"line {lineno}: duplicate key (also used by {keys[digest]!r})")
+        keys[digest] = identity
+    return keys
+
+
+@dataclass(frozen=True)
+class _FileSignature:
+    mtime_ns: int
+    size: int
+    inode: int
+
+
+def _signature(path: str) -> _FileSignature | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _FileSignature(st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class ApiKeyStore:
+    """API keys loaded once per process and swapped atomically on reload.
+
+    Keys come from ``TODO_API_KEY`` (one plaintext key, identity ``default``) and
+    ``TODO_API_KEYS_FILE`` (SHA-256 digests with identities), both read at load time.
+    The key set holds only digests. Presented keys are hashed and looked up by digest,
+    so the time taken never depends on how much of a stored key a guess gets right.
+    Keys that verified recently sit in an LRU, keyed by the plaintext key, and skip
+    hashing: the last ``cache_size`` valid keys stay in process memory until the next
+    reload (a keyed hash would cost more than the SHA-256 it saves; ``cache_size=0``
+    keeps no plaintext). Failures are never cached, so invalid guesses cannot evict
+    real callers.
+    """
+
+    def __init__(self, cache_size: int) -> None:
+        self.cache_size = cache_size
+        self._keys: dict[bytes, str] | None = None
+        self._file: str | None = None
+        self._signature: _FileSignature | None = None
+        self._verified: OrderedDict[str, str] = OrderedDict()
+        # Dependencies run in the threadpool, so LRU updates need a lock
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any key is configured; with none, auth is disabled."""
+        return bool(self._load())
+
+    @property
+    def key_file(self) -> str | None:
+        """``TODO_API_KEYS_FILE`` as of the last load."""
+        return self._file
+
+    def _load(self) -> dict[bytes, str]:
+        keys = self._keys
+        if keys is None:
+            self.reload()
+            keys = self._keys
+            assert keys is not None
+        return keys
+
+    def reload(self) -> int:
+        """Re-read the environment and key file; returns the number of keys.
+
+        On error the previous keys stay in effect and the exception propagates.
+        """
+        path = os.getenv("TODO_API_KEYS_FILE") or None
+        signature = _signature(path) if path else None
+        try:
+            keys: dict[bytes, str] = {}
+            if path:
+                with open(path, encoding="utf-8") as f:
+                    keys = parse_key_file(f.read())
+            single = os.getenv("TODO_API_KEY")
+            if single:
+                keys.setdefault(hashlib.sha256(single.encode()).digest(), DEFAULT_IDENTITY)
+        except (OSError, ValueError):
+            inc_api_key_reload("error")
+            raise
+        with self._lock:
+            self._keys = keys
+            self._file = path
+            self._signature = signature
+            # Revoked keys must not keep verifying from the LRU
+            self._verified.clear()
+        inc_api_key_reload("ok")
+        return len(keys)
+
+    def reload_or_log(self) -> bool:
+        """``reload`` for signal handlers and the watcher: errors are logged, not raised."""
+        try:
+            count = self.reload()
+        except (OSError, ValueError):
+            logger.exception("API key reload failed; keeping the previous keys")
+            return False
+        logger.info("loaded %d API keys", count)
+        return True
+
+    def unload(self) -> None:
+        """Forget the loaded keys; the next verification loads them again."""
+        with self._lock:
+            self._keys = None
+            self._verified.clear()
+
+    def file_changed(self) -> bool:
+        return self._file is not None and _signature(self._file) != self._signature
+
+    def identify(self, key: str | None) -> str | None:
+        """Identity of ``key``, or ``None`` if it is missing or unknown (nothing counted)."""
+        keys = self._load()
+        if not key:
+            return None
+        # Lookups hash with Python's per-process random seed, so hit timing reveals
+        # nothing an attacker can steer toward a stored key
+        with self._lock:
+            identity = self._verified.get(key)
+            if identity is not None:
+                self._verified.move_to_end(key)
+                return identity
+        identity = keys.get(hashlib.sha256(key.encode()).digest())
+        if identity is not None and self.cache_size > 0:
+            with self._lock:
+                # Skip if a reload swapped the keys while this one was hashed
+                if keys is self._keys:
+                    self._verified[key] = identity
+                    while len(self._verified) > self.cache_size:
+                        self._verified.popitem(last=False)
+        return identity
+
+    def verify(self, key: str | None) -> str | None:
+        """``identify``, counting the request per identity or the rejection."""
+        identity = self.identify(key)
+        if identity is None:
+            inc_api_key_rejected("missing" if not key else "invalid")
+            return None
+        inc_api_key_request(identity)
+        return identity
+
+
+async def watch_key_file(store: ApiKeyStore, interval: float = API_KEYS_RELOAD_INTERVAL) -> None:
+    """Reload ``store`` whenever its key file changes, until cancelled (app lifespan)."""
+    while True:
+        await asyncio.sleep(interval)
+        if store.file_changed():
+            store.reload_or_log()
+
+
+api_keys = ApiKeyStore(API_KEY_CACHE_SIZE)
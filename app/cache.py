@@ -0,0 +1,112 @@
+import hashlib
+import os
+import secrets
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+
+from app.routers.metrics import inc_cache_eviction, record_cache_lookup
+
+# Max cached response bodies; 0 keeps ETag/304 handling but stores nothing
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("TODO_RESPONSE_CACHE_SIZE", "1024"))
+
+# Distinguishes processes so ETags minted by one worker never validate in another
+_INSTANCE = secrets.token_hex(4)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    """LRU of serialized GET responses, invalidated wholesale by a table version counter.
+
+    Every write bumps ``version`` and drops all entries. ETags are derived from the
+    version and the normalized request key, so a matching ``If-None-Match`` can be
+    answered without touching the LRU.
+
+    Writes made by other processes (other workers, scripts) are picked up through
+    ``data_version``, a cheap callable whose value changes whenever anything commits
+    to the database; it is checked on every lookup and the cache invalidated when it
+    moves.
+    """
+
+    def __init__(self, max_entries: int, data_version: Callable[[], int] | None = None) -> None:
+        self.max_entries = max_entries
+        self._version = 0
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self.watch(data_version)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def watch(self, data_version: Callable[[], int] | None) -> None:
+        """Invalidate whenever ``data_version()`` changes (``None`` stops watching)."""
+        self._data_version = data_version
+        self._seen = data_version() if data_version is not None else None
+
+    def _sync(self) -> None:
+        if self._data_version is None:
+            return
+        current = self._data_version()
+        if current != self._seen:
+            self._seen = current
+            self.invalidate()
+
+    @property
+    def version(self) -> int:
+        """Table version, after catching up with commits made anywhere."""
+        self._sync()
+        return self._version
+
+    def etag(self, key: Hashable, version: int | None = None) -> str:
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+        # Weak: the representation may be re-encoded (e.g. compressed) on the way out
+        return f'W/"{_INSTANCE}-{self._version if version is None else version}-{digest}"'
+
+    def not_modified(self, key: Hashable, if_none_match: str | None, route: str) -> str | None:
+        """Return the current ETag when the client's copy is still fresh, else ``None``."""
+        if not if_none_match:
+            return None
+        self._sync()
+        current = self.etag(key)
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or current.removeprefix("W/") in tags:
+            record_cache_lookup(route, "not_modified")
+            return current
+        return None
+
+    def get(self, key: Hashable, route: str) -> CachedResponse | None:
+        self._sync()
+        entry = self._entries.get(key)
+        if entry is None:
+            record_cache_lookup(route, "miss")
+            return None
+        self._entries.move_to_end(key)
+        record_cache_lookup(route, "hit")
+        return entry
+
+    def put(self, key: Hashable, version: int, body: bytes) -> CachedResponse:
+        """Store ``body`` computed at ``version``; skipped if a write landed meanwhile."""
+        entry = CachedResponse(etag=self.etag(key, version), body=body)
+        # A commit since ``version`` was read (here or elsewhere) makes the body suspect
+        if version != self.version or self.max_entries <= 0:
+            return entry
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            inc_cache_eviction("lru")
+        return entry
+
+    def invalidate(self) -> None:
+        """Record a write to the todo table: new ETags for everything, drop cached bodies."""
+        self._version += 1
+        if self._entries:
+            inc_cache_eviction("invalidation", len(self._entries))
+            self._entries.clear()
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,246 @@
+import os
+import zlib
+from collections.abc import Callable
+from typing import Any, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.routers.metrics import record_compression
+
+# Optional codecs: gzip is always available, zstd and brotli when their modules import
+zstd: Any
+try:
+    from compression import zstd  # type: ignore[import-not-found, no-redef]  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard as zstd  # type: ignore[import-not-found, no-redef]
+    except ImportError:
+        zstd = None
+brotli: Any
+try:
+    import brotli  # type: ignore[import-not-found, no-redef]
+except ImportError:
+    brotli = None
+
+# Server preference order; unavailable codecs are skipped and "" disables compression
+COMPRESSION_ENCODINGS = os.getenv("TODO_COMPRESSION_ENCODINGS", "zstd,br,gzip")
+# Complete responses smaller than this are sent as is (streamed ones are always compressed)
+COMPRESSION_MIN_SIZE = int(os.getenv("TODO_COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_TYPES = os.getenv(
+    "TODO_COMPRESSION_TYPES",
+    "application/json,application/x-ndjson,text/csv,text/plain,text/html",
+)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+# Event streams are never compressed: intermediaries that see Content-Encoding may
+# buffer them, which delays events until a buffer fills
+NEVER_COMPRESSED_TYPES = frozenset({"text/event-stream"})
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes:
+        """Emit everything compressed so far, keeping the stream open."""
+        ...
+
+    def finish(self) -> bytes: ...
+
+
+class GzipCompressor:
+    def __init__(self) -> None:
+        # wbits=31: zlib deflate with a gzip header and trailer
+        self._z = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class BrotliCompressor:
+    def __init__(self) -> None:
+        self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(self._c.process(data))
+
+    def flush(self) -> bytes:
+        return bytes(self._c.flush())
+
+    def finish(self) -> bytes:
+        return bytes(self._c.finish())
+
+
+class ZstdCompressor:
+    def __init__(self) -> None:
+        if hasattr(zstd, "ZstdCompressor") and hasattr(zstd.ZstdCompressor, "FLUSH_BLOCK"):
+            self._c = zstd.ZstdCompressor(level=ZSTD_LEVEL)  # compression.zstd
+            self._flush_block = zstd.ZstdCompressor.FLUSH_BLOCK
+            self._flush_frame = zstd.ZstdCompressor.FLUSH_FRAME
+        else:
+            self._c = zstd.ZstdCompressor(level=ZSTD_LEVEL).compressobj()  # zstandard
+            self._flush_block = zstd.COMPRESSOBJ_FLUSH_BLOCK
+            self._flush_frame = zstd.COMPRESSOBJ_FLUSH_FINISH
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(self._c.compress(data))
+
+    def flush(self) -> bytes:
+        return bytes(self._c.flush(self._flush_block))
+
+    def finish(self) -> bytes:
+        return bytes(self._c.flush(self._flush_frame))
+
+
+_COMPRESSORS: dict[str, Callable[[], Compressor] | None] = {
+    "zstd": ZstdCompressor if zstd is not None else None,
+    "br": BrotliCompressor if brotli is not None else None,
+    "gzip": GzipCompressor,
+}
+
+
+def available_encodings(configured: str) -> tuple[str, ...]:
+    names = [name.strip().lower() for name in configured.split(",") if name.strip()]
+    return tuple(name for name in names if _COMPRESSORS.get(name) is not None)
+
+
+def choose_encoding(accept_encoding: str | None, encodings: tuple[str, ...]) -> str | None:
+    """Highest-q encoding the client accepts; ties go to the first in ``encodings``."""
+    accepted: dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        name, _, value = params.partition("=")
+        try:
+            quality = float(value) if name.strip().lower() == "q" else 1.0
+        except ValueError:
+            continue
+        if coding:
+            accepted[coding] = quality
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_q:
+            best, best_q = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """Pure ASGI response compression negotiated from ``Accept-Encoding``.
+
+    Complete responses are compressed in one go (and left alone below the size
+    threshold). Streamed responses are compressed chunk by chunk, each body message
+    flushed so the client receives data as soon as the app produces it. Only media
+    types in the allowlist are touched; others, and responses that already carry a
+    ``Content-Encoding``, pass through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: str = COMPRESSION_ENCODINGS,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        content_types: str = COMPRESSION_TYPES,
+    ) -> None:
+        self.app = app
+        self.encodings = available_encodings(encodings)
+        self.minimum_size = minimum_size
+        self.content_types = (
+            frozenset(t.strip().lower() for t in content_types.split(",") if t.strip())
+            - NEVER_COMPRESSED_TYPES
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        start: Message | None = None
+        compressor: Compressor | None = None
+        raw = compressed = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, compressor, raw, compressed
+            if message["type"] == "http.response.start":
+                # Held back until the first body message shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                start_message, start = start, None
+                compressor = self._start(start_message, encoding, body, more_body)
+                if compressor is None:
+                    await send(start_message)
+                    await send(message)
+                    return
+                headers = MutableHeaders(scope=start_message)
+                if not more_body:
+                    data = compressor.compress(body) + compressor.finish()
+                    headers["content-length"] = str(len(data))
+                    raw, compressed = len(body), len(data)
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send(start_message)
+            if compressor is None:
+                await send(message)
+                return
+            data = compressor.compress(body) + (
+                compressor.flush() if more_body else compressor.finish()
+            )
+            raw += len(body)
+            compressed += len(data)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+        if encoding is not None and compressed:
+            record_compression(encoding, raw, compressed)
+
+    def _start(
+        self, message: Message, encoding: str | None, body: bytes, more_body: bool
+    ) -> Compressor | None:
+        """Decide whether to compress; adjusts the start message's headers if so."""
+        status = message["status"]
+        headers = MutableHeaders(scope=message)
+        media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if status == 304:
+            # A 304 repeats the Vary of the 200 it stands for (RFC 9110 section 15.4.5);
+            # it rarely names a content type, so only an excluded one opts out
+            if media_type in self.content_types or not media_type:
+                headers.add_vary_header("Accept-Encoding")
+            return None
+        if status < 200 or status == 204 or media_type not in self.content_types:
+            return None
+        if "content-encoding" in headers:
+            return None
+        # The representation depends on Accept-Encoding even when sent uncompressed
+        headers.add_vary_header("Accept-Encoding")
+        if encoding is None:
+            return None
+        length = headers.get("content-length")
+        size = int(length) if length is not None else None
+        if not more_body and len(body) < self.minimum_size:
+            return None
+        if size is not None and size < self.minimum_size:
+            return None
+        factory = _COMPRESSORS[encoding]
+        assert factory is not None
+        headers["content-encoding"] = encoding
+        if "content-length" in headers:
+            del headers["content-length"]
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            # The compressed bytes differ, so a strong validator would be wrong
+            headers["etag"] = f"W/{etag}"
+        return factory()
@@ -1,50 +1,409 @@
-from collections.abc import Iterator
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable, Iterator
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Concatenate, ParamSpec, TypeVar, cast
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import Engine, Row, Select, create_engine, event, make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.cache import response_cache
+from app.migrations import (
+    COUNTS_TABLE,
+    SCHEMA_VERSION_TABLE,
+    SEARCH_TABLE,
+    SYNC_TABLE,
+    migrate,
+)
+from app.profiling import current_profile
+from app.routers.metrics import (
+    count_db_query,
+    inc_db_error,
+    inc_slow_query,
+    observe_db_rows,
+    record_db_timing,
+)
+
+P = ParamSpec("P")
+T = TypeVar("T")
 
 # Use project-root-based .data directory to avoid CWD issues
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DB_PATH = PROJECT_ROOT / ".data"
 DB_PATH.mkdir(exist_ok=True)
-DATABASE_URL = f"sqlite:///{(DB_PATH / 'todo.db').as_posix()}"
+DATABASE_URL = os.getenv("TODO_DATABASE_URL", f"sqlite:///{(DB_PATH / 'todo.db').as_posix()}")
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """Per-connection SQLite PRAGMAs and pool sizing; ``None`` keeps SQLite's default."""
+
+    journal_mode: str | None = "WAL"
+    synchronous: str | None = "NORMAL"
+    mmap_size: int | None = 256 * 1024 * 1024
+    cache_size: int | None = -64 * 1024  # negative = KiB, i.e. 64 MiB
+    temp_store: str | None = "MEMORY"
+    busy_timeout_ms: int | None = 5000
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30.0
+
+    @classmethod
+    def sqlite_defaults(cls) -> "EngineProfile":
+        """Untuned profile (rollback journal, full fsync) used as a benchmark baseline."""
+        return cls(
+            journal_mode=None,
+            synchronous=None,
+            mmap_size=None,
+            cache_size=None,
+            temp_store=None,
+            busy_timeout_ms=None,
+            pool_size=5,
+            max_overflow=10,
+        )
+
+    @classmethod
+    def from_env(cls) -> "EngineProfile":
+        """Build the profile from ``TODO_DB_PROFILE`` (tuned|sqlite-default) plus overrides."""
+        base = cls.sqlite_defaults() if os.getenv("TODO_DB_PROFILE") == "sqlite-default" else cls()
+
+        def _str(name: str, current: str | None) -> str | None:
+            value = os.getenv(name)
+            return value if value else current
+
+        def _int(name: str, current: int | None) -> int | None:
+            value = os.getenv(name)
+            return int(value) if value else current
+
+        return cls(
+            journal_mode=_str("TODO_DB_JOURNAL_MODE", base.journal_mode),
+            synchronous=_str("TODO_DB_SYNCHRONOUS", base.synchronous),
+            mmap_size=_int("TODO_DB_MMAP_SIZE", base.mmap_size),
+            cache_size=_int("TODO_DB_CACHE_SIZE", base.cache_size),
+            temp_store=_str("TODO_DB_TEMP_STORE", base.temp_store),
+            busy_timeout_ms=_int("TODO_DB_BUSY_TIMEOUT_MS", base.busy_timeout_ms),
+            pool_size=int(os.getenv("TODO_DB_POOL_SIZE", str(base.pool_size))),
+            max_overflow=int(os.getenv("TODO_DB_MAX_OVERFLOW", str(base.max_overflow))),
+            pool_timeout=float(os.getenv("TODO_DB_POOL_TIMEOUT", str(base.pool_timeout))),
+        )
+
+    def pragmas(self) -> list[tuple[str, str | int]]:
+        candidates: list[tuple[str, str | int | None]] = [
+            # busy_timeout first so the WAL switch itself waits on a locked file
+            ("busy_timeout", self.busy_timeout_ms),
+            ("journal_mode", self.journal_mode),
+            ("synchronous", self.synchronous),
+            ("mmap_size", self.mmap_size),
+            ("cache_size", self.cache_size),
+            ("temp_store", self.temp_store),
+        ]
+        return [(name, value) for name, value in candidates if value is not None]
+
+
+def apply_profile(target: Engine, profile: EngineProfile) -> None:
+    """Register a connect hook that applies the profile's PRAGMAs to every new connection."""
+    pragmas = profile.pragmas()
+
+    @event.listens_for(target, "connect")
+    def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+_TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE|ON)\s+"?(\w+)', re.IGNORECASE)
+_STATEMENT_LABELS_MAX = 512
+_statement_labels: dict[str, tuple[str, str]] = {}
+
+
+def statement_labels(statement: str) -> tuple[str, str]:
+    """Return ``(statement type, first table)`` for SQL text, e.g. ``("select", "todo")``."""
+    labels = _statement_labels.get(statement)
+    if labels is None:
+        verb = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "other"
+        match = _TABLE_PATTERN.search(statement)
+        labels = (verb, match.group(1) if match else "none")
+        if len(_statement_labels) >= _STATEMENT_LABELS_MAX:
+            # Expanded IN (...) lists make statement text vary; keep the memo bounded
+            _statement_labels.clear()
+        _statement_labels[statement] = labels
+    return labels
+
+
+# Prefix of the slow-query log's plan lookups; cursors leave them out of the row metrics
+EXPLAIN_PREFIX = "EXPLAIN QUERY PLAN "
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Counts rows fetched and reports them (or rows affected) when the cursor closes."""
+
+    _labels: tuple[str, str] | None = None
+    _rows = 0
+
+    def execute(self, sql: str, parameters: Any = (), /) -> "InstrumentedCursor":
+        labels = None if sql.startswith(EXPLAIN_PREFIX) else statement_labels(sql)
+        self._labels, self._rows = labels, 0
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> "InstrumentedCursor":
+        self._labels, self._rows = statement_labels(sql), 0
+        return super().executemany(sql, seq_of_parameters)
+
+    def fetchone(self) -> Any:
+        row = super().fetchone()
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        rows = super().fetchall()
+        self._rows += len(rows)
+        return rows
+
+    def close(self) -> None:
+        if self._labels is not None:
+            statement_type, table = self._labels
+            rows = self._rows if self.description is not None else max(self.rowcount, 0)
+            observe_db_rows(statement_type, table, rows)
+            self._labels = None
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory: Any = InstrumentedCursor) -> Any:
+        return super().cursor(factory)
+
+
+# Slow-query log: statements at or above the threshold are logged with their SQL, bound
+# parameters (redacted to type names unless TODO_SLOW_QUERY_PARAMS=show) and, when
+# TODO_SLOW_QUERY_EXPLAIN is on, SQLite's EXPLAIN QUERY PLAN. 0 disables the log.
+SLOW_QUERY_MS = float(os.getenv("TODO_SLOW_QUERY_MS", "250"))
+SLOW_QUERY_PARAMS = os.getenv("TODO_SLOW_QUERY_PARAMS", "redact")
+SLOW_QUERY_EXPLAIN = os.getenv("TODO_SLOW_QUERY_EXPLAIN", "1") != "0"
+_EXPLAINABLE = {"select", "insert", "update", "delete", "with"}
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+
+def _loggable_params(parameters: Any, executemany: bool) -> Any:
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if SLOW_QUERY_PARAMS == "show":
+        return parameters
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, list | tuple):
+        return [
+            (
+                _loggable_params(p, False)
+                if isinstance(p, list | tuple | dict)
+                else f"<{type(p).__name__}>"
+            )
+            for p in parameters
+        ]
+    return "<redacted>"
+
+
+def _explain(conn: Any, statement: str, parameters: Any) -> list[str]:
+    # A raw DBAPI cursor, so no cursor events fire: the lookup is not timed, counted
+    # per request or added to the profile of the query it explains
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(EXPLAIN_PREFIX + statement, parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def log_slow_query(
+    conn: Any,
+    statement: str,
+    parameters: Any,
+    executemany: bool,
+    operation: str,
+    table: str,
+    duration: float,
+) -> None:
+    inc_slow_query(operation, table)
+    plan: list[str] = []
+    statement_type = statement_labels(statement)[0]
+    if SLOW_QUERY_EXPLAIN and not executemany and statement_type in _EXPLAINABLE:
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception as exc:  # the plan is best-effort diagnostics
+            plan = [f"EXPLAIN failed: {exc}"]
+    duration_ms = round(duration * 1000, 3)
+    params = _loggable_params(parameters, executemany)
+    slow_query_logger.warning(
+        "slow query (%.1f ms, %s on %s): %s params=%s plan=%s",
+        duration_ms,
+        operation,
+        table,
+        " ".join(statement.split()),
+        params,
+        " | ".join(plan),
+        extra={"sql": statement, "params": params, "plan": plan, "duration_ms": duration_ms},
+    )
+
+
+def instrument_engine(target: Engine) -> None:
+    """Record latency, errors and per-request counts for every statement run on ``target``.
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    The ``db_query_duration_seconds`` operation label is the statement's
+    ``execution_options(operation=...)`` when set, else its type (select, insert, ...).
+    """
+
+    def _labels(statement: str, context: Any) -> tuple[str, str]:
+        statement_type, table = statement_labels(statement)
+        operation = context.execution_options.get("operation") if context is not None else None
+        return operation or statement_type, table
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _start_timer(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def _record_query(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        operation, table = _labels(statement, context)
+        record_db_timing(operation, table, duration)
+        count_db_query()
+        profile = current_profile()
+        if profile is not None:
+            profile.db += duration
+            profile.queries += 1
+        if SLOW_QUERY_MS > 0 and duration * 1000 >= SLOW_QUERY_MS:
+            log_slow_query(conn, statement, parameters, executemany, operation, table, duration)
+
+    @event.listens_for(target, "handle_error")
+    def _record_error(exception_context: Any) -> None:
+        starts = (
+            exception_context.connection.info.get("query_start")
+            if exception_context.connection
+            else None
+        )
+        if starts:
+            starts.pop()
+        statement = exception_context.statement or ""
+        inc_db_error(*_labels(statement, exception_context.execution_context))
+
+
+def create_db_engine(url: str, profile: EngineProfile) -> Engine:
+    eng = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "factory": InstrumentedConnection},
+        poolclass=QueuePool,
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        pool_timeout=profile.pool_timeout,
+    )
+    apply_profile(eng, profile)
+    instrument_engine(eng)
+    return eng
+
+
+def data_version_reader(url: str) -> Callable[[], int] | None:
+    """``PRAGMA data_version`` on a private connection, for ``ResponseCache.watch``.
+
+    The value changes whenever another connection commits to the file, from this
+    process or any other, and reading it costs a few microseconds. ``None`` for
+    in-memory databases, which no other process can write.
+    """
+    path = make_url(url).database
+    if not path or path == ":memory:":
+        return None
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    lock = threading.Lock()
+
+    def read() -> int:
+        with lock:
+            return int(conn.execute("PRAGMA data_version").fetchone()[0])
+
+    return read
+
+
+engine_profile = EngineProfile.from_env()
+engine = create_db_engine(DATABASE_URL, engine_profile)
+# Other workers' writes must invalidate this worker's cached responses too
+response_cache.watch(data_version_reader(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# "sync": blocking Session run in the threadpool; "async": aiosqlite AsyncSession
+DB_MODE = os.getenv("TODO_DB_MODE", "sync")
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+_async_engine: AsyncEngine | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Create the aiosqlite engine on first use so sync deployments never import it."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_size=engine_profile.pool_size,
+            max_overflow=engine_profile.max_overflow,
+            pool_timeout=engine_profile.pool_timeout,
+            connect_args={"factory": InstrumentedConnection},
+        )
+        apply_profile(_async_engine.sync_engine, engine_profile)
+        instrument_engine(_async_engine.sync_engine)
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+# Set once migrations have run in this process; request handlers never re-check the schema
+_schema_current = False
+
 
 def init_db() -> None:
-    SQLModel.metadata.create_all(bind=engine)
-    ensure_schema()
+    """Apply pending schema migrations (called once from the app lifespan)."""
+    global _schema_current
+    migrate(engine)
+    _schema_current = True
 
 
 def ensure_schema() -> None:
-    """Ensure SQLite schema has latest optional columns.
+    """Run migrations unless they already ran in this process.
 
-    Adds new nullable columns via ALTER TABLE if they are missing.
-    Safe to run multiple times.
+    Only a flag check once the schema is current; safe to call from scripts.
     """
-    with engine.connect() as conn:
-        # Ensure base tables exist before attempting ALTERs
-        tbl = conn.execute(
-            text("SELECT name FROM sqlite_master WHERE type='table' AND name='todo'")
-        ).fetchone()
-        if tbl is None:
-            # Create tables if missing
-            SQLModel.metadata.create_all(bind=engine)
-        # Inspect existing columns
-        cols = conn.execute(text("PRAGMA table_info('todo')")).fetchall()
-        existing = {row[1] for row in cols}  # row[1] = name
-
-        if "due_at" not in existing:
-            conn.execute(text("ALTER TABLE todo ADD COLUMN due_at DATETIME NULL"))
-        if "priority" not in existing:
-            conn.execute(text("ALTER TABLE todo ADD COLUMN priority VARCHAR NULL"))
-        if "deleted_at" not in existing:
-            conn.execute(text("ALTER TABLE todo ADD COLUMN deleted_at DATETIME NULL"))
-        conn.commit()
+    if not _schema_current:
+        init_db()
+
+
+def mark_schema_stale() -> None:
+    """Force the next ``ensure_schema()`` to re-run migrations."""
+    global _schema_current
+    _schema_current = False
 
 
 def get_session() -> Iterator[Session]:
@@ -52,7 +411,89 @@ def get_session() -> Iterator[Session]:
         yield session
 
 
+class DbRunner(ABC):
+    """Runs synchronous ORM callables ``fn(session, ...)`` without blocking the event loop."""
+
+    @abstractmethod
+    async def run(
+        self, fn: Callable[Concatenate[Session, P], T], *args: P.args, **kwargs: P.kwargs
+    ) -> T: ...
+
+    @abstractmethod
+    def stream(self, stmt: Select[Any], batch_size: int) -> AsyncIterator[list[Row[Any]]]:
+        """Yield the rows of ``stmt`` in batches from a server-side cursor.
+
+        Uses its own session, so iteration may outlive the request's dependencies (e.g. a
+        ``StreamingResponse`` body); the read transaction stays open until exhausted or
+        closed.
+        """
+
+
+class ThreadpoolRunner(DbRunner):
+    """Sync mode: a blocking ``Session`` driven from the anyio threadpool."""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    async def run(
+        self, fn: Callable[Concatenate[Session, P], T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def stream(self, stmt: Select[Any], batch_size: int) -> AsyncIterator[list[Row[Any]]]:
+        session = Session(engine)
+        try:
+            result = await run_in_threadpool(
+                session.execute, stmt.execution_options(yield_per=batch_size)
+            )
+            while rows := await run_in_threadpool(result.fetchmany, batch_size):
+                yield list(rows)
+        finally:
+            # Not awaited: a disconnected client cancels this generator, and closing only
+            # returns the connection to the pool
+            session.close()
+
+
+class AsyncSessionRunner(DbRunner):
+    """Async mode: ``AsyncSession.run_sync`` awaits aiosqlite I/O on the event loop."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def run(
+        self, fn: Callable[Concatenate[Session, P], T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        # sqlmodel's AsyncSession wraps a sqlmodel Session; run_sync is typed for the base class
+        return await self.session.run_sync(cast(Callable[..., T], fn), *args, **kwargs)
+
+    async def stream(self, stmt: Select[Any], batch_size: int) -> AsyncIterator[list[Row[Any]]]:
+        async with AsyncSession(get_async_engine()) as session:
+            result = await session.stream(stmt.execution_options(yield_per=batch_size))
+            async for rows in result.partitions(batch_size):
+                yield list(rows)
+
+
+async def get_db() -> AsyncIterator[DbRunner]:
+    """Request-scoped DB access for the configured ``TODO_DB_MODE``."""
+    if DB_MODE == "async":
+        async with AsyncSession(get_async_engine()) as async_session:
+            yield AsyncSessionRunner(async_session)
+        return
+    session = Session(engine)
+    try:
+        yield ThreadpoolRunner(session)
+    finally:
+        await run_in_threadpool(session.close)
+
+
 def reset_db() -> None:
-    """Drop and recreate all tables (used in tests)."""
+    """Drop all tables and migrate a fresh schema (used in tests)."""
     SQLModel.metadata.drop_all(bind=engine)
-    SQLModel.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {SYNC_TABLE}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {COUNTS_TABLE}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {SCHEMA_VERSION_TABLE}"))
+    mark_schema_stale()
+    init_db()
+    response_cache.invalidate()
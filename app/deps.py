@@ -1,18 +1,18 @@
-import os
-
 from fastapi import Header, HTTPException, status
 
+from app.auth import api_keys
+
 
 def require_api_key(
     x_api_key: str | None = Header(default=None, alias="X-API-Key"),
-) -> None:
-    configured = os.getenv("TODO_API_KEY")
-    if not configured:
-        # No key configured => auth disabled
+) -> str | None:
+    """Identity of the caller's key, or ``None`` when no keys are configured (auth disabled)."""
+    if not api_keys.enabled:
         return None
-    if x_api_key != configured:
+    identity = api_keys.verify(x_api_key)
+    if identity is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or missing API key",
         )
-    return None
+    return identity
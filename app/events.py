@@ -0,0 +1,148 @@
+import asyncio
+import os
+import secrets
+from collections import deque
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from app.routers.metrics import (
+    inc_event_published,
+    inc_event_resume,
+    inc_event_subscriber_dropped,
+    track_event_subscriber,
+)
+
+# Recent events kept for Last-Event-ID resume; older ids get a "reset" event instead
+EVENTS_REPLAY_SIZE = int(os.getenv("TODO_EVENTS_REPLAY_SIZE", "1000"))
+# Events queued per subscriber before it is treated as a slow consumer and disconnected
+EVENTS_QUEUE_SIZE = int(os.getenv("TODO_EVENTS_QUEUE_SIZE", "256"))
+# Seconds between keep-alive comments on an idle stream
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("TODO_EVENTS_HEARTBEAT", "15"))
+# Reconnect delay advertised to EventSource clients
+EVENTS_RETRY_MS = 3000
+
+# Event ids are "<instance>-<seq>": ids from another process or an earlier run never match
+_INSTANCE = secrets.token_hex(4)
+
+
+@dataclass(frozen=True)
+class TodoEvent:
+    seq: int
+    # Encoded once at publish time and shared by every subscriber
+    frame: bytes
+
+
+class Subscription:
+    """One open stream: a bounded queue of events; ``None`` tells the stream to close."""
+
+    def __init__(self, max_queued: int) -> None:
+        self.queue: asyncio.Queue[TodoEvent | None] = asyncio.Queue(max_queued)
+
+
+class EventBroadcaster:
+    """In-process fan-out of todo change events to Server-Sent Events streams.
+
+    ``publish`` never blocks or awaits: each subscriber has a bounded queue, and a
+    subscriber whose queue is full is disconnected instead of stalling the writer or
+    buffering without limit. Its client reconnects with ``Last-Event-ID`` and catches
+    up from the replay buffer. Must be used from the event loop thread.
+    """
+
+    def __init__(self, replay_size: int, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._seq = 0
+        self._replay: deque[TodoEvent] = deque(maxlen=max(replay_size, 0))
+        self._subscribers: set[Subscription] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    @staticmethod
+    def event_id(seq: int) -> str:
+        return f"{_INSTANCE}-{seq}"
+
+    def publish(self, event_type: str, data: bytes) -> None:
+        """Send one event (``data`` is a single-line JSON document) to every subscriber."""
+        self._seq += 1
+        frame = b"id: %s\nevent: %s\ndata: %s\n\n" % (
+            self.event_id(self._seq).encode(),
+            event_type.encode(),
+            data,
+        )
+        event = TodoEvent(seq=self._seq, frame=frame)
+        self._replay.append(event)
+        inc_event_published(event_type)
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._disconnect(subscription, "slow_consumer")
+
+    def subscribe(self, last_event_id: str | None) -> tuple[Subscription, list[TodoEvent] | None]:
+        """Register a stream and return the events it missed since ``last_event_id``.
+
+        The backlog is ``None`` when those events can no longer be replayed (the id is
+        unknown or already pushed out of the buffer); the client then has to re-list.
+        """
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        track_event_subscriber(1)
+        if last_event_id is None:
+            return subscription, []
+        instance, _, seq_text = last_event_id.strip().rpartition("-")
+        oldest = self._replay[0].seq if self._replay else self._seq + 1
+        if instance != _INSTANCE or not seq_text.isdigit():
+            inc_event_resume("reset")
+            return subscription, None
+        seq = int(seq_text)
+        if seq > self._seq or seq < oldest - 1:
+            inc_event_resume("reset")
+            return subscription, None
+        inc_event_resume("replayed")
+        return subscription, [event for event in self._replay if event.seq > seq]
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        track_event_subscriber(-1)
+
+    def close(self) -> None:
+        """End every open stream (application shutdown)."""
+        for subscription in list(self._subscribers):
+            self._disconnect(subscription, "shutdown")
+
+    def _disconnect(self, subscription: Subscription, reason: str) -> None:
+        self._subscribers.discard(subscription)
+        # Undelivered events are dropped: the client resumes from its Last-Event-ID
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        inc_event_subscriber_dropped(reason)
+
+    async def stream(
+        self, last_event_id: str | None, heartbeat: float = EVENTS_HEARTBEAT_SECONDS
+    ) -> AsyncIterator[bytes]:
+        """SSE body: replayed backlog, then live events, with keep-alive comments when idle."""
+        subscription, backlog = self.subscribe(last_event_id)
+        # Later events are already queued for this subscription
+        current = self.event_id(self._seq).encode()
+        try:
+            yield b"retry: %d\n\n" % EVENTS_RETRY_MS
+            if backlog is None:
+                yield b"id: %s\nevent: reset\ndata: {}\n\n" % current
+            else:
+                for missed in backlog:
+                    yield missed.frame
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield event.frame
+        finally:
+            self.unsubscribe(subscription)
+
+
+events = EventBroadcaster(EVENTS_REPLAY_SIZE, EVENTS_QUEUE_SIZE)
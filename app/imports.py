@@ -0,0 +1,140 @@
+import codecs
+import csv
+from collections.abc import AsyncIterable, AsyncIterator
+from datetime import datetime
+from typing import Any
+
+from pydantic import ValidationError
+
+from app.schemas.todo import TodoCreate
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+
+class ImportFormatError(ValueError):
+    """The body as a whole cannot be imported (e.g. a CSV header without ``title``)."""
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int
+) -> AsyncIterator[tuple[int, bytes | None]]:
+    """Split a byte stream into ``(line_number, line)`` without buffering the body.
+
+    Lines longer than ``max_line_bytes`` are yielded as ``None`` and their bytes are
+    discarded as they arrive, so one runaway line cannot exhaust memory. UTF-8 never
+    uses the newline byte inside a multi-byte sequence, so splitting bytes is safe.
+    """
+    pending = bytearray()
+    oversized = False
+    line_number = 0
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) >= 0:
+            line_number += 1
+            if oversized or len(pending) + end - start > max_line_bytes:
+                yield line_number, None
+            elif pending:
+                pending += chunk[start:end]
+                yield line_number, bytes(pending).removesuffix(b"\r")
+            else:
+                yield line_number, chunk[start:end].removesuffix(b"\r")
+            pending.clear()
+            oversized = False
+            start = end + 1
+        if not oversized:
+            pending += chunk[start:]
+            if len(pending) > max_line_bytes:
+                oversized = True
+                pending.clear()
+    if pending or oversized:
+        yield line_number + 1, None if oversized else bytes(pending).removesuffix(b"\r")
+
+
+def _validation_message(exc: ValidationError) -> str:
+    parts = []
+    for error in exc.errors(include_url=False):
+        location = ".".join(str(part) for part in error["loc"])
+        parts.append(f"{location}: {error['msg']}" if location else error["msg"])
+    return "; ".join(parts)
+
+
+def due_at_error(due_at: datetime | None) -> str | None:
+    """Why ``due_at`` cannot be stored, or ``None`` if it can."""
+    # The column stores UTC; a naive timestamp would fail the whole batch's statement
+    if due_at is not None and due_at.utcoffset() is None:
+        return "due_at: must include a timezone offset"
+    return None
+
+
+def _checked(todo: TodoCreate) -> TodoCreate | str:
+    return due_at_error(todo.due_at) or todo
+
+
+def _parse_json(line: bytes) -> TodoCreate | str:
+    try:
+        return _checked(TodoCreate.model_validate_json(line))
+    except ValidationError as exc:
+        return _validation_message(exc)
+
+
+def _parse_csv(header: list[str], fields: list[str]) -> TodoCreate | str:
+    if len(fields) != len(header):
+        return f"expected {len(header)} fields, got {len(fields)}"
+    # Empty cells are missing values, so optional fields fall back to their defaults
+    values: dict[str, Any] = {
+        name: value for name, value in zip(header, fields, strict=True) if value != ""
+    }
+    try:
+        return _checked(TodoCreate.model_validate(values))
+    except ValidationError as exc:
+        return _validation_message(exc)
+
+
+async def iter_todos(
+    chunks: AsyncIterable[bytes], import_format: str, max_line_bytes: int
+) -> AsyncIterator[tuple[int, TodoCreate | str]]:
+    """Yield ``(line_number, todo)`` for valid records and ``(line_number, error)`` otherwise.
+
+    NDJSON takes one ``TodoCreate`` object per line. CSV needs a header row naming the
+    columns (``title`` required, unknown columns such as ``id`` ignored) and may quote
+    fields across lines; a record is numbered by the line it starts on. Blank lines
+    are skipped.
+    """
+    header: list[str] | None = None
+    record: list[str] = []
+    record_line = 0
+    async for line_number, line in iter_lines(chunks, max_line_bytes):
+        if line is None:
+            record.clear()
+            yield line_number, f"line exceeds {max_line_bytes} bytes"
+            continue
+        if line_number == 1:
+            line = line.removeprefix(codecs.BOM_UTF8)
+        try:
+            text = line.decode("utf-8")
+        except UnicodeDecodeError:
+            record.clear()
+            yield line_number, "invalid UTF-8"
+            continue
+        if import_format == "ndjson":
+            if text.strip():
+                yield line_number, _parse_json(line)
+            continue
+        if not record:
+            if not text.strip():
+                continue
+            record_line = line_number
+        record.append(text)
+        joined = "\n".join(record)
+        if joined.count('"') % 2:
+            continue  # inside a quoted field that continues on the next line
+        record.clear()
+        fields = next(csv.reader([joined]))
+        if header is None:
+            header = [name.strip() for name in fields]
+            if "title" not in header:
+                raise ImportFormatError("CSV header must include a title column")
+            continue
+        yield record_line, _parse_csv(header, fields)
+    if record:
+        yield record_line, "unterminated quoted field"
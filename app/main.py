@@ -1,10 +1,24 @@
+import asyncio
+import contextlib
+import signal
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, status
 
-from app.db import init_db
+from app.auth import API_KEYS_RELOAD_INTERVAL, api_keys, watch_key_file
+from app.compression import CompressionMiddleware
+from app.db import dispose_async_engine, init_db
+from app.events import events
+from app.profiling import ProfilingMiddleware
+from app.purge import (
+    ENABLE_INCREMENTAL_VACUUM,
+    PURGE_INTERVAL_SECONDS,
+    convert_to_incremental_vacuum,
+    run_purge_loop,
+)
+from app.ratelimit import RateLimitMiddleware
 from app.routers.health import router as health_router
-from app.routers.metrics import record_request
+from app.routers.metrics import MetricsMiddleware, mark_process_dead
 from app.routers.metrics import router as metrics_router
 from app.routers.todos import router as todos_router
 
@@ -12,7 +26,36 @@ from app.routers.todos import router as todos_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    # Fails startup on an unreadable or malformed key file instead of running without auth
+    api_keys.reload()
+    loop = asyncio.get_running_loop()
+    sighup = False
+    with contextlib.suppress(AttributeError, NotImplementedError, RuntimeError, ValueError):
+        # `kill -HUP <pid>` reloads the keys (not available on Windows or off the main thread)
+        loop.add_signal_handler(signal.SIGHUP, api_keys.reload_or_log)
+        sighup = True
+    watch_task = None
+    if api_keys.key_file and API_KEYS_RELOAD_INTERVAL > 0:
+        watch_task = asyncio.create_task(watch_key_file(api_keys))
+    purge_task = None
+    if PURGE_INTERVAL_SECONDS > 0:
+        if ENABLE_INCREMENTAL_VACUUM:
+            # One-off full VACUUM on databases created before incremental auto-vacuum
+            await convert_to_incremental_vacuum()
+        purge_task = asyncio.create_task(run_purge_loop())
     yield
+    if sighup:
+        loop.remove_signal_handler(signal.SIGHUP)
+    for task in (watch_task, purge_task):
+        if task is not None:
+            # A purge batch already running in the threadpool finishes and commits first
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    # End open event streams so the server can finish its graceful shutdown
+    events.close()
+    await dispose_async_engine()
+    mark_process_dead()
 
 
 openapi_tags = [
@@ -27,6 +70,15 @@ openapi_tags = [
 ]
 
 app = FastAPI(title="Todo API", version="0.1.0", lifespan=lifespan, openapi_tags=openapi_tags)
+# Innermost, so response size metrics count the bytes actually sent
+app.add_middleware(CompressionMiddleware)
+# Inside the metrics middleware, so 429/503 rejections are still timed and counted by
+# status under the constant path "<rejected>" (todo_requests_rejected_total has them by
+# reason)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Added last so it is outermost and its timings include the other middleware
+app.add_middleware(ProfilingMiddleware)
 
 app.include_router(todos_router)
 app.include_router(health_router)
@@ -39,9 +91,3 @@ async def root():
 
 
 # Using lifespan above instead of deprecated on_event startup
-
-
-@app.middleware("http")
-async def metrics_middleware(request: Request, call_next):
-    # Minimal metrics middleware using metrics.record_request
-    return await record_request(request, call_next)
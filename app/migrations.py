@@ -0,0 +1,266 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import Connection, Engine, text
+from sqlmodel import SQLModel
+
+import app.models.todo  # noqa: F401  (registers the todo table on SQLModel.metadata)
+
+SCHEMA_VERSION_TABLE = "schema_version"
+SEARCH_TABLE = "todo_fts"
+SYNC_TABLE = "todo_sync"
+COUNTS_TABLE = "todo_counts"
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def _column_names(conn: Connection, table: str) -> set[str]:
+    cols = conn.execute(text(f"PRAGMA table_info('{table}')")).fetchall()
+    return {row[1] for row in cols}  # row[1] = name
+
+
+def _create_base_tables(conn: Connection) -> None:
+    SQLModel.metadata.create_all(bind=conn)
+
+
+def _add_optional_columns(conn: Connection) -> None:
+    # Databases created before these columns existed need them added in place
+    existing = _column_names(conn, "todo")
+    if "due_at" not in existing:
+        conn.execute(text("ALTER TABLE todo ADD COLUMN due_at DATETIME NULL"))
+    if "priority" not in existing:
+        conn.execute(text("ALTER TABLE todo ADD COLUMN priority VARCHAR NULL"))
+    if "deleted_at" not in existing:
+        conn.execute(text("ALTER TABLE todo ADD COLUMN deleted_at DATETIME NULL"))
+
+
+def _add_keyset_indexes(conn: Connection) -> None:
+    # Live-row listings filter on deleted_at IS NULL; leading with deleted_at lets
+    # SQLite seek on it and then range-scan the sort column (rowid breaks ties).
+    conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_todo_deleted_at_due_at ON todo (deleted_at, due_at)")
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_todo_deleted_at_created_at "
+            "ON todo (deleted_at, created_at)"
+        )
+    )
+
+
+# Partial indexes over live rows only; SQLite uses them when the query repeats the
+# index's ``deleted_at IS NULL`` predicate, which list_todos always does by default.
+_LIVE_FILTER_INDEXES = {
+    "ix_todo_live_completed_due_at": "completed, due_at",
+    "ix_todo_live_priority_due_at": "priority, due_at",
+    "ix_todo_live_completed_priority_due_at": "completed, priority, due_at",
+}
+
+
+def _add_live_filter_indexes(conn: Connection) -> None:
+    for name, columns in _LIVE_FILTER_INDEXES.items():
+        conn.execute(
+            text(f"CREATE INDEX IF NOT EXISTS {name} ON todo ({columns}) WHERE deleted_at IS NULL")
+        )
+
+
+def _add_title_search(conn: Connection) -> None:
+    # External-content FTS5 table: stores only the index, reads titles from todo
+    conn.execute(
+        text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "title, content='todo', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE TRIGGER IF NOT EXISTS todo_fts_ai AFTER INSERT ON todo BEGIN "
+            f"INSERT INTO {SEARCH_TABLE}(rowid, title) VALUES (new.id, new.title); END"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE TRIGGER IF NOT EXISTS todo_fts_ad AFTER DELETE ON todo BEGIN "
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title) "
+            "VALUES ('delete', old.id, old.title); END"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE TRIGGER IF NOT EXISTS todo_fts_au AFTER UPDATE OF title ON todo BEGIN "
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title) "
+            "VALUES ('delete', old.id, old.title); "
+            f"INSERT INTO {SEARCH_TABLE}(rowid, title) VALUES (new.id, new.title); END"
+        )
+    )
+    # Index rows that existed before the triggers
+    conn.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+# Trigger-side equivalent of the microsecond text format SQLAlchemy stores DATETIMEs in
+_SQL_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'"
+
+
+def _add_row_versions(conn: Connection) -> None:
+    existing = _column_names(conn, "todo")
+    if "updated_at" not in existing:
+        conn.execute(text("ALTER TABLE todo ADD COLUMN updated_at DATETIME NULL"))
+    if "version" not in existing:
+        conn.execute(text("ALTER TABLE todo ADD COLUMN version INTEGER NULL"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_todo_version ON todo (version)"))
+    # Single-row counter rather than MAX(version) + 1, so versions are never reused
+    # after rows are hard-deleted
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {SYNC_TABLE} ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)"
+        )
+    )
+    # Existing rows get versions in id order and their last known change time
+    conn.execute(
+        text(
+            "UPDATE todo SET version = id, updated_at = COALESCE(deleted_at, created_at) "
+            "WHERE version IS NULL"
+        )
+    )
+    conn.execute(
+        text(
+            f"INSERT OR IGNORE INTO {SYNC_TABLE} (id, version) "
+            "SELECT 1, COALESCE(MAX(version), 0) FROM todo"
+        )
+    )
+    bump = (
+        f"UPDATE {SYNC_TABLE} SET version = version + 1 WHERE id = 1; "
+        f"UPDATE todo SET version = (SELECT version FROM {SYNC_TABLE} WHERE id = 1), "
+        f"updated_at = {_SQL_NOW} WHERE id = new.id; "
+    )
+    conn.execute(
+        text(f"CREATE TRIGGER IF NOT EXISTS todo_version_ai AFTER INSERT ON todo BEGIN {bump}END")
+    )
+    # The trigger's own UPDATE changes version, so the WHEN clause stops it re-firing
+    conn.execute(
+        text(
+            "CREATE TRIGGER IF NOT EXISTS todo_version_au AFTER UPDATE ON todo "
+            f"WHEN new.version IS old.version BEGIN {bump}END"
+        )
+    )
+
+
+def _add_purge_horizon(conn: Connection) -> None:
+    # Highest version hard-deleted by the tombstone purge (see app/purge.py)
+    if "purged_version" not in _column_names(conn, SYNC_TABLE):
+        conn.execute(
+            text(f"ALTER TABLE {SYNC_TABLE} ADD COLUMN purged_version INTEGER NOT NULL DEFAULT 0")
+        )
+
+
+# Group key of a row in the counts table; priority is NULL-free so it can be a key column
+def _count_group(row: str) -> str:
+    return f"{row}.deleted_at IS NOT NULL, {row}.completed, COALESCE({row}.priority, '')"
+
+
+def _add_row_counts(conn: Connection) -> None:
+    # Live row counts per (deleted, completed, priority), kept exact by triggers, so
+    # approximate totals for those filters read a handful of rows instead of COUNT(*)
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {COUNTS_TABLE} ("
+            "deleted INTEGER NOT NULL, completed INTEGER NOT NULL, priority VARCHAR NOT NULL, "
+            "n INTEGER NOT NULL, PRIMARY KEY (deleted, completed, priority)) WITHOUT ROWID"
+        )
+    )
+    increment = (
+        f"INSERT INTO {COUNTS_TABLE} (deleted, completed, priority, n) "
+        f"VALUES ({_count_group('new')}, 1) "
+        "ON CONFLICT DO UPDATE SET n = n + 1; "
+    )
+    decrement = (
+        f"UPDATE {COUNTS_TABLE} SET n = n - 1 "
+        f"WHERE (deleted, completed, priority) = ({_count_group('old')}); "
+    )
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS todo_counts_ai AFTER INSERT ON todo BEGIN {increment}END"
+        )
+    )
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS todo_counts_ad AFTER DELETE ON todo BEGIN {decrement}END"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE TRIGGER IF NOT EXISTS todo_counts_au "
+            "AFTER UPDATE OF deleted_at, completed, priority ON todo "
+            f"WHEN ({_count_group('new')}) IS NOT ({_count_group('old')}) "
+            f"BEGIN {decrement}{increment}END"
+        )
+    )
+    # Count rows that existed before the triggers
+    conn.execute(text(f"DELETE FROM {COUNTS_TABLE}"))
+    conn.execute(
+        text(
+            f"INSERT INTO {COUNTS_TABLE} (deleted, completed, priority, n) "
+            f"SELECT {_count_group('todo')}, COUNT(*) FROM todo GROUP BY 1, 2, 3"
+        )
+    )
+
+
+# Ordered list of schema changes. Append new steps; never edit or reorder applied ones.
+# Steps must be idempotent so a database created by a newer create_all still migrates.
+MIGRATIONS: list[Migration] = [
+    Migration(1, "create base tables", _create_base_tables),
+    Migration(2, "add due_at, priority and deleted_at columns", _add_optional_columns),
+    Migration(3, "add keyset pagination indexes", _add_keyset_indexes),
+    Migration(4, "add partial live-row filter indexes", _add_live_filter_indexes),
+    Migration(5, "add FTS5 title search with sync triggers", _add_title_search),
+    Migration(6, "add updated_at and row versions for delta sync", _add_row_versions),
+    Migration(7, "track the tombstone purge horizon", _add_purge_horizon),
+    Migration(8, "add trigger-maintained row counts per filter group", _add_row_counts),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(conn: Connection) -> int:
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+            "version INTEGER NOT NULL PRIMARY KEY, "
+            "description VARCHAR NOT NULL, "
+            "applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+    )
+    row = conn.execute(text(f"SELECT MAX(version) FROM {SCHEMA_VERSION_TABLE}")).fetchone()
+    return int(row[0]) if row is not None and row[0] is not None else 0
+
+
+def migrate(engine: Engine) -> int:
+    """Apply pending migrations in order and return the resulting schema version."""
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT count(*) FROM sqlite_master")).scalar_one() == 0:
+            # Free of charge before the first table exists; existing files need a full
+            # VACUUM instead (see app/purge.py)
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+    with engine.begin() as conn:
+        version = current_version(conn)
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        with engine.begin() as conn:
+            migration.apply(conn)
+            conn.execute(
+                text(
+                    f"INSERT OR IGNORE INTO {SCHEMA_VERSION_TABLE} (version, description) "
+                    "VALUES (:version, :description)"
+                ),
+                {"version": migration.version, "description": migration.description},
+            )
+        version = migration.version
+    return version
@@ -1,5 +1,6 @@
 from datetime import UTC, datetime
 
+from sqlalchemy import Boolean, Column, Float, Integer, MetaData, String, Table
 from sqlmodel import Field, SQLModel
 
 
@@ -11,3 +12,30 @@ class Todo(SQLModel, table=True):
     due_at: datetime | None = Field(default=None, index=True)
     priority: str | None = Field(default=None, index=True, description="low|medium|high")
     deleted_at: datetime | None = Field(default=None, index=True)
+    # Maintained by triggers on every insert/update (see app/migrations.py): version is a
+    # table-wide monotonic counter, so "version > N" is everything changed since N
+    updated_at: datetime | None = Field(default=None)
+    version: int | None = Field(default=None, index=True)
+
+
+# FTS5 index over todo titles, kept in sync by triggers (see app/migrations.py). It lives
+# on its own MetaData so create_all/drop_all never try to manage the virtual table.
+search_metadata = MetaData()
+todo_fts = Table(
+    "todo_fts",
+    search_metadata,
+    Column("rowid", Integer, primary_key=True),
+    Column("title", String),
+    Column("rank", Float),
+)
+
+# Row counts per (deleted, completed, priority), kept exact by triggers (see
+# app/migrations.py); also off SQLModel.metadata since migrations own it
+todo_counts = Table(
+    "todo_counts",
+    search_metadata,
+    Column("deleted", Boolean, primary_key=True),
+    Column("completed", Boolean, primary_key=True),
+    Column("priority", String, primary_key=True),
+    Column("n", Integer),
+)
@@ -0,0 +1,179 @@
+import functools
+import inspect
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.auth import api_keys
+
+# Send "X-Profile: 1" (plus a valid X-API-Key when keys are configured) for Server-Timing
+PROFILE_HEADER = "x-profile"
+
+
+@dataclass
+class RequestProfile:
+    """Timestamps and accumulated durations (seconds) for one profiled request."""
+
+    started: float
+    db: float = 0.0
+    queries: int = 0
+    serialization: float = 0.0
+    route_start: float | None = None
+    route_end: float | None = None
+    endpoint_start: float | None = None
+    endpoint_end: float | None = None
+
+    def breakdown(self, now: float) -> dict[str, float]:
+        total = now - self.started
+        route_start = self.route_start if self.route_start is not None else now
+        route_end = self.route_end if self.route_end is not None else now
+        if self.endpoint_start is None:
+            # Request validation failed: the whole route time went to validation
+            validation, endpoint, after_endpoint = route_end - route_start, 0.0, 0.0
+        else:
+            endpoint_end = self.endpoint_end if self.endpoint_end is not None else now
+            validation = self.endpoint_start - route_start
+            endpoint = endpoint_end - self.endpoint_start
+            after_endpoint = route_end - endpoint_end
+        return {
+            "db": self.db,
+            "validation": validation,
+            "app": max(endpoint - self.db - self.serialization, 0.0),
+            "serialization": self.serialization + after_endpoint,
+            "middleware": total - (route_end - route_start),
+            "total": total,
+        }
+
+    def server_timing(self, now: float) -> str:
+        parts = []
+        for name, seconds in self.breakdown(now).items():
+            part = f"{name};dur={seconds * 1000:.3f}"
+            if name == "db":
+                part += f';desc="{self.queries} queries"'
+            parts.append(part)
+        return ", ".join(parts)
+
+
+_current_profile: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+def current_profile() -> RequestProfile | None:
+    return _current_profile.get()
+
+
+@contextmanager
+def measure_serialization() -> Iterator[None]:
+    """Attribute the enclosed block to serialization when the request is profiled."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.serialization += time.perf_counter() - start
+
+
+def _mark_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # functools.wraps keeps __wrapped__, so FastAPI still reads the original signature
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def async_marked(*args: Any, **kwargs: Any) -> Any:
+            profile = _current_profile.get()
+            if profile is None:
+                return await endpoint(*args, **kwargs)
+            profile.endpoint_start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profile.endpoint_end = time.perf_counter()
+
+        return async_marked
+
+    @functools.wraps(endpoint)
+    def marked(*args: Any, **kwargs: Any) -> Any:
+        profile = _current_profile.get()
+        if profile is None:
+            return endpoint(*args, **kwargs)
+        profile.endpoint_start = time.perf_counter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profile.endpoint_end = time.perf_counter()
+
+    return marked
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that records when validation, the endpoint and serialization start/end."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, _mark_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[..., Any]:
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request: Any) -> Any:
+            profile = _current_profile.get()
+            if profile is None:
+                return await handler(request)
+            profile.route_start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                profile.route_end = time.perf_counter()
+
+        return profiled_handler
+
+
+class ProfilingMiddleware:
+    """Outermost ASGI middleware: enables profiling for requests carrying ``X-Profile``.
+
+    When API keys are configured only callers with a valid ``X-API-Key`` are profiled;
+    others are passed through unprofiled and the route's own dependency authenticates
+    them. The breakdown is added to the response as a ``Server-Timing`` header
+    (milliseconds) when the response starts.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not any(name == b"x-profile" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER, "").lower() in ("", "0", "false"):
+            await self.app(scope, receive, send)
+            return
+        # identify() counts nothing, so the route's require_api_key stays the one
+        # verification recorded per request
+        if api_keys.enabled and api_keys.identify(headers.get("x-api-key")) is None:
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(started=started)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                timing = profile.server_timing(time.perf_counter())
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", timing.encode()),
+                ]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any, cast
+
+from sqlalchemy import Engine, delete, select, text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.cache import response_cache
+from app.db import engine
+from app.migrations import SYNC_TABLE
+from app.models.todo import Todo
+from app.routers.metrics import record_purge
+
+logger = logging.getLogger("app.purge")
+
+# Soft-deleted rows older than this are hard-deleted; their tombstones stop appearing in
+# /todos/changes, so delta-sync clients must sync at least this often
+PURGE_RETENTION_DAYS = float(os.getenv("TODO_PURGE_RETENTION_DAYS", "30"))
+# Seconds between purge runs; 0 disables the background task
+PURGE_INTERVAL_SECONDS = float(os.getenv("TODO_PURGE_INTERVAL", "3600"))
+# Rows deleted per transaction, so writers are never blocked for long
+PURGE_BATCH_SIZE = int(os.getenv("TODO_PURGE_BATCH_SIZE", "500"))
+# Free pages returned to the filesystem per run by PRAGMA incremental_vacuum
+PURGE_VACUUM_PAGES = int(os.getenv("TODO_PURGE_VACUUM_PAGES", "2000"))
+# Switch older databases to auto_vacuum=INCREMENTAL at startup. Off by default: the
+# one-off VACUUM rewrites the whole file under an exclusive lock
+ENABLE_INCREMENTAL_VACUUM = os.getenv("TODO_ENABLE_INCREMENTAL_VACUUM", "0") != "0"
+
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass(frozen=True)
+class PurgeResult:
+    rows: int
+    batches: int
+    pages_reclaimed: int
+    seconds: float
+
+
+def enable_incremental_vacuum(target: Engine = engine) -> bool:
+    """Switch the database to ``auto_vacuum=INCREMENTAL``; return whether it was changed.
+
+    The mode can only change through a full ``VACUUM``, which rewrites the file and
+    locks out writers while it runs, so call this once at startup before serving.
+    """
+    raw = target.raw_connection()
+    try:
+        driver = cast(Any, raw.driver_connection)
+        mode = driver.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode == _AUTO_VACUUM_INCREMENTAL:
+            return False
+        driver.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        driver.execute("VACUUM")
+        return True
+    finally:
+        raw.close()
+
+
+async def convert_to_incremental_vacuum(target: Engine = engine) -> bool:
+    """``enable_incremental_vacuum`` off the event loop; failures are logged, not raised.
+
+    With several workers starting at once, all but one find the database locked (or
+    already converted), so a failure here must not stop the app from serving.
+    """
+    try:
+        return await run_in_threadpool(enable_incremental_vacuum, target)
+    except (OperationalError, sqlite3.OperationalError):
+        logger.warning(
+            "could not switch the database to auto_vacuum=INCREMENTAL; "
+            "purges will not reclaim free pages until it is",
+            exc_info=True,
+        )
+        return False
+
+
+def purge_batch(session: Session, cutoff: datetime, batch_size: int) -> int:
+    """Hard-delete up to ``batch_size`` rows soft-deleted before ``cutoff`` (one transaction)."""
+    deleted_at = cast(Any, Todo.deleted_at)
+    rows = session.execute(
+        select(cast(Any, Todo.id), cast(Any, Todo.version))
+        .where(deleted_at.is_not(None), deleted_at < cutoff)
+        .order_by(deleted_at)
+        .limit(batch_size)
+        .execution_options(operation="select_purge")
+    ).all()
+    if not rows:
+        return 0
+    session.execute(
+        delete(Todo)
+        .where(cast(Any, Todo.id).in_([row.id for row in rows]))
+        .execution_options(operation="purge", synchronize_session=False)
+    )
+    # Clients that synced before this version missed tombstones that are now gone
+    session.execute(
+        text(
+            f"UPDATE {SYNC_TABLE} SET purged_version = MAX(purged_version, :version) "
+            "WHERE id = 1"
+        ),
+        {"version": max(row.version or 0 for row in rows)},
+    )
+    session.commit()
+    return len(rows)
+
+
+def compact(target: Engine, max_pages: int) -> int:
+    """Return up to ``max_pages`` free pages to the filesystem, then ``PRAGMA optimize``.
+
+    Returns the pages reclaimed; 0 unless ``auto_vacuum=INCREMENTAL`` is enabled.
+    """
+    raw = target.raw_connection()
+    try:
+        driver = cast(Any, raw.driver_connection)
+        before = driver.execute("PRAGMA freelist_count").fetchone()[0]
+        if max_pages > 0:
+            # executescript steps the pragma to completion; execute() frees a single page
+            driver.executescript(f"PRAGMA incremental_vacuum({int(max_pages)})")
+        after = driver.execute("PRAGMA freelist_count").fetchone()[0]
+        # Refreshes query-planner statistics for tables whose contents changed a lot
+        driver.execute("PRAGMA optimize")
+        return int(before - after)
+    finally:
+        raw.close()
+
+
+def _purge_session_batch(cutoff: datetime, batch_size: int) -> int:
+    with Session(engine) as session:
+        return purge_batch(session, cutoff, batch_size)
+
+
+async def purge_tombstones(
+    retention: timedelta | None = None,
+    batch_size: int = PURGE_BATCH_SIZE,
+    vacuum_pages: int = PURGE_VACUUM_PAGES,
+) -> PurgeResult:
+    """Hard-delete expired soft-deleted todos batch by batch, then compact the file."""
+    started = time.perf_counter()
+    if retention is None:
+        retention = timedelta(days=PURGE_RETENTION_DAYS)
+    cutoff = datetime.now(UTC) - retention
+    rows = batches = 0
+    try:
+        while True:
+            # Each batch commits on its own, so requests interleave between batches
+            purged = await run_in_threadpool(_purge_session_batch, cutoff, batch_size)
+            if purged:
+                rows += purged
+                batches += 1
+                response_cache.invalidate()
+            if purged < batch_size:
+                break
+        pages = await run_in_threadpool(compact, engine, vacuum_pages)
+    except Exception:
+        record_purge("error", rows, 0)
+        raise
+    record_purge("ok", rows, pages)
+    return PurgeResult(
+        rows=rows, batches=batches, pages_reclaimed=pages, seconds=time.perf_counter() - started
+    )
+
+
+async def run_purge_loop(interval: float = PURGE_INTERVAL_SECONDS) -> None:
+    """Purge every ``interval`` seconds until cancelled (started from the app lifespan)."""
+    while True:
+        try:
+            result = await purge_tombstones()
+        except Exception:
+            logger.exception("tombstone purge failed")
+        else:
+            if result.rows or result.pages_reclaimed:
+                logger.info(
+                    "purged %d todos in %d batches, reclaimed %d pages in %.3fs",
+                    result.rows,
+                    result.batches,
+                    result.pages_reclaimed,
+                    result.seconds,
+                )
+        await asyncio.sleep(interval)
+
+
+def purged_version(session: Session) -> int:
+    """Highest row version removed by a purge (0 if nothing was ever purged)."""
+    value = session.execute(
+        text(f"SELECT purged_version FROM {SYNC_TABLE} WHERE id = 1")
+    ).scalar_one_or_none()
+    return int(value or 0)
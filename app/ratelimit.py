@@ -0,0 +1,173 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.auth import api_keys
+from app.routers.metrics import PATH_LABEL_SCOPE_KEY, inc_request_rejected
+
+# Sustained requests per second per client for reads (GET/HEAD/OPTIONS); 0 disables
+RATE_LIMIT_READ_RPS = float(os.getenv("TODO_RATE_LIMIT_READ_RPS", "50"))
+# Reads a client may send at once after being idle (bucket capacity)
+RATE_LIMIT_READ_BURST = float(os.getenv("TODO_RATE_LIMIT_READ_BURST", "100"))
+# Same for every other method; each write costs a transaction on the single SQLite writer
+RATE_LIMIT_WRITE_RPS = float(os.getenv("TODO_RATE_LIMIT_WRITE_RPS", "10"))
+RATE_LIMIT_WRITE_BURST = float(os.getenv("TODO_RATE_LIMIT_WRITE_BURST", "20"))
+# Clients tracked per process; the least recently seen are forgotten (a full bucket again)
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("TODO_RATE_LIMIT_MAX_CLIENTS", "10000"))
+# Requests handled at once per process; more get 503 instead of queueing for the
+# threadpool and the database. 0 disables
+MAX_IN_FLIGHT = int(os.getenv("TODO_MAX_IN_FLIGHT", "64"))
+# Seconds a shed client is asked to wait
+OVERLOAD_RETRY_AFTER = 1
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Probes and scrapes must keep answering while the service sheds load
+UNLIMITED_PATHS = frozenset({"/health/live", "/health/ready", "/metrics"})
+# Open for as long as the client listens, mostly idle: rate limited when opened but
+# not counted as in flight
+LONG_LIVED_PATHS = frozenset({"/todos/events"})
+# Path label of rejected requests in the request metrics: they never reach routing, and
+# labeling them with the raw path would let any client mint new series
+REJECTED_PATH_LABEL = "<rejected>"
+
+
+class TokenBucket:
+    """``burst`` tokens, refilled at ``rate`` per second; each request takes one."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token; returns 0.0 on success, else the seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-client token buckets with separate read and write budgets.
+
+    Buckets live in an LRU of ``max_clients`` entries, so memory stays bounded however
+    many addresses or keys are seen. State is per process: with several workers each
+    one enforces the limits on the requests it handles.
+    """
+
+    def __init__(
+        self,
+        read_rate: float = RATE_LIMIT_READ_RPS,
+        read_burst: float = RATE_LIMIT_READ_BURST,
+        write_rate: float = RATE_LIMIT_WRITE_RPS,
+        write_burst: float = RATE_LIMIT_WRITE_BURST,
+        max_clients: int = RATE_LIMIT_MAX_CLIENTS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.budgets = {"read": (read_rate, read_burst), "write": (write_rate, write_burst)}
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets: OrderedDict[tuple[str, str], TokenBucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, client: str, budget: str) -> float:
+        """Spend one request of ``client``'s ``budget``; returns seconds to wait if refused."""
+        rate, burst = self.budgets[budget]
+        if rate <= 0:
+            return 0.0
+        now = self.clock()
+        key = (client, budget)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(now)
+
+    def reset(self) -> None:
+        self._buckets.clear()
+
+
+def client_key(scope: Scope) -> str:
+    """Bucket key: the identity of a valid ``X-API-Key``, else the client address.
+
+    Invalid keys fall back to the address, so rotating made-up keys gains nothing.
+    Behind a proxy the address is only the client's when the server trusts the proxy's
+    ``X-Forwarded-For`` (uvicorn does for 127.0.0.1 by default).
+    """
+    identity = api_keys.identify(Headers(scope=scope).get("x-api-key"))
+    if identity is not None:
+        return f"key:{identity}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """Pure ASGI admission control, ahead of routing, the threadpool and the database.
+
+    Each request first spends a token from its client's read or write bucket (429 with
+    ``Retry-After`` when empty), then takes one of ``max_in_flight`` slots (503 with
+    ``Retry-After`` when all are busy). Rejections are counted by reason and carry
+    the ``<rejected>`` path label in the request metrics.
+    """
+
+    def __init__(
+        self, app: ASGIApp, limiter: RateLimiter | None = None, max_in_flight: int = MAX_IN_FLIGHT
+    ) -> None:
+        self.app = app
+        self.limiter = limiter if limiter is not None else rate_limiter
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in UNLIMITED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        budget = "read" if scope["method"] in READ_METHODS else "write"
+        retry_after = self.limiter.acquire(client_key(scope), budget)
+        if retry_after > 0:
+            inc_request_rejected(f"{budget}_rate_limit")
+            scope[PATH_LABEL_SCOPE_KEY] = REJECTED_PATH_LABEL
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+        if self.max_in_flight <= 0 or scope["path"] in LONG_LIVED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.max_in_flight:
+            inc_request_rejected("in_flight_limit")
+            scope[PATH_LABEL_SCOPE_KEY] = REJECTED_PATH_LABEL
+            response = JSONResponse(
+                {"detail": "Server is busy, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(OVERLOAD_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+
+rate_limiter = RateLimiter()
@@ -1,17 +1,28 @@
+import os
 import time
-from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
 
-from fastapi import APIRouter, Request, Response
+from fastapi import APIRouter, Response
 from prometheus_client import (
     CONTENT_TYPE_LATEST,
     CollectorRegistry,
     Counter,
+    Gauge,
     Histogram,
     generate_latest,
+    multiprocess,
 )
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 router = APIRouter(prefix="", tags=["metrics"])  # root-level path
 
+# Multi-worker mode: when set (to a directory shared by all workers and emptied before the
+# server starts), prometheus_client keeps every value in per-process mmap files and
+# /metrics aggregates all of them at scrape time.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
 _registry: CollectorRegistry | None = None
 _requests_total: Counter | None = None
 _request_duration: Histogram | None = None
@@ -21,6 +32,32 @@ _http_errors_total: Counter | None = None
 _db_errors_total: Counter | None = None
 _http_request_size: Histogram | None = None
 _http_response_size: Histogram | None = None
+_http_response_uncompressed_bytes: Counter | None = None
+_http_response_compressed_bytes: Counter | None = None
+_bulk_batch_size: Histogram | None = None
+_bulk_duration: Histogram | None = None
+_cache_hits_total: Counter | None = None
+_cache_misses_total: Counter | None = None
+_cache_not_modified_total: Counter | None = None
+_cache_evictions_total: Counter | None = None
+_db_query_rows: Histogram | None = None
+_request_db_queries: Histogram | None = None
+_db_slow_queries_total: Counter | None = None
+_events_published_total: Counter | None = None
+_event_subscribers: Gauge | None = None
+_event_subscribers_dropped_total: Counter | None = None
+_event_resumes_total: Counter | None = None
+_purge_runs_total: Counter | None = None
+_purge_rows_total: Counter | None = None
+_purge_pages_reclaimed_total: Counter | None = None
+_api_key_requests_total: Counter | None = None
+_api_key_rejected_total: Counter | None = None
+_api_key_reloads_total: Counter | None = None
+_requests_rejected_total: Counter | None = None
+
+# Per-request query counter; a mutable holder so increments made in threadpool or
+# greenlet copies of the request context are still seen by the middleware
+_request_query_count: ContextVar[list[int] | None] = ContextVar("request_query_count", default=None)
 
 
 def get_registry() -> CollectorRegistry:
@@ -28,6 +65,16 @@ def get_registry() -> CollectorRegistry:
     global _requests_total, _request_duration, _requests_class_total
     global _db_query_duration, _http_errors_total, _db_errors_total
     global _http_request_size, _http_response_size
+    global _http_response_uncompressed_bytes, _http_response_compressed_bytes
+    global _bulk_batch_size, _bulk_duration
+    global _cache_hits_total, _cache_misses_total, _cache_not_modified_total
+    global _cache_evictions_total, _db_query_rows, _request_db_queries
+    global _db_slow_queries_total
+    global _events_published_total, _event_subscribers, _event_subscribers_dropped_total
+    global _event_resumes_total
+    global _purge_runs_total, _purge_rows_total, _purge_pages_reclaimed_total
+    global _api_key_requests_total, _api_key_rejected_total, _api_key_reloads_total
+    global _requests_rejected_total
     if _registry is None:
         _registry = CollectorRegistry()
     # Initialize any missing collectors (handles hot-reload/order issues)
@@ -87,6 +134,161 @@ def get_registry() -> CollectorRegistry:
             ["status"],
             registry=_registry,
         )
+    if _http_response_uncompressed_bytes is None:
+        _http_response_uncompressed_bytes = Counter(
+            "http_response_uncompressed_bytes",
+            "Body bytes of compressed responses before compression",
+            ["encoding"],
+            registry=_registry,
+        )
+    if _http_response_compressed_bytes is None:
+        _http_response_compressed_bytes = Counter(
+            "http_response_compressed_bytes",
+            "Body bytes of compressed responses as sent",
+            ["encoding"],
+            registry=_registry,
+        )
+    if _bulk_batch_size is None:
+        _bulk_batch_size = Histogram(
+            "todo_bulk_batch_size",
+            "Number of items per bulk request",
+            ["operation"],
+            buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+            registry=_registry,
+        )
+    if _bulk_duration is None:
+        _bulk_duration = Histogram(
+            "todo_bulk_duration_seconds",
+            "Bulk request processing duration in seconds",
+            ["operation"],
+            registry=_registry,
+        )
+    if _cache_hits_total is None:
+        _cache_hits_total = Counter(
+            "response_cache_hits_total",
+            "Responses served from the in-process response cache",
+            ["route"],
+            registry=_registry,
+        )
+    if _cache_misses_total is None:
+        _cache_misses_total = Counter(
+            "response_cache_misses_total",
+            "Cacheable responses that had to be built from the database",
+            ["route"],
+            registry=_registry,
+        )
+    if _cache_not_modified_total is None:
+        _cache_not_modified_total = Counter(
+            "response_cache_not_modified_total",
+            "Conditional requests answered with 304 Not Modified",
+            ["route"],
+            registry=_registry,
+        )
+    if _cache_evictions_total is None:
+        _cache_evictions_total = Counter(
+            "response_cache_evictions_total",
+            "Response cache entries dropped (lru = size bound, invalidation = write)",
+            ["reason"],
+            registry=_registry,
+        )
+    if _db_query_rows is None:
+        _db_query_rows = Histogram(
+            "db_query_rows",
+            "Rows returned (SELECT) or affected (DML) per statement",
+            ["statement", "table"],
+            buckets=(0, 1, 5, 10, 25, 50, 100, 250, 1000, 10000),
+            registry=_registry,
+        )
+    if _request_db_queries is None:
+        _request_db_queries = Histogram(
+            "http_request_db_queries",
+            "SQL statements executed per HTTP request",
+            ["method", "path"],
+            buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+            registry=_registry,
+        )
+    if _db_slow_queries_total is None:
+        _db_slow_queries_total = Counter(
+            "db_slow_queries_total",
+            "Statements at or above the slow-query threshold",
+            ["operation", "table"],
+            registry=_registry,
+        )
+    if _events_published_total is None:
+        _events_published_total = Counter(
+            "todo_events_published_total",
+            "Todo change events published to /todos/events",
+            ["type"],
+            registry=_registry,
+        )
+    if _event_subscribers is None:
+        _event_subscribers = Gauge(
+            "todo_event_subscribers",
+            "Open /todos/events streams",
+            multiprocess_mode="livesum",
+            registry=_registry,
+        )
+    if _event_subscribers_dropped_total is None:
+        _event_subscribers_dropped_total = Counter(
+            "todo_event_subscribers_dropped_total",
+            "Event streams closed by the server (slow_consumer = queue full, shutdown)",
+            ["reason"],
+            registry=_registry,
+        )
+    if _event_resumes_total is None:
+        _event_resumes_total = Counter(
+            "todo_event_resumes_total",
+            "Last-Event-ID reconnects (replayed from the buffer, or reset = client must re-list)",
+            ["result"],
+            registry=_registry,
+        )
+    if _purge_runs_total is None:
+        _purge_runs_total = Counter(
+            "todo_purge_runs_total",
+            "Tombstone purge runs",
+            ["result"],
+            registry=_registry,
+        )
+    if _purge_rows_total is None:
+        _purge_rows_total = Counter(
+            "todo_purge_rows_total",
+            "Soft-deleted todos hard-deleted after the retention period",
+            registry=_registry,
+        )
+    if _purge_pages_reclaimed_total is None:
+        _purge_pages_reclaimed_total = Counter(
+            "todo_purge_pages_reclaimed_total",
+            "Free database pages returned to the filesystem by incremental_vacuum",
+            registry=_registry,
+        )
+    if _api_key_requests_total is None:
+        _api_key_requests_total = Counter(
+            "todo_api_key_requests_total",
+            "Requests authenticated per API key identity",
+            ["identity"],
+            registry=_registry,
+        )
+    if _api_key_rejected_total is None:
+        _api_key_rejected_total = Counter(
+            "todo_api_key_rejected_total",
+            "Requests rejected by API key auth (missing or invalid key)",
+            ["reason"],
+            registry=_registry,
+        )
+    if _api_key_reloads_total is None:
+        _api_key_reloads_total = Counter(
+            "todo_api_key_reloads_total",
+            "API key loads and reloads",
+            ["result"],
+            registry=_registry,
+        )
+    if _requests_rejected_total is None:
+        _requests_rejected_total = Counter(
+            "todo_requests_rejected_total",
+            "Requests turned away before routing (read/write rate limit, in-flight limit)",
+            ["reason"],
+            registry=_registry,
+        )
     return _registry
 
 
@@ -111,6 +313,53 @@ def record_db_timing(operation: str, table: str, duration_seconds: float) -> Non
     _db_query_duration.labels(operation=operation, table=table).observe(duration_seconds)
 
 
+def observe_db_rows(statement: str, table: str, rows: int) -> None:
+    get_registry()
+    assert _db_query_rows is not None
+    _db_query_rows.labels(statement=statement, table=table).observe(float(rows))
+
+
+def inc_slow_query(operation: str, table: str) -> None:
+    get_registry()
+    assert _db_slow_queries_total is not None
+    _db_slow_queries_total.labels(operation=operation, table=table).inc()
+
+
+def count_db_query() -> None:
+    """Count one statement against the current request (no-op outside a request)."""
+    counter = _request_query_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def record_bulk(operation: str, batch_size: int, duration_seconds: float) -> None:
+    get_registry()
+    assert _bulk_batch_size is not None and _bulk_duration is not None
+    _bulk_batch_size.labels(operation=operation).observe(float(batch_size))
+    _bulk_duration.labels(operation=operation).observe(duration_seconds)
+
+
+def record_cache_lookup(route: str, result: str) -> None:
+    get_registry()
+    assert (
+        _cache_hits_total is not None
+        and _cache_misses_total is not None
+        and _cache_not_modified_total is not None
+    )
+    counters = {
+        "hit": _cache_hits_total,
+        "miss": _cache_misses_total,
+        "not_modified": _cache_not_modified_total,
+    }
+    counters[result].labels(route=route).inc()
+
+
+def inc_cache_eviction(reason: str, count: int = 1) -> None:
+    get_registry()
+    assert _cache_evictions_total is not None
+    _cache_evictions_total.labels(reason=reason).inc(count)
+
+
 def inc_db_error(operation: str, table: str) -> None:
     get_registry()
     assert _db_errors_total is not None
@@ -140,37 +389,200 @@ def observe_response_size(status: int, size_bytes: int | None) -> None:
     _http_response_size.labels(status=str(status)).observe(float(size_bytes))
 
 
+def record_compression(encoding: str, uncompressed: int, compressed: int) -> None:
+    get_registry()
+    assert (
+        _http_response_uncompressed_bytes is not None
+        and _http_response_compressed_bytes is not None
+    )
+    _http_response_uncompressed_bytes.labels(encoding=encoding).inc(uncompressed)
+    _http_response_compressed_bytes.labels(encoding=encoding).inc(compressed)
+
+
+def inc_event_published(event_type: str) -> None:
+    get_registry()
+    assert _events_published_total is not None
+    _events_published_total.labels(type=event_type).inc()
+
+
+def track_event_subscriber(delta: int) -> None:
+    get_registry()
+    assert _event_subscribers is not None
+    _event_subscribers.inc(delta)
+
+
+def inc_event_subscriber_dropped(reason: str) -> None:
+    get_registry()
+    assert _event_subscribers_dropped_total is not None
+    _event_subscribers_dropped_total.labels(reason=reason).inc()
+
+
+def inc_event_resume(result: str) -> None:
+    get_registry()
+    assert _event_resumes_total is not None
+    _event_resumes_total.labels(result=result).inc()
+
+
+def record_purge(result: str, rows: int, pages: int) -> None:
+    get_registry()
+    assert (
+        _purge_runs_total is not None
+        and _purge_rows_total is not None
+        and _purge_pages_reclaimed_total is not None
+    )
+    _purge_runs_total.labels(result=result).inc()
+    _purge_rows_total.inc(rows)
+    _purge_pages_reclaimed_total.inc(pages)
+
+
+def inc_api_key_request(identity: str) -> None:
+    get_registry()
+    assert _api_key_requests_total is not None
+    _api_key_requests_total.labels(identity=identity).inc()
+
+
+def inc_api_key_rejected(reason: str) -> None:
+    get_registry()
+    assert _api_key_rejected_total is not None
+    _api_key_rejected_total.labels(reason=reason).inc()
+
+
+def inc_api_key_reload(result: str) -> None:
+    get_registry()
+    assert _api_key_reloads_total is not None
+    _api_key_reloads_total.labels(result=result).inc()
+
+
+def inc_request_rejected(reason: str) -> None:
+    get_registry()
+    assert _requests_rejected_total is not None
+    _requests_rejected_total.labels(reason=reason).inc()
+
+
+def scrape_registry() -> CollectorRegistry:
+    """Registry to expose on /metrics: this process's, or all workers' in multiprocess mode."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=MULTIPROC_DIR)
+        return registry
+    return get_registry()
+
+
+def mark_process_dead(pid: int | None = None) -> None:
+    """Drop a finished worker's live-gauge files (called on shutdown; no-op single-process)."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid if pid is not None else os.getpid(), MULTIPROC_DIR)
+
+
 @router.get("/metrics")
 def metrics() -> Response:
-    registry = get_registry()
+    registry = scrape_registry()
     data = generate_latest(registry)
     return Response(content=data, media_type=CONTENT_TYPE_LATEST)
 
 
-async def record_request(
-    request: Request,
-    call_next: Callable[[Request], Awaitable[Response]],
-) -> Response:
-    start = time.perf_counter()
-    response: Response = await call_next(request)
-    duration = time.perf_counter() - start
-    route = request.scope.get("route")
-    path = getattr(route, "path", request.url.path)
-    # Core counters and latency
-    record_metrics(request.method, path, response.status_code, duration)
-    # Error counters
-    if response.status_code >= 400:
-        inc_http_error(request.method, response.status_code)
-    # Sizes
-    req_len = request.headers.get("content-length")
-    observe_request_size(request.method, int(req_len) if req_len is not None else None)
-    resp_len_header = response.headers.get("content-length")
-    resp_len_calc = len(response.body or b"") if hasattr(response, "body") else None
-    if resp_len_header is not None:
-        resp_len = int(resp_len_header)
-    elif isinstance(resp_len_calc, int):
-        resp_len = resp_len_calc
-    else:
-        resp_len = None
-    observe_response_size(response.status_code, resp_len)
-    return response
+@dataclass(frozen=True)
+class _RequestChildren:
+    """Labeled children for one (method, route, status), resolved once and reused."""
+
+    requests: Any
+    duration: Any
+    status_class: Any
+    errors: Any | None
+    response_size: Any
+    queries: Any
+
+
+# Scope key for a fixed path label, set by middleware that answers before routing
+PATH_LABEL_SCOPE_KEY = "todo.path_label"
+
+
+class MetricsMiddleware:
+    """Pure ASGI request metrics.
+
+    Status and response bytes are taken from the ``http.response.start`` / ``body``
+    messages as they are sent, so streamed responses are sized correctly, and the
+    labeled child collectors are cached per (method, route, status).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._children: dict[tuple[str, str, int], _RequestChildren] = {}
+        self._request_size: dict[str, Any] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500  # reported if the app raises before starting a response
+        sent = 0
+        queries = [0]
+        token = _request_query_count.set(queries)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, sent
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_query_count.reset(token)
+            self._observe(scope, status_code, sent, queries[0], time.perf_counter() - start)
+
+    def _observe(
+        self, scope: Scope, status_code: int, sent: int, queries: int, duration: float
+    ) -> None:
+        method = scope["method"]
+        route = scope.get("route")
+        # Unmatched paths (404s) are labeled with the raw path but not cached, so
+        # scanners cannot grow the cache without bound
+        path = getattr(route, "path", None) or scope.get(PATH_LABEL_SCOPE_KEY)
+        key = (method, path or scope["path"], status_code)
+        children = self._children.get(key) if path is not None else None
+        if children is None:
+            children = self._resolve(*key)
+            if path is not None:
+                self._children[key] = children
+        children.requests.inc()
+        children.duration.observe(duration)
+        children.status_class.inc()
+        if children.errors is not None:
+            children.errors.inc()
+        children.response_size.observe(float(sent))
+        children.queries.observe(float(queries))
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                request_size = self._request_size.get(method)
+                if request_size is None:
+                    request_size = self._request_size[method] = _child(
+                        _http_request_size, method=method
+                    )
+                request_size.observe(float(value))
+                break
+
+    @staticmethod
+    def _resolve(method: str, path: str, status_code: int) -> _RequestChildren:
+        get_registry()
+        status, status_class = str(status_code), f"{status_code // 100}xx"
+        return _RequestChildren(
+            requests=_child(_requests_total, method=method, path=path, status=status),
+            duration=_child(_request_duration, method=method, path=path, status=status),
+            status_class=_child(_requests_class_total, method=method, status_class=status_class),
+            errors=(
+                _child(_http_errors_total, method=method, status_class=status_class)
+                if status_code >= 400
+                else None
+            ),
+            response_size=_child(_http_response_size, status=status),
+            queries=_child(_request_db_queries, method=method, path=path),
+        )
+
+
+def _child(collector: Counter | Histogram | None, **labels: str) -> Any:
+    assert collector is not None
+    return collector.labels(**labels)
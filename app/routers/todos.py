@@ -1,33 +1,218 @@
+import asyncio
+import base64
+import csv
+import io
+import json
+import os
+import re
+import threading
 import time
+from collections.abc import AsyncIterator, Callable
+from datetime import UTC, datetime
 from typing import Annotated, Any, cast
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlmodel import Session, select
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, literal_column, tuple_, update
+from sqlmodel import Session, func, select
 
-from app.db import ensure_schema, get_session
+from app.cache import CachedResponse, response_cache
+from app.db import DbRunner, get_db
 from app.deps import require_api_key
-from app.models.todo import Todo
-from app.routers.metrics import inc_db_error, record_db_timing
+from app.events import events
+from app.imports import IMPORT_FORMATS, ImportFormatError, due_at_error, iter_todos
+from app.migrations import SEARCH_TABLE
+from app.models.todo import Todo, todo_counts, todo_fts
+from app.profiling import ProfiledRoute, measure_serialization
+from app.purge import purged_version
+from app.routers.metrics import record_bulk
+from app.schemas.todo import (
+    TODO_CHANGE_FIELDS,
+    TODO_FIELDS,
+    BulkItemResult,
+    BulkResult,
+    ImportLineError,
+    ImportResult,
+    TodoBulkUpdate,
+    TodoChangeList,
+    TodoCreate,
+    TodoList,
+    TodoPayload,
+    TodoUpdate,
+    todo_adapter,
+    todo_change_list_adapter,
+    todo_list_adapter,
+)
 from app.schemas.todo import Todo as TodoSchema
-from app.schemas.todo import TodoCreate, TodoList, TodoUpdate
 
-router = APIRouter(prefix="/todos", tags=["todos"])
+router = APIRouter(prefix="/todos", tags=["todos"], route_class=ProfiledRoute)
 
+BULK_MAX_ITEMS = int(os.getenv("TODO_BULK_MAX_ITEMS", "1000"))
 
-@router.get("/", response_model=TodoList, status_code=status.HTTP_200_OK)
-def list_todos(
-    session: Annotated[Session, Depends(get_session)],
-    limit: int = 50,
-    offset: int = 0,
-    completed: bool | None = Query(None, description="Filter by completion status (true/false)"),
-    priority: str | None = Query(None, description="Filter by priority: low|medium|high"),
-    overdue: bool | None = Query(None, description="Filter overdue items (due_at < now)"),
-    sort_due: bool = Query(False, description="Sort by due_at ascending when true"),
-    include_deleted: bool = Query(False, description="Include soft-deleted items when true"),
-    cursor: str | None = Query(None, description="Cursor for pagination (id-based)"),
-) -> TodoList:
-    # Ensure latest schema (handles tests and dev hot-reload)
-    ensure_schema()
+# Rows fetched from the export cursor (and sent as one chunk) at a time
+EXPORT_BATCH_SIZE = int(os.getenv("TODO_EXPORT_BATCH_SIZE", "500"))
+
+# Imports: rows per INSERT transaction (overridable per request up to the max), rejected
+# lines listed in the response, and the longest accepted line
+IMPORT_CHUNK_SIZE = int(os.getenv("TODO_IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_MAX_CHUNK_SIZE = 10_000
+IMPORT_MAX_ERRORS = int(os.getenv("TODO_IMPORT_MAX_ERRORS", "100"))
+IMPORT_MAX_LINE_BYTES = int(os.getenv("TODO_IMPORT_MAX_LINE_BYTES", str(64 * 1024)))
+
+# Approximate totals the row counts table cannot answer (overdue, q): cached per filter
+# combination for a short TTL
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("TODO_COUNT_CACHE_TTL", "30"))
+COUNT_CACHE_MAX_ENTRIES = 256
+_count_cache: dict[tuple[Any, ...], tuple[float, int]] = {}
+# List requests run in the threadpool, so reads and evictions need the lock
+_count_cache_lock = threading.Lock()
+
+
+_SORT_COLUMNS: dict[str, Any] = {
+    "id": Todo.id,
+    "due_at": Todo.due_at,
+    "created_at": Todo.created_at,
+}
+_NULLABLE_SORTS = {"due_at"}
+_DATETIME_SORTS = {"due_at", "created_at"}
+
+
+def _encode_cursor(sort: str, descending: bool, key: Any, last_id: int) -> str:
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    payload = [sort, "desc" if descending else "asc", key, last_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> tuple[Any, int]:
+    """Decode an opaque cursor into the ``(sort_key, id)`` of the last row served."""
+    if cursor.isdigit() and sort == "id" and order == "asc":
+        # Legacy cursors were the bare id of the last row
+        return int(cursor), int(cursor)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_order, key, last_id = json.loads(raw)
+        if not isinstance(last_id, int):
+            raise ValueError("cursor id must be an integer")
+        if key is not None and sort in _DATETIME_SORTS:
+            key = datetime.fromisoformat(key)
+            if key.tzinfo is None:
+                key = key.replace(tzinfo=UTC)
+    except (ValueError, TypeError) as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="invalid cursor"
+        ) from err
+    if cursor_sort != sort or cursor_order != order:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="cursor does not match sort order"
+        )
+    return key, last_id
+
+
+def _order_by(stmt: Any, sort: str, descending: bool) -> Any:
+    columns = [_SORT_COLUMNS[sort]] if sort == "id" else [_SORT_COLUMNS[sort], Todo.id]
+    return stmt.order_by(*(col.desc() if descending else col.asc() for col in columns))
+
+
+def _keyset_rows(
+    session: Session,
+    base_stmt: Any,
+    sort: str,
+    descending: bool,
+    after: tuple[Any, int],
+    size: int,
+) -> list[Any]:
+    """Fetch up to ``size`` rows ordered after ``after`` using index seeks only.
+
+    Row-value comparisons ``(col, id) > (key, id)`` never match NULLs, so a nullable
+    sort column is paged as two segments in SQLite's order (NULLs first ascending,
+    last descending); the NULL segment is ordered by id alone.
+    """
+    key, last_id = after
+    column = _SORT_COLUMNS[sort]
+    id_col = cast(Any, Todo.id)
+
+    def past(left: Any, right: Any) -> Any:
+        return left < right if descending else left > right
+
+    if sort == "id":
+        segments = [_order_by(base_stmt.where(past(id_col, last_id)), sort, descending)]
+    elif sort not in _NULLABLE_SORTS:
+        seek = past(tuple_(column, id_col), tuple_(key, last_id))
+        segments = [_order_by(base_stmt.where(seek), sort, descending)]
+    else:
+        null_part = base_stmt.where(column.is_(None))
+        value_part = base_stmt.where(column.is_not(None))
+        if key is None:
+            null_part = null_part.where(past(id_col, last_id))
+        else:
+            value_part = value_part.where(past(tuple_(column, id_col), tuple_(key, last_id)))
+        null_seg = _order_by(null_part, "id", descending)
+        value_seg = _order_by(value_part, sort, descending)
+        ordered = [value_seg, null_seg] if descending else [null_seg, value_seg]
+        # Resume in the segment holding the cursor row; earlier segments are exhausted
+        segments = ordered[ordered.index(null_seg if key is None else value_seg) :]
+    rows: list[Any] = []
+    for segment in segments:
+        rows.extend(session.exec(segment.limit(size - len(rows))))
+        if len(rows) >= size:
+            break
+    return rows
+
+
+def _fts_query(q: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, each as a prefix."""
+    words = re.findall(r"\w+", q)
+    if not words:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="q must contain at least one word"
+        )
+    # Quoting keeps FTS5 operators (AND/OR/NEAR, column filters) out of user input
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _fts_match(match: str) -> Any:
+    return literal_column(SEARCH_TABLE).op("MATCH")(match)
+
+
+def _filter_clauses(
+    include_deleted: bool,
+    completed: bool | None,
+    priority: str | None,
+    overdue: bool | None,
+    match: str | None = None,
+) -> list[Any]:
+    """Build WHERE clauses shared by the page query and the count query."""
+    clauses: list[Any] = []
+    if match is not None:
+        matching_ids = select(todo_fts.c.rowid).where(_fts_match(match))
+        clauses.append(cast(Any, Todo.id).in_(matching_ids))
+    if not include_deleted:
+        # SQLAlchemy column API; mypy sees field type, so ignore
+        clauses.append(Todo.deleted_at.is_(None))  # type: ignore[union-attr]
+    if completed is not None:
+        clauses.append(Todo.completed == completed)
+    if priority is not None:
+        clauses.append(Todo.priority == priority)
+    if overdue:
+        # Guard non-null then compare; silence mypy on column methods
+        clauses.append(Todo.due_at.is_not(None))  # type: ignore[union-attr]
+        clauses.append(Todo.due_at < datetime.now(UTC))  # type: ignore[operator]
+    return clauses
+
+
+def _check_page_params(limit: int, offset: int) -> None:
     # Explicit validation to provide clearer 400 errors instead of generic 422
     if limit is None or limit < 1:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="limit must be >= 1")
@@ -35,140 +220,773 @@ def list_todos(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="limit must be <= 200")
     if offset < 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="offset must be >= 0")
-    base_stmt = select(Todo)
+
+
+def _count_todos(session: Session, clauses: list[Any]) -> int:
+    stmt = select(func.count()).select_from(Todo).where(*clauses)
+    return int(session.exec(stmt.execution_options(operation="select_count")).one())
+
+
+def _group_count(
+    session: Session, include_deleted: bool, completed: bool | None, priority: str | None
+) -> int:
+    """Sum the trigger-maintained row counts (a few rows) instead of scanning todo."""
+    stmt = select(func.coalesce(func.sum(todo_counts.c.n), 0))
     if not include_deleted:
-        # SQLAlchemy column API; mypy sees field type, so ignore
-        base_stmt = base_stmt.where(Todo.deleted_at.is_(None))  # type: ignore[union-attr]
+        stmt = stmt.where(todo_counts.c.deleted.is_(False))
     if completed is not None:
-        base_stmt = base_stmt.where(Todo.completed == completed)
+        stmt = stmt.where(todo_counts.c.completed == completed)
     if priority is not None:
-        base_stmt = base_stmt.where(Todo.priority == priority)
-    if overdue:
-        from datetime import UTC, datetime
+        stmt = stmt.where(todo_counts.c.priority == priority)
+    return int(session.exec(stmt.execution_options(operation="select_group_count")).one())
 
-        # Guard non-null then compare; silence mypy on column methods
-        base_stmt = base_stmt.where(Todo.due_at.is_not(None))  # type: ignore[union-attr]
-        base_stmt = base_stmt.where(Todo.due_at < datetime.now(UTC))  # type: ignore[operator]
-    t0 = time.perf_counter()
-    try:
-        total = session.exec(base_stmt).unique().all()
-    except Exception:
-        inc_db_error("select_count", "todo")
-        raise
-    finally:
-        record_db_timing("select_count", "todo", time.perf_counter() - t0)
-    total_count = len(total)
-    # Cursor mode: only supports id-based ordering (sort_due must be false)
-    next_cursor: str | None = None
-    has_more: bool | None = None
-    if cursor is not None:
-        if sort_due:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="cursor is incompatible with sort_due",
-            )
-        try:
-            last_id = int(cursor)
-        except ValueError as err:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="invalid cursor"
-            ) from err
-        page_stmt = base_stmt.where(Todo.id > last_id)  # type: ignore[operator]
-        page_stmt = page_stmt.order_by(cast(Any, Todo.id)).limit(limit + 1)
-        t1 = time.perf_counter()
-        try:
-            rows = list(session.exec(page_stmt))
-        except Exception:
-            inc_db_error("select_page", "todo")
-            raise
-        finally:
-            record_db_timing("select_page", "todo", time.perf_counter() - t1)
-        if len(rows) > limit:
-            has_more = True
-            next_cursor = str(rows[limit - 1].id)
-            rows = rows[:limit]
-        else:
-            has_more = False
-            next_cursor = None
-        items = [TodoSchema(**item.model_dump()) for item in rows]
-        return TodoList(
-            items=items,
-            total=total_count,
-            limit=limit,
-            offset=None,
-            next_cursor=next_cursor,
-            has_more=has_more,
-        )
-    # Offset mode
+
+def _cached_count(key: tuple[Any, ...]) -> int | None:
+    with _count_cache_lock:
+        entry = _count_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > COUNT_CACHE_TTL_SECONDS:
+            del _count_cache[key]
+            return None
+        return value
+
+
+def _store_count(key: tuple[Any, ...], value: int) -> None:
+    with _count_cache_lock:
+        if key not in _count_cache and len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            # Evict the oldest entry (dicts preserve insertion order)
+            del _count_cache[next(iter(_count_cache))]
+        _count_cache[key] = (time.monotonic(), value)
+
+
+def _cached_response(request: Request, key: tuple[Any, ...], route: str) -> Response | None:
+    """Answer from the response cache: 304 for a fresh If-None-Match, else a cached body."""
+    etag = response_cache.not_modified(key, request.headers.get("if-none-match"), route)
+    if etag is not None:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
+    entry = response_cache.get(key, route)
+    if entry is None:
+        return None
+    return _json_response(entry)
+
+
+def _store_response(key: tuple[Any, ...], version: int, body: bytes) -> Response:
+    return _json_response(response_cache.put(key, version, body))
+
+
+def _json_response(entry: CachedResponse) -> Response:
+    return Response(
+        content=entry.body,
+        media_type="application/json",
+        headers={"ETag": entry.etag, "Cache-Control": "no-cache"},
+    )
+
+
+def _todo_json(todo: Any, todo_id: int | None = None) -> bytes:
+    """Response/event JSON for a todo-like object (ORM row, result row or TodoCreate)."""
+    payload = {field: getattr(todo, field, None) for field in TODO_FIELDS}
+    if todo_id is not None:
+        payload["id"] = todo_id
+    return todo_adapter.dump_json(cast(TodoPayload, payload))
+
+
+def _deleted_json(todo_id: int) -> bytes:
+    return json.dumps({"id": todo_id}, separators=(",", ":")).encode()
+
+
+@router.get("/", response_model=TodoList, status_code=status.HTTP_200_OK)
+async def list_todos(
+    request: Request,
+    db: Annotated[DbRunner, Depends(get_db)],
+    limit: int = 50,
+    offset: int = 0,
+    completed: bool | None = Query(None, description="Filter by completion status (true/false)"),
+    priority: str | None = Query(None, description="Filter by priority: low|medium|high"),
+    overdue: bool | None = Query(None, description="Filter overdue items (due_at < now)"),
+    sort_due: bool = Query(False, description="Sort by due_at ascending when true"),
+    include_deleted: bool = Query(False, description="Include soft-deleted items when true"),
+    cursor: str | None = Query(None, description="Opaque cursor from a previous next_cursor"),
+    sort: str = Query("id", description="Sort column: id|due_at|created_at"),
+    order: str = Query("asc", description="Sort direction: asc|desc"),
+    include_total: bool = Query(True, description="Compute total matching count when true"),
+    count_mode: str = Query(
+        "exact",
+        description=(
+            "Total count mode: exact|approximate (maintained per-group counts; "
+            "with overdue or q, a count cached for a short TTL)"
+        ),
+    ),
+    q: str | None = Query(None, description="Full-text filter on title (prefix match per word)"),
+) -> Any:
+    _check_page_params(limit, offset)
+    if count_mode not in ("exact", "approximate"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="count_mode must be exact|approximate",
+        )
     if sort_due:
-        # Cast for mypy: SQL column expression expected
-        stmt = base_stmt.order_by(cast(Any, Todo.due_at)).limit(limit).offset(offset)
+        sort = "due_at"
+    if sort not in _SORT_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="sort must be id|due_at|created_at"
+        )
+    if order not in ("asc", "desc"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="order must be asc|desc"
+        )
+    after = _decode_cursor(cursor, sort, order) if cursor is not None else None
+    match = _fts_query(q) if q is not None else None
+    # overdue compares against the clock, so its results can change without a write
+    cache_key = None
+    if overdue is None:
+        cache_key = (
+            "list",
+            limit,
+            offset,
+            completed,
+            priority,
+            include_deleted,
+            match,
+            sort,
+            order,
+            cursor,
+            include_total,
+            count_mode,
+        )
+        cached = _cached_response(request, cache_key, "/todos/")
+        if cached is not None:
+            return cached
+    version = response_cache.version
+    body = await db.run(
+        _list_todos,
+        limit=limit,
+        offset=offset,
+        completed=completed,
+        priority=priority,
+        overdue=overdue,
+        include_deleted=include_deleted,
+        match=match,
+        sort=sort,
+        descending=order == "desc",
+        after=after,
+        include_total=include_total,
+        count_mode=count_mode,
+    )
+    if cache_key is None:
+        return Response(content=body, media_type="application/json")
+    return _store_response(cache_key, version, body)
+
+
+def _list_todos(
+    session: Session,
+    limit: int,
+    offset: int,
+    completed: bool | None,
+    priority: str | None,
+    overdue: bool | None,
+    include_deleted: bool,
+    match: str | None,
+    sort: str,
+    descending: bool,
+    after: tuple[Any, int] | None,
+    include_total: bool,
+    count_mode: str,
+) -> bytes:
+    clauses = _filter_clauses(include_deleted, completed, priority, overdue, match)
+    # Only the response columns (plus the cursor key), fetched as plain row tuples
+    columns = [getattr(Todo, field) for field in TODO_FIELDS]
+    if sort not in TODO_FIELDS:
+        columns.append(_SORT_COLUMNS[sort])
+    base_stmt = select(*columns).where(*clauses).execution_options(operation="select_page")
+    total_count: int | None = None
+    if include_total:
+        cache_key = (include_deleted, completed, priority, overdue, match)
+        if count_mode == "approximate" and not overdue and match is None:
+            total_count = _group_count(session, include_deleted, completed, priority)
+        elif count_mode == "approximate":
+            total_count = _cached_count(cache_key)
+        if total_count is None:
+            total_count = _count_todos(session, clauses)
+            _store_count(cache_key, total_count)
+    if after is not None:
+        # Keyset mode: seek past the cursor's (sort_key, id) instead of skipping rows
+        rows = _keyset_rows(session, base_stmt, sort, descending, after, limit + 1)
     else:
-        stmt = base_stmt.limit(limit).offset(offset)
-    t1 = time.perf_counter()
-    try:
-        items = [TodoSchema(**item.model_dump()) for item in session.exec(stmt)]
-    except Exception:
-        inc_db_error("select_page", "todo")
-        raise
-    finally:
-        record_db_timing("select_page", "todo", time.perf_counter() - t1)
-    return TodoList(items=items, total=total_count, limit=limit, offset=offset)
+        stmt = _order_by(base_stmt, sort, descending).limit(limit + 1).offset(offset)
+        rows = list(session.exec(stmt))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor: str | None = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = _encode_cursor(sort, descending, getattr(last, sort), cast(int, last.id))
+    with measure_serialization():
+        # Plain dicts in TodoPayload shape; the adapter serializes without validating
+        items: list[Any] = [dict(zip(TODO_FIELDS, row, strict=False)) for row in rows]
+        return todo_list_adapter.dump_json(
+            {
+                "items": items,
+                "total": total_count,
+                "limit": limit,
+                "offset": None if after is not None else offset,
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+            }
+        )
 
 
 @router.post("/", response_model=TodoSchema, status_code=status.HTTP_201_CREATED)
-def create_todo(
+async def create_todo(
     todo: TodoCreate,
-    session: Annotated[Session, Depends(get_session)],
-    _: None = Depends(require_api_key),
+    db: Annotated[DbRunner, Depends(get_db)],
+    _: str | None = Depends(require_api_key),
 ) -> Todo:
-    ensure_schema()
+    result = await db.run(_create_todo, todo)
+    response_cache.invalidate()
+    events.publish("created", _todo_json(result))
+    return result
+
+
+def _create_todo(session: Session, todo: TodoCreate) -> Todo:
     obj = Todo(
         title=todo.title,
         completed=todo.completed,
         due_at=todo.due_at,
         priority=todo.priority,
     )
-    t0 = time.perf_counter()
-    try:
-        session.add(obj)
-        session.commit()
-        session.refresh(obj)
-    except Exception:
-        inc_db_error("insert", "todo")
-        raise
-    finally:
-        record_db_timing("insert", "todo", time.perf_counter() - t0)
+    session.add(obj)
+    session.commit()
+    session.refresh(obj)
     return obj
 
 
-@router.get("/{todo_id}", response_model=TodoSchema, status_code=status.HTTP_200_OK)
-def get_todo(todo_id: int, session: Annotated[Session, Depends(get_session)]) -> Todo:
-    ensure_schema()
-    t0 = time.perf_counter()
+def _check_batch_size(size: int) -> None:
+    if size < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="bulk batch must not be empty"
+        )
+    if size > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"bulk batch must contain <= {BULK_MAX_ITEMS} items",
+        )
+
+
+def _bulk_result(items: list[BulkItemResult]) -> BulkResult:
+    failed = sum(1 for item in items if item.status >= 400)
+    return BulkResult(items=items, succeeded=len(items) - failed, failed=failed)
+
+
+def _todo_rows(session: Session, ids: list[int]) -> list[Any]:
+    columns = [getattr(Todo, field) for field in TODO_FIELDS]
+    stmt = select(*columns).where(cast(Any, Todo.id).in_(ids))
+    return list(session.exec(stmt.execution_options(operation="select_by_id")))
+
+
+def _existing_ids(session: Session, ids: list[int]) -> set[int]:
+    stmt = select(Todo.id).where(cast(Any, Todo.id).in_(ids))
+    rows = session.exec(stmt.execution_options(operation="select_by_id"))
+    return {int(i) for i in rows if i is not None}
+
+
+@router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_200_OK)
+async def bulk_create_todos(
+    todos: list[TodoCreate],
+    db: Annotated[DbRunner, Depends(get_db)],
+    _: str | None = Depends(require_api_key),
+) -> BulkResult:
+    _check_batch_size(len(todos))
+    result = await db.run(_bulk_create_todos, todos)
+    response_cache.invalidate()
+    for item in result.items:
+        if item.status == status.HTTP_201_CREATED:
+            events.publish("created", _todo_json(todos[item.index], item.id))
+    return result
+
+
+def _new_rows(todos: list[TodoCreate]) -> list[dict[str, Any]]:
+    created_at = datetime.now(UTC)
+    return [
+        {
+            "title": todo.title,
+            "completed": todo.completed,
+            "due_at": todo.due_at,
+            "priority": todo.priority,
+            "created_at": created_at,
+        }
+        for todo in todos
+    ]
+
+
+def _bulk_create_todos(session: Session, todos: list[TodoCreate]) -> BulkResult:
+    started = time.perf_counter()
+    results: dict[int, BulkItemResult] = {}
+    valid: list[int] = []
+    for i, todo in enumerate(todos):
+        error = due_at_error(todo.due_at)
+        if error is None:
+            valid.append(i)
+        else:
+            # Rejected up front: one bad row would otherwise fail the whole INSERT
+            results[i] = BulkItemResult(index=i, status=status.HTTP_400_BAD_REQUEST, detail=error)
+    if valid:
+        # One executemany-style INSERT ... RETURNING inside a single transaction
+        stmt = insert(Todo).returning(cast(Any, Todo.id), sort_by_parameter_order=True)
+        rows = _new_rows([todos[i] for i in valid])
+        result = session.execute(stmt, rows, execution_options={"operation": "bulk_insert"})
+        for i, new_id in zip(valid, result.scalars(), strict=True):
+            results[i] = BulkItemResult(index=i, id=new_id, status=status.HTTP_201_CREATED)
+        session.commit()
+    record_bulk("create", len(todos), time.perf_counter() - started)
+    return _bulk_result([results[i] for i in range(len(todos))])
+
+
+@router.post("/import", response_model=ImportResult, status_code=status.HTTP_200_OK)
+async def import_todos(
+    request: Request,
+    db: Annotated[DbRunner, Depends(get_db)],
+    import_format: str = Query("ndjson", alias="format", description="ndjson|csv"),
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, description="Rows per insert transaction"),
+    _: str | None = Depends(require_api_key),
+) -> ImportResult:
+    """Import a streamed NDJSON or CSV body of ``TodoCreate`` records.
+
+    The body is parsed and validated line by line as it arrives and valid rows are
+    inserted in transactions of ``chunk_size``, the next chunk being parsed while the
+    previous one is written. Invalid lines are reported and skipped; chunks committed
+    before an error stay committed.
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="format must be ndjson|csv"
+        )
+    if not 1 <= chunk_size <= IMPORT_MAX_CHUNK_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"chunk_size must be between 1 and {IMPORT_MAX_CHUNK_SIZE}",
+        )
+    started = time.perf_counter()
+    imported = rejected = chunks = 0
+    errors: list[ImportLineError] = []
+    batch: list[TodoCreate] = []
+    writing: asyncio.Future[int] | None = None
+
+    async def finish_write() -> None:
+        nonlocal imported, writing
+        if writing is not None:
+            imported += await writing
+            writing = None
+            response_cache.invalidate()
+
     try:
-        todo = session.get(Todo, todo_id)
-    except Exception:
-        inc_db_error("select_by_id", "todo")
-        raise
+        async for line, item in iter_todos(request.stream(), import_format, IMPORT_MAX_LINE_BYTES):
+            if isinstance(item, str):
+                rejected += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append(ImportLineError(line=line, detail=item))
+                continue
+            batch.append(item)
+            if len(batch) >= chunk_size:
+                # At most one chunk in flight: the session is never used concurrently
+                await finish_write()
+                writing = asyncio.ensure_future(db.run(_import_chunk, batch))
+                chunks += 1
+                batch = []
+        if batch:
+            await finish_write()
+            writing = asyncio.ensure_future(db.run(_import_chunk, batch))
+            chunks += 1
+    except ImportFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     finally:
-        record_db_timing("select_by_id", "todo", time.perf_counter() - t0)
+        # Also on errors or a client disconnect: let the in-flight chunk commit
+        await finish_write()
+    if imported:
+        # One event instead of a flood: subscribers re-list, as after a missed replay
+        events.publish("reset", b"{}")
+    seconds = time.perf_counter() - started
+    return ImportResult(
+        imported=imported,
+        rejected=rejected,
+        errors=errors,
+        errors_truncated=rejected > len(errors),
+        chunks=chunks,
+        seconds=round(seconds, 3),
+        rows_per_second=round(imported / seconds, 1) if seconds > 0 else 0.0,
+    )
+
+
+def _import_chunk(session: Session, todos: list[TodoCreate]) -> int:
+    started = time.perf_counter()
+    session.execute(
+        insert(Todo), _new_rows(todos), execution_options={"operation": "import_insert"}
+    )
+    session.commit()
+    record_bulk("import", len(todos), time.perf_counter() - started)
+    return len(todos)
+
+
+@router.patch("/bulk", response_model=BulkResult, status_code=status.HTTP_200_OK)
+async def bulk_update_todos(
+    updates: list[TodoBulkUpdate],
+    db: Annotated[DbRunner, Depends(get_db)],
+    _: str | None = Depends(require_api_key),
+) -> BulkResult:
+    _check_batch_size(len(updates))
+    result = await db.run(_bulk_update_todos, updates)
+    response_cache.invalidate()
+    updated = [cast(int, item.id) for item in result.items if item.status == status.HTTP_200_OK]
+    if updated:
+        # Events carry the full row, not just the fields this batch changed
+        for row in await db.run(_todo_rows, updated):
+            events.publish("updated", _todo_json(row))
+    return result
+
+
+def _bulk_update_todos(session: Session, updates: list[TodoBulkUpdate]) -> BulkResult:
+    started = time.perf_counter()
+    found = _existing_ids(session, [u.id for u in updates])
+    results: list[BulkItemResult] = []
+    params: list[dict[str, Any]] = []
+    for i, upd in enumerate(updates):
+        if upd.id not in found:
+            results.append(
+                BulkItemResult(
+                    index=i, id=upd.id, status=status.HTTP_404_NOT_FOUND, detail="Todo not found"
+                )
+            )
+            continue
+        error = due_at_error(upd.due_at)
+        if error is not None:
+            results.append(
+                BulkItemResult(index=i, id=upd.id, status=status.HTTP_400_BAD_REQUEST, detail=error)
+            )
+            continue
+        # Same semantics as update_todo: only provided (non-null) fields change
+        values = upd.model_dump(exclude_none=True)
+        if len(values) > 1:
+            params.append(values)
+        results.append(BulkItemResult(index=i, id=upd.id, status=status.HTTP_200_OK))
+    if params:
+        # ORM bulk UPDATE by primary key: batched executemany per distinct column set
+        session.execute(update(Todo), params, execution_options={"operation": "bulk_update"})
+        session.commit()
+    record_bulk("update", len(updates), time.perf_counter() - started)
+    return _bulk_result(results)
+
+
+@router.delete("/bulk", response_model=BulkResult, status_code=status.HTTP_200_OK)
+async def bulk_delete_todos(
+    ids: Annotated[list[int], Body()],
+    db: Annotated[DbRunner, Depends(get_db)],
+    _: str | None = Depends(require_api_key),
+) -> BulkResult:
+    _check_batch_size(len(ids))
+    result = await db.run(_bulk_delete_todos, ids)
+    response_cache.invalidate()
+    for item in result.items:
+        if item.status == status.HTTP_204_NO_CONTENT:
+            events.publish("deleted", _deleted_json(cast(int, item.id)))
+    return result
+
+
+def _bulk_delete_todos(session: Session, ids: list[int]) -> BulkResult:
+    started = time.perf_counter()
+    found = _existing_ids(session, ids)
+    if found:
+        stmt = (
+            update(Todo)
+            .where(cast(Any, Todo.id).in_(found))
+            .values(deleted_at=datetime.now(UTC))
+            .execution_options(operation="bulk_delete")
+        )
+        session.execute(stmt)
+        session.commit()
+    results = [
+        (
+            BulkItemResult(index=i, id=todo_id, status=status.HTTP_204_NO_CONTENT)
+            if todo_id in found
+            else BulkItemResult(
+                index=i, id=todo_id, status=status.HTTP_404_NOT_FOUND, detail="Todo not found"
+            )
+        )
+        for i, todo_id in enumerate(ids)
+    ]
+    record_bulk("delete", len(ids), time.perf_counter() - started)
+    return _bulk_result(results)
+
+
+@router.get("/search", response_model=TodoList, status_code=status.HTTP_200_OK)
+async def search_todos(
+    db: Annotated[DbRunner, Depends(get_db)],
+    q: str = Query(..., description="Words to find in titles; each word matches as a prefix"),
+    limit: int = 50,
+    completed: bool | None = Query(None, description="Filter by completion status (true/false)"),
+    priority: str | None = Query(None, description="Filter by priority: low|medium|high"),
+    overdue: bool | None = Query(None, description="Filter overdue items (due_at < now)"),
+    include_deleted: bool = Query(False, description="Include soft-deleted items when true"),
+    cursor: str | None = Query(None, description="Opaque cursor from a previous next_cursor"),
+    include_total: bool = Query(True, description="Compute total matching count when true"),
+) -> TodoList:
+    """Titles ranked by BM25 relevance (best first), paged by (rank, id) cursors."""
+    _check_page_params(limit, 0)
+    match = _fts_query(q)
+    after = _decode_cursor(cursor, "rank", "asc") if cursor is not None else None
+    return await db.run(
+        _search_todos,
+        match=match,
+        clauses=_filter_clauses(include_deleted, completed, priority, overdue),
+        after=after,
+        limit=limit,
+        include_total=include_total,
+    )
+
+
+def _search_todos(
+    session: Session,
+    match: str,
+    clauses: list[Any],
+    after: tuple[Any, int] | None,
+    limit: int,
+    include_total: bool,
+) -> TodoList:
+    total_count: int | None = None
+    if include_total:
+        matching_ids = select(todo_fts.c.rowid).where(_fts_match(match))
+        total_count = _count_todos(session, [*clauses, cast(Any, Todo.id).in_(matching_ids)])
+    rank = todo_fts.c.rank
+    id_col = cast(Any, Todo.id)
+    stmt = (
+        select(Todo, rank)
+        .join(todo_fts, todo_fts.c.rowid == id_col)
+        .where(_fts_match(match), *clauses)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(rank, id_col) > tuple_(*after))
+    stmt = stmt.order_by(rank, id_col).limit(limit + 1)
+    rows = list(session.exec(stmt.execution_options(operation="select_search")))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor: str | None = None
+    if has_more:
+        last, last_rank = rows[-1]
+        next_cursor = _encode_cursor("rank", False, last_rank, cast(int, last.id))
+    return TodoList(
+        items=[TodoSchema(**item.model_dump()) for item, _ in rows],
+        total=total_count,
+        limit=limit,
+        offset=None,
+        next_cursor=next_cursor,
+        has_more=has_more,
+    )
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_200_OK: {"content": {"text/event-stream": {}}}},
+)
+async def todo_events(
+    last_event_id: Annotated[str | None, Header(alias="Last-Event-ID")] = None,
+) -> StreamingResponse:
+    """Stream todo changes as Server-Sent Events instead of polling the list.
+
+    ``created``/``updated``/``restored`` carry the todo and ``deleted`` its id. Reconnects
+    sending ``Last-Event-ID`` get the missed events replayed, or a ``reset`` event when
+    they are no longer buffered and the client must re-list.
+    """
+    return StreamingResponse(
+        events.stream(last_event_id),
+        media_type="text/event-stream",
+        # no-transform/X-Accel-Buffering keep proxies from buffering or compressing the stream
+        headers={"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"},
+    )
+
+
+def _ndjson_rows(rows: list[Any]) -> bytes:
+    lines = [
+        todo_adapter.dump_json(cast(TodoPayload, dict(zip(TODO_FIELDS, row, strict=True))))
+        for row in rows
+    ]
+    return b"\n".join(lines) + b"\n"
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        # Same spelling as the JSON responses (values are always UTC)
+        return value.isoformat().replace("+00:00", "Z")
+    return value
+
+
+def _csv_rows(rows: list[Any]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(
+        [[_csv_cell(value) for value in row] for row in rows]
+    )
+    return buffer.getvalue().encode()
+
+
+# format -> (media type, download filename, header, batch encoder)
+_EXPORT_FORMATS: dict[str, tuple[str, str, bytes, Callable[[list[Any]], bytes]]] = {
+    "ndjson": ("application/x-ndjson", "todos.ndjson", b"", _ndjson_rows),
+    "csv": (
+        "text/csv; charset=utf-8",
+        "todos.csv",
+        ",".join(TODO_FIELDS).encode() + b"\n",
+        _csv_rows,
+    ),
+}
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {"content": {"application/x-ndjson": {}, "text/csv": {}}},
+    },
+)
+async def export_todos(
+    db: Annotated[DbRunner, Depends(get_db)],
+    export_format: str = Query("ndjson", alias="format", description="ndjson|csv"),
+    completed: bool | None = Query(None, description="Filter by completion status (true/false)"),
+    priority: str | None = Query(None, description="Filter by priority: low|medium|high"),
+    overdue: bool | None = Query(None, description="Filter overdue items (due_at < now)"),
+    include_deleted: bool = Query(False, description="Include soft-deleted items when true"),
+    q: str | None = Query(None, description="Full-text filter on title (prefix match per word)"),
+) -> StreamingResponse:
+    """Stream every matching todo in id order, in constant memory.
+
+    Rows are read from a server-side cursor in batches of ``TODO_EXPORT_BATCH_SIZE`` and
+    each batch is encoded and sent as one chunk, so the table is never materialized.
+    """
+    if export_format not in _EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="format must be ndjson|csv"
+        )
+    media_type, filename, header, encode = _EXPORT_FORMATS[export_format]
+    match = _fts_query(q) if q is not None else None
+    stmt = (
+        select(*[getattr(Todo, field) for field in TODO_FIELDS])
+        .where(*_filter_clauses(include_deleted, completed, priority, overdue, match))
+        .order_by(cast(Any, Todo.id))
+        .execution_options(operation="select_export")
+    )
+
+    async def body() -> AsyncIterator[bytes]:
+        if header:
+            yield header
+        async for rows in db.stream(stmt, EXPORT_BATCH_SIZE):
+            yield encode(rows)
+
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/changes", response_model=TodoChangeList, status_code=status.HTTP_200_OK)
+async def list_changes(
+    request: Request,
+    db: Annotated[DbRunner, Depends(get_db)],
+    since: int = Query(0, description="Return rows changed after this version (0 = all)"),
+    limit: int = 100,
+) -> Any:
+    """Rows inserted, updated or soft-deleted after version ``since``, in version order.
+
+    Soft-deleted rows are included as tombstones (``deleted_at`` set). Store
+    ``next_since`` and pass it back as ``since`` until ``has_more`` is false. Returns
+    410 when tombstones newer than ``since`` have since been purged; the client must
+    then re-sync from ``since=0``.
+    """
+    _check_page_params(limit, 0)
+    if since < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must be >= 0")
+    cache_key = ("changes", since, limit)
+    cached = _cached_response(request, cache_key, "/todos/changes")
+    if cached is not None:
+        return cached
+    version = response_cache.version
+    body = await db.run(_list_changes, since, limit)
+    if body is None:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="since is older than the purge horizon; re-sync from since=0",
+        )
+    return _store_response(cache_key, version, body)
+
+
+def _list_changes(session: Session, since: int, limit: int) -> bytes | None:
+    if since and since < purged_version(session):
+        return None
+    version_col = cast(Any, Todo.version)
+    stmt = (
+        select(*[getattr(Todo, field) for field in TODO_CHANGE_FIELDS])
+        .where(version_col > since)
+        .order_by(version_col)
+        .limit(limit + 1)
+        .execution_options(operation="select_changes")
+    )
+    rows = list(session.exec(stmt))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    with measure_serialization():
+        items: list[Any] = [dict(zip(TODO_CHANGE_FIELDS, row, strict=True)) for row in rows]
+        return todo_change_list_adapter.dump_json(
+            {
+                "items": items,
+                "next_since": rows[-1].version if rows else since,
+                "has_more": has_more,
+            }
+        )
+
+
+@router.get("/{todo_id}", response_model=TodoSchema, status_code=status.HTTP_200_OK)
+async def get_todo(todo_id: int, request: Request, db: Annotated[DbRunner, Depends(get_db)]) -> Any:
+    cache_key = ("get", todo_id)
+    cached = _cached_response(request, cache_key, "/todos/{todo_id}")
+    if cached is not None:
+        return cached
+    version = response_cache.version
+    todo = await db.run(_get_todo, todo_id)
+    with measure_serialization():
+        body = _todo_json(todo)
+    return _store_response(cache_key, version, body)
+
+
+def _get_todo(session: Session, todo_id: int) -> Todo:
+    todo = session.get(Todo, todo_id, execution_options={"operation": "select_by_id"})
     if not todo:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Todo not found")
     return todo
 
 
 @router.put("/{todo_id}", response_model=TodoSchema, status_code=status.HTTP_200_OK)
-def update_todo(
+async def update_todo(
     todo_id: int,
     updated: TodoUpdate,
-    session: Annotated[Session, Depends(get_session)],
-    _: None = Depends(require_api_key),
+    db: Annotated[DbRunner, Depends(get_db)],
+    _: str | None = Depends(require_api_key),
 ) -> Todo:
-    ensure_schema()
-    todo = session.get(Todo, todo_id)
-    if not todo:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Todo not found")
+    result = await db.run(_update_todo, todo_id, updated)
+    response_cache.invalidate()
+    events.publish("updated", _todo_json(result))
+    return result
+
+
+def _update_todo(session: Session, todo_id: int, updated: TodoUpdate) -> Todo:
+    todo = _get_todo(session, todo_id)
     if updated.title is not None:
         todo.title = updated.title
     if updated.completed is not None:
@@ -177,70 +995,47 @@ def update_todo(
         todo.due_at = updated.due_at
     if updated.priority is not None:
         todo.priority = updated.priority
-    t1 = time.perf_counter()
-    try:
-        session.add(todo)
-        session.commit()
-        session.refresh(todo)
-    except Exception:
-        inc_db_error("update", "todo")
-        raise
-    finally:
-        record_db_timing("update", "todo", time.perf_counter() - t1)
+    session.add(todo)
+    session.commit()
+    session.refresh(todo)
     return todo
 
 
 @router.delete("/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_todo(
+async def delete_todo(
     todo_id: int,
-    session: Annotated[Session, Depends(get_session)],
-    _: None = Depends(require_api_key),
+    db: Annotated[DbRunner, Depends(get_db)],
+    _: str | None = Depends(require_api_key),
 ) -> None:
-    ensure_schema()
-    t0 = time.perf_counter()
-    try:
-        todo = session.get(Todo, todo_id)
-    except Exception:
-        inc_db_error("select_by_id", "todo")
-        raise
-    finally:
-        record_db_timing("select_by_id", "todo", time.perf_counter() - t0)
-    if not todo:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Todo not found")
-    t1 = time.perf_counter()
-    try:
-        from datetime import UTC, datetime
+    await db.run(_delete_todo, todo_id)
+    response_cache.invalidate()
+    events.publish("deleted", _deleted_json(todo_id))
 
-        todo.deleted_at = datetime.now(UTC)
-        session.add(todo)
-        session.commit()
-    except Exception:
-        inc_db_error("delete", "todo")
-        raise
-    finally:
-        record_db_timing("delete", "todo", time.perf_counter() - t1)
+
+def _delete_todo(session: Session, todo_id: int) -> None:
+    todo = _get_todo(session, todo_id)
+    todo.deleted_at = datetime.now(UTC)
+    session.add(todo)
+    session.commit()
     return None
 
 
 @router.post("/{todo_id}/restore", response_model=TodoSchema, status_code=status.HTTP_200_OK)
-def restore_todo(
+async def restore_todo(
     todo_id: int,
-    session: Annotated[Session, Depends(get_session)],
-    _: None = Depends(require_api_key),
+    db: Annotated[DbRunner, Depends(get_db)],
+    _: str | None = Depends(require_api_key),
 ) -> Todo:
-    ensure_schema()
-    todo = session.get(Todo, todo_id)
-    if not todo:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Todo not found")
-    t0 = time.perf_counter()
-    try:
-        todo.deleted_at = None
-        session.add(todo)
-        session.commit()
-        session.refresh(todo)
-    except Exception:
-        inc_db_error("restore", "todo")
-        raise
-    finally:
-        record_db_timing("restore", "todo", time.perf_counter() - t0)
+    result = await db.run(_restore_todo, todo_id)
+    response_cache.invalidate()
+    events.publish("restored", _todo_json(result))
+    return result
+
+
+def _restore_todo(session: Session, todo_id: int) -> Todo:
+    todo = _get_todo(session, todo_id)
+    todo.deleted_at = None
+    session.add(todo)
+    session.commit()
+    session.refresh(todo)
     return todo
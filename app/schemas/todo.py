@@ -1,6 +1,7 @@
 from datetime import datetime
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from typing_extensions import TypedDict
 
 
 class TodoBase(BaseModel):
@@ -25,10 +26,94 @@ class Todo(TodoBase):
     id: int
 
 
+class TodoChange(Todo):
+    deleted_at: datetime | None = None
+    updated_at: datetime | None = None
+    version: int
+
+
+class TodoChangeList(BaseModel):
+    items: list[TodoChange]
+    next_since: int
+    has_more: bool
+
+
 class TodoList(BaseModel):
     items: list[Todo]
-    total: int
+    total: int | None = None
     limit: int | None = None
     offset: int | None = None
     next_cursor: str | None = None
     has_more: bool | None = None
+
+
+# Serialization-only mirrors of Todo / TodoList. List pages are dumped straight from row
+# tuples through these adapters, skipping model construction and response validation;
+# field order must match the models so the JSON is identical.
+class TodoPayload(TypedDict):
+    title: str
+    completed: bool
+    due_at: datetime | None
+    priority: str | None
+    id: int
+
+
+class TodoListPayload(TypedDict):
+    items: list[TodoPayload]
+    total: int | None
+    limit: int | None
+    offset: int | None
+    next_cursor: str | None
+    has_more: bool | None
+
+
+class TodoChangePayload(TodoPayload):
+    deleted_at: datetime | None
+    updated_at: datetime | None
+    version: int
+
+
+class TodoChangeListPayload(TypedDict):
+    items: list[TodoChangePayload]
+    next_since: int
+    has_more: bool
+
+
+TODO_FIELDS: tuple[str, ...] = tuple(TodoPayload.__annotations__)
+TODO_CHANGE_FIELDS: tuple[str, ...] = tuple(TodoChangePayload.__annotations__)
+todo_adapter = TypeAdapter(TodoPayload)
+todo_list_adapter = TypeAdapter(TodoListPayload)
+todo_change_list_adapter = TypeAdapter(TodoChangeListPayload)
+
+
+class TodoBulkUpdate(TodoUpdate):
+    id: int
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: int | None = None
+    status: int
+    detail: str | None = None
+
+
+class BulkResult(BaseModel):
+    items: list[BulkItemResult]
+    succeeded: int
+    failed: int
+
+
+class ImportLineError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportResult(BaseModel):
+    imported: int
+    rejected: int
+    # First TODO_IMPORT_MAX_ERRORS rejected lines; errors_truncated when there were more
+    errors: list[ImportLineError]
+    errors_truncated: bool
+    chunks: int
+    seconds: float
+    rows_per_second: float
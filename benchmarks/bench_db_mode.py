@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Compare throughput and tail latency of TODO_DB_MODE=sync vs async under uvicorn.
+
+For each mode a uvicorn server is started on a fresh database, seeded via the bulk
+endpoint, then ``--concurrency`` clients issue a read-heavy mix (list pages, get by id,
+creates) for ``--seconds``. Run from the repo root:
+
+    python benchmarks/bench_db_mode.py --concurrency 64 --seconds 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            if (await client.get("/health/live")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def _drive(base_url: str, args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await _wait_ready(client)
+        for start in range(0, args.rows, 1000):
+            batch = [{"title": f"seed {i}"} for i in range(start, min(start + 1000, args.rows))]
+            (await client.post("/todos/bulk", json=batch)).raise_for_status()
+
+        latencies: list[float] = []
+        errors = 0
+        deadline = time.perf_counter() + args.seconds
+
+        async def worker() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                roll = random.random()
+                t0 = time.perf_counter()
+                if roll < 0.6:
+                    r = await client.get("/todos/", params={"limit": 50})
+                elif roll < 0.9:
+                    r = await client.get(f"/todos/{random.randint(1, args.rows)}")
+                else:
+                    r = await client.post("/todos/", json={"title": "bench"})
+                latencies.append(time.perf_counter() - t0)
+                if r.status_code >= 400:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / args.seconds, 1),
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+        "errors": errors,
+    }
+
+
+def run_mode(mode: str, args: argparse.Namespace) -> dict:
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update(
+            TODO_DB_MODE=mode,
+            TODO_DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+            TODO_API_KEY="",
+            TODO_RATE_LIMIT_READ_RPS="0",
+            TODO_RATE_LIMIT_WRITE_RPS="0",
+            TODO_MAX_IN_FLIGHT="0",
+        )
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)]
+        cmd += ["--log-level", "warning"]
+        proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+        try:
+            result = asyncio.run(_drive(f"http://127.0.0.1:{port}", args))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    return {"mode": mode, **result}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+    for mode in args.modes.split(","):
+        print(json.dumps(run_mode(mode, args)))
+
+
+if __name__ == "__main__":
+    main()
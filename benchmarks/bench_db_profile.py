@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Compare SQLite read/write throughput for the untuned and tuned engine profiles.
+
+Each profile gets a fresh database seeded with ``--rows`` todos. Reader threads run the
+default ``list_todos`` page query while writer threads insert one row per transaction,
+for ``--seconds`` each. Run from the repo root:
+
+    python benchmarks/bench_db_profile.py --readers 8 --writers 2 --seconds 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Read by app.db at import: keep slow-query warnings and their EXPLAIN lookups out of
+# the timed loops
+os.environ.setdefault("TODO_SLOW_QUERY_MS", "0")
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app.db import EngineProfile, create_db_engine  # noqa: E402
+from app.migrations import migrate  # noqa: E402
+from app.models.todo import Todo  # noqa: E402
+
+
+def run_profile(name: str, profile: EngineProfile, args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/bench.db", profile)
+        migrate(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                insert(Todo),
+                [{"title": f"seed {i}", "completed": i % 3 == 0} for i in range(args.rows)],
+            )
+
+        stop = threading.Event()
+        reads = [0] * args.readers
+        writes = [0] * args.writers
+        busy_errors = [0]
+        page = select(Todo).where(Todo.deleted_at.is_(None)).limit(50)  # type: ignore[union-attr]
+
+        def reader(idx: int) -> None:
+            while not stop.is_set():
+                with engine.connect() as conn:
+                    conn.execute(page).fetchall()
+                reads[idx] += 1
+
+        def writer(idx: int) -> None:
+            while not stop.is_set():
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(
+                            insert(Todo),
+                            {
+                                "title": f"w{idx}",
+                                "completed": False,
+                                "created_at": datetime.now(UTC),
+                            },
+                        )
+                    writes[idx] += 1
+                except OperationalError:
+                    busy_errors[0] += 1
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+        threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        engine.dispose()
+    return {
+        "profile": name,
+        "reads_per_sec": round(sum(reads) / args.seconds, 1),
+        "writes_per_sec": round(sum(writes) / args.seconds, 1),
+        "busy_errors": busy_errors[0],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    results = [
+        run_profile("sqlite-default", EngineProfile.sqlite_defaults(), args),
+        run_profile("tuned", EngineProfile(), args),
+    ]
+    for row in results:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Measure per-request overhead of the request-metrics middleware.
+
+A trivial FastAPI app is driven directly through its ASGI callable (no network, no
+HTTP client) in three variants: no metrics middleware, the previous
+``BaseHTTPMiddleware`` + ``record_request`` path, and the pure ASGI
+``MetricsMiddleware``. Overhead is reported relative to the bare app. Run from the
+repo root:
+
+    python benchmarks/bench_metrics_middleware.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI, Request, Response  # noqa: E402
+from starlette.types import ASGIApp, Message  # noqa: E402
+
+from app.routers.metrics import (  # noqa: E402
+    MetricsMiddleware,
+    inc_http_error,
+    observe_request_size,
+    observe_response_size,
+    record_metrics,
+)
+
+
+async def _legacy_record_request(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    # The removed BaseHTTPMiddleware implementation, kept here as the baseline
+    start = time.perf_counter()
+    response = await call_next(request)
+    duration = time.perf_counter() - start
+    path = getattr(request.scope.get("route"), "path", request.url.path)
+    record_metrics(request.method, path, response.status_code, duration)
+    if response.status_code >= 400:
+        inc_http_error(request.method, response.status_code)
+    req_len = request.headers.get("content-length")
+    observe_request_size(request.method, int(req_len) if req_len is not None else None)
+    resp_len = response.headers.get("content-length")
+    observe_response_size(response.status_code, int(resp_len) if resp_len else None)
+    return response
+
+
+def _build(variant: str) -> ASGIApp:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int) -> dict:
+        return {"id": item_id}
+
+    if variant == "legacy":
+        app.middleware("http")(_legacy_record_request)
+    elif variant == "asgi":
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def _drive(app: ASGIApp, requests: int) -> float:
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        return None
+
+    def scope(i: int) -> dict:
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/items/{i % 100}",
+            "raw_path": f"/items/{i % 100}".encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"bench")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("127.0.0.1", 80),
+        }
+
+    for i in range(500):  # warm up routing and label caches
+        await app(scope(i), receive, send)
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scope(i), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for variant in ("none", "legacy", "asgi"):
+        app = _build(variant)
+        results[variant] = min(asyncio.run(_drive(app, args.requests)) for _ in range(args.repeat))
+    for variant, per_request in results.items():
+        print(
+            json.dumps(
+                {
+                    "middleware": variant,
+                    "us_per_request": round(per_request * 1e6, 1),
+                    "overhead_us": round((per_request - results["none"]) * 1e6, 1),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Compare per-page cost of the legacy list serialization path against the fast path.
+
+``legacy`` reproduces the previous pipeline: ORM rows, ``TodoSchema(**model_dump())``
+per item, FastAPI's response_model validation and ``jsonable_encoder`` + ``json.dumps``.
+``fast`` is the current ``_list_todos``: column tuples dumped to JSON bytes by a
+precompiled ``TypeAdapter``. Both read the same page from a seeded database. Run from
+the repo root:
+
+    python benchmarks/bench_serialization.py --rows 5000 --page-size 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import timeit
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Read by app.db at import: keep slow-query warnings and their EXPLAIN lookups out of
+# the timed loops
+os.environ.setdefault("TODO_SLOW_QUERY_MS", "0")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.db import EngineProfile, create_db_engine  # noqa: E402
+from app.migrations import migrate  # noqa: E402
+from app.models.todo import Todo  # noqa: E402
+from app.routers.todos import _list_todos  # noqa: E402
+from app.schemas.todo import Todo as TodoSchema  # noqa: E402
+from app.schemas.todo import TodoList  # noqa: E402
+
+
+def _legacy_page(session: Session, limit: int) -> bytes:
+    rows = session.exec(select(Todo).where(Todo.deleted_at.is_(None)).limit(limit)).all()  # type: ignore[union-attr]
+    page = TodoList(items=[TodoSchema(**row.model_dump()) for row in rows], limit=limit)
+    # What FastAPI does with a returned model and response_model=TodoList
+    validated = TodoList.model_validate(page.model_dump())
+    return json.dumps(jsonable_encoder(validated), separators=(",", ":")).encode()
+
+
+def _fast_page(session: Session, limit: int) -> bytes:
+    return _list_todos(
+        session,
+        limit=limit,
+        offset=0,
+        completed=None,
+        priority=None,
+        overdue=None,
+        include_deleted=False,
+        match=None,
+        sort="id",
+        descending=False,
+        after=None,
+        include_total=False,
+        count_mode="exact",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    now = datetime.now(UTC)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/bench.db", EngineProfile())
+        migrate(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                insert(Todo),
+                [
+                    {
+                        "title": f"seed {i}",
+                        "completed": i % 3 == 0,
+                        "due_at": now + timedelta(hours=i),
+                        "priority": ("low", "medium", "high")[i % 3],
+                        "created_at": now,
+                    }
+                    for i in range(args.rows)
+                ],
+            )
+        with Session(engine) as session:
+            for name, fn in (("legacy", _legacy_page), ("fast", _fast_page)):
+                page = partial(fn, session, args.page_size)
+                page()  # warm up
+                best = min(timeit.repeat(page, number=args.number, repeat=5))
+                print(
+                    json.dumps(
+                        {
+                            "path": name,
+                            "page_size": args.page_size,
+                            "ms_per_page": round(best / args.number * 1000, 3),
+                            "bytes": len(page()),
+                        }
+                    )
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Compare scripts/serve_spa.py configurations (and optionally an older revision).
+
+A stub API backend answers every request with a JSON body after ``--api-delay-ms``,
+so slow API calls can be shown to block (or not) static assets. Each variant of
+``serve_spa.py`` is started against it with a ``--pool-size`` taken from
+``--variants``, and ``--concurrency`` clients request a mix
+of hashed bundles, SPA routes and ``/api`` calls for ``--seconds``. Pass
+``--baseline-rev`` to include the script as of an older commit. Run from the repo root:
+
+    python benchmarks/bench_serve_spa.py --variants 0,8,32 --baseline-rev <commit>
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPT = ROOT / "scripts" / "serve_spa.py"
+ASSETS = {
+    "index.html": 2 * 1024,
+    "main-5F3A9C1B.js": 300 * 1024,
+    "polyfills-8D2E4F60.js": 40 * 1024,
+    "styles-1B7C3D9E.css": 30 * 1024,
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def run_stub_backend(port: int, delay_ms: float, body_bytes: int) -> None:
+    body = json.dumps({"items": [], "padding": "x" * body_bytes}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _reply(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            time.sleep(delay_ms / 1000)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = _reply
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            if (await client.get("/index.html")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def _pct(values: list[float], p: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 2)
+
+
+async def _drive(base_url: str, args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await _wait_ready(client)
+        latencies: dict[str, list[float]] = {"static": [], "api": []}
+        errors = 0
+        wire_bytes = 0
+        deadline = time.perf_counter() + args.seconds
+        static_paths = ["/" + name for name in ASSETS] + ["/todos/42"]
+
+        async def worker() -> None:
+            nonlocal errors, wire_bytes
+            while time.perf_counter() < deadline:
+                kind = "api" if random.random() < args.api_ratio else "static"
+                t0 = time.perf_counter()
+                try:
+                    if kind == "api":
+                        r = await client.get("/api/todos/", params={"limit": 50})
+                    else:
+                        r = await client.get(random.choice(static_paths))
+                    await r.aread()
+                    wire_bytes += r.num_bytes_downloaded
+                    if r.status_code >= 400:
+                        errors += 1
+                except httpx.TransportError:
+                    errors += 1
+                latencies[kind].append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "requests": total,
+        "rps": round(total / args.seconds, 1),
+        "static_p50_ms": _pct(latencies["static"], 0.50),
+        "static_p99_ms": _pct(latencies["static"], 0.99),
+        "api_p50_ms": _pct(latencies["api"], 0.50),
+        "api_p99_ms": _pct(latencies["api"], 0.99),
+        # Body bytes as sent, i.e. compressed when the server used a Content-Encoding
+        "wire_kib_per_request": round(wire_bytes / 1024 / max(total, 1), 1),
+        "errors": errors,
+    }
+
+
+def run_variant(name: str, cmd: list[str], backend_port: int, args: argparse.Namespace) -> dict:
+    port = _free_port()
+    env = dict(os.environ, TODO_BACKEND_HOST="127.0.0.1", TODO_BACKEND_PORT=str(backend_port))
+    proc = subprocess.Popen(
+        [*cmd, "--port", str(port)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        result = asyncio.run(_drive(f"http://127.0.0.1:{port}", args))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return {"server": name, **result}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--variants", default="0,8,32", help="Backend pool sizes")
+    parser.add_argument("--baseline-rev", help="Also run scripts/serve_spa.py from this commit")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--api-ratio", type=float, default=0.3)
+    parser.add_argument("--api-delay-ms", type=float, default=20.0)
+    parser.add_argument("--api-bytes", type=int, default=8 * 1024)
+    parser.add_argument("--stub-backend", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stub_backend:
+        run_stub_backend(args.stub_backend, args.api_delay_ms, args.api_bytes)
+        return
+
+    backend_port = _free_port()
+    backend = subprocess.Popen(
+        [sys.executable, __file__, "--stub-backend", str(backend_port)]
+        + ["--api-delay-ms", str(args.api_delay_ms), "--api-bytes", str(args.api_bytes)],
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            static_dir = Path(tmp) / "browser"
+            static_dir.mkdir()
+            for name, size in ASSETS.items():
+                (static_dir / name).write_bytes(os.urandom(size // 2).hex().encode())
+            variants: list[tuple[str, list[str]]] = []
+            if args.baseline_rev:
+                baseline = Path(tmp) / "serve_spa_baseline.py"
+                source = subprocess.run(
+                    ["git", "show", f"{args.baseline_rev}:scripts/serve_spa.py"],
+                    cwd=ROOT,
+                    check=True,
+                    capture_output=True,
+                ).stdout
+                baseline.write_bytes(source)
+                variants.append((f"baseline@{args.baseline_rev}", [sys.executable, str(baseline)]))
+            for pool in args.variants.split(","):
+                cmd = [sys.executable, str(SCRIPT), "--pool-size", pool]
+                variants.append((f"pool={pool}", cmd))
+            for name, cmd in variants:
+                result = run_variant(name, [*cmd, "--dir", str(static_dir)], backend_port, args)
+                print(json.dumps(result), flush=True)
+    finally:
+        backend.terminate()
+        backend.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
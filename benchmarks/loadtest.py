@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""Reproducible load test for the todos API with machine-readable results.
+
+For every combination of ``--rows``, ``--modes`` and ``--scenarios`` a seeded database
+(see ``seed.py``) is served either in-process through ``httpx.ASGITransport`` (``asgi``)
+or by a real ``uvicorn`` subprocess (``uvicorn``), and ``--concurrency`` clients run the
+scenario's weighted operation mix for ``--seconds``. Results (requests/sec, error count,
+p50/p90/p99/max latency overall and per operation) are written as JSON; ``--baseline``
+compares against an earlier results file and exits non-zero on regressions. Run from
+the repo root:
+
+    python benchmarks/loadtest.py --rows 10000,100000 --modes asgi,uvicorn \\
+        --scenarios read-heavy,write-heavy,mixed --seconds 10 --output results.json
+    python benchmarks/loadtest.py --rows 10000 --baseline results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+from seed import WORDS, seed_database
+
+ROOT = Path(__file__).resolve().parent.parent
+
+Operation = Callable[[httpx.AsyncClient, random.Random, dict[str, Any]], Awaitable[httpx.Response]]
+
+
+async def list_filtered(client: httpx.AsyncClient, rng: random.Random, state: dict) -> Any:
+    params: dict[str, Any] = {"limit": 50}
+    if rng.random() < 0.5:
+        params["completed"] = rng.choice(["true", "false"])
+    if rng.random() < 0.5:
+        params["priority"] = rng.choice(["low", "medium", "high"])
+    if rng.random() < 0.3:
+        params["overdue"] = "true"
+    params["sort"] = rng.choice(["id", "due_at", "created_at"])
+    return await client.get("/todos/", params=params)
+
+
+async def cursor_page(client: httpx.AsyncClient, rng: random.Random, state: dict) -> Any:
+    # Each client walks forward through due_at order, restarting at the end
+    params: dict[str, Any] = {"limit": 50, "sort": "due_at", "include_total": "false"}
+    if state.get("cursor"):
+        params["cursor"] = state["cursor"]
+    r = await client.get("/todos/", params=params)
+    state["cursor"] = r.json().get("next_cursor") if r.status_code == 200 else None
+    return r
+
+
+async def get_by_id(client: httpx.AsyncClient, rng: random.Random, state: dict) -> Any:
+    return await client.get(f"/todos/{rng.randint(1, state['rows'])}")
+
+
+async def search(client: httpx.AsyncClient, rng: random.Random, state: dict) -> Any:
+    return await client.get("/todos/search", params={"q": rng.choice(WORDS)[:4], "limit": 20})
+
+
+async def create(client: httpx.AsyncClient, rng: random.Random, state: dict) -> Any:
+    body = {"title": " ".join(rng.choices(WORDS, k=3)), "priority": rng.choice(["low", "high"])}
+    return await client.post("/todos/", json=body)
+
+
+async def update(client: httpx.AsyncClient, rng: random.Random, state: dict) -> Any:
+    body = {"completed": rng.random() < 0.5}
+    return await client.put(f"/todos/{rng.randint(1, state['rows'])}", json=body)
+
+
+OPERATIONS: dict[str, Operation] = {
+    "list_filtered": list_filtered,
+    "cursor_page": cursor_page,
+    "get_by_id": get_by_id,
+    "search": search,
+    "create": create,
+    "update": update,
+}
+
+# Weighted operation mixes (weights are relative)
+SCENARIOS: dict[str, dict[str, int]] = {
+    "read-heavy": {
+        "list_filtered": 35,
+        "cursor_page": 25,
+        "get_by_id": 30,
+        "search": 5,
+        "create": 5,
+    },
+    "write-heavy": {"create": 50, "update": 30, "list_filtered": 10, "get_by_id": 10},
+    "mixed": {"list_filtered": 30, "cursor_page": 20, "get_by_id": 20, "create": 15, "update": 15},
+}
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 3)
+
+    return {"p50": pct(0.50), "p90": pct(0.90), "p99": pct(0.99), "max": pct(1.0)}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: str, rows: int, args: argparse.Namespace
+) -> dict[str, Any]:
+    names = list(SCENARIOS[scenario])
+    weights = [SCENARIOS[scenario][name] for name in names]
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors: dict[str, int] = dict.fromkeys(names, 0)
+
+    async def worker(index: int, deadline: float) -> None:
+        rng = random.Random(args.seed * 7919 + index)
+        state: dict[str, Any] = {"rows": rows}
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            t0 = time.perf_counter()
+            try:
+                r = await OPERATIONS[name](client, rng, state)
+                failed = r.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies[name].append(time.perf_counter() - t0)
+            if failed:
+                errors[name] += 1
+
+    # Short warm-up (connections, caches, JIT-free but still first-call costs)
+    warmup_deadline = time.perf_counter() + args.warmup
+    await asyncio.gather(*(worker(i, warmup_deadline) for i in range(args.concurrency)))
+    for name in names:
+        latencies[name].clear()
+        errors[name] = 0
+
+    started = time.perf_counter()
+    deadline = started + args.seconds
+    await asyncio.gather(*(worker(i, deadline) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    every = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "requests": len(every),
+        "rps": round(len(every) / elapsed, 1),
+        "errors": sum(errors.values()),
+        "latency_ms": _percentiles(every),
+        "operations": {
+            name: {
+                "count": len(latencies[name]),
+                "errors": errors[name],
+                **_percentiles(latencies[name]),
+            }
+            for name in names
+        },
+    }
+
+
+def _server_env(db_path: Path, args: argparse.Namespace) -> dict[str, str]:
+    env = {
+        "TODO_DATABASE_URL": f"sqlite:///{db_path}",
+        "TODO_API_KEY": "",
+        "TODO_SLOW_QUERY_MS": "0",
+        # One client drives the whole load; measure the service, not the limiter
+        "TODO_RATE_LIMIT_READ_RPS": "0",
+        "TODO_RATE_LIMIT_WRITE_RPS": "0",
+        "TODO_MAX_IN_FLIGHT": "0",
+    }
+    if args.no_cache:
+        env["TODO_RESPONSE_CACHE_SIZE"] = "0"
+    return env
+
+
+def run_asgi(db_path: Path, rows: int, scenario: str, args: argparse.Namespace) -> dict[str, Any]:
+    # The app reads its configuration at import time, so import it only once per process
+    os.environ.update(_server_env(db_path, args))
+    from app.db import DATABASE_URL, init_db
+    from app.main import app
+
+    if f"sqlite:///{db_path}" != DATABASE_URL:
+        raise SystemExit("asgi mode serves one database file per process")
+    init_db()  # ASGITransport does not run the lifespan
+
+    async def drive() -> dict[str, Any]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run_scenario(client, scenario, rows, args)
+
+    return asyncio.run(drive())
+
+
+def run_asgi_child(
+    db_path: Path, rows: int, scenario: str, args: argparse.Namespace
+) -> dict[str, Any]:
+    """``run_asgi`` in a fresh interpreter, so every dataset gets its own app import."""
+    cmd = [sys.executable, __file__, "--asgi-child", str(db_path), "--rows", str(rows)]
+    cmd += ["--scenarios", scenario, "--concurrency", str(args.concurrency)]
+    cmd += ["--seconds", str(args.seconds), "--warmup", str(args.warmup)]
+    cmd += ["--seed", str(args.seed)] + (["--no-cache"] if args.no_cache else [])
+    out = subprocess.run(cmd, cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def run_uvicorn(
+    db_path: Path, rows: int, scenario: str, args: argparse.Namespace
+) -> dict[str, Any]:
+    port = _free_port()
+    env = {**os.environ, **_server_env(db_path, args)}
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)]
+    cmd += ["--log-level", "warning", "--workers", str(args.workers)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+
+    async def drive() -> dict[str, Any]:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        base_url = f"http://127.0.0.1:{port}"
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            for _ in range(100):
+                try:
+                    if (await client.get("/health/live")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("server did not start")
+            return await run_scenario(client, scenario, rows, args)
+
+    try:
+        return asyncio.run(drive())
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def _restore(db_path: Path, pristine: Path) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    db_path.write_bytes(pristine.read_bytes())
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Describe runs whose rps fell or p99 rose by more than ``tolerance`` vs the baseline."""
+    key_fields = ("scenario", "mode", "rows")
+    previous = {tuple(run[k] for k in key_fields): run for run in baseline}
+    regressions = []
+    for run in results:
+        base = previous.get(tuple(run[k] for k in key_fields))
+        if base is None:
+            continue
+        label = "/".join(str(run[k]) for k in key_fields)
+        if run["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: rps {base['rps']} -> {run['rps']}")
+        if run["latency_ms"]["p99"] > base["latency_ms"]["p99"] * (1 + tolerance):
+            regressions.append(
+                f"{label}: p99 {base['latency_ms']['p99']}ms -> {run['latency_ms']['p99']}ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="10000", help="comma-separated dataset sizes")
+    parser.add_argument("--modes", default="asgi", help="comma-separated: asgi,uvicorn")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", type=Path, help="keep seeded databases here for reuse")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--asgi-child", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.asgi_child:
+        # One asgi run, started by run_asgi_child; the result goes to the parent on stdout
+        result = run_asgi(args.asgi_child, int(args.rows), args.scenarios, args)
+        print(json.dumps(result), flush=True)
+        return
+
+    sizes = [int(value) for value in args.rows.split(",")]
+    modes = args.modes.split(",")
+    scenarios = args.scenarios.split(",")
+    for scenario in scenarios:
+        if scenario not in SCENARIOS:
+            parser.error(f"unknown scenario {scenario!r}; choose from {', '.join(SCENARIOS)}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Seeding inserts large batches; keep them out of the slow-query log
+        os.environ.setdefault("TODO_SLOW_QUERY_MS", "0")
+        data_dir = args.data_dir or Path(tmp)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        for rows in sizes:
+            for mode in modes:
+                for scenario in scenarios:
+                    # Every run starts from the pristine dataset; writes would skew later runs
+                    pristine = data_dir / f"todos-{rows}-seed{args.seed}.db"
+                    seed_database(pristine, rows, args.seed)
+                    db_path = Path(tmp) / f"serve-{mode}.db"
+                    _restore(db_path, pristine)
+                    # asgi runs import the app, which reads its configuration once, so
+                    # each one gets its own process
+                    runner = run_asgi_child if mode == "asgi" else run_uvicorn
+                    run = {"scenario": scenario, "mode": mode, "rows": rows}
+                    run.update(runner(db_path, rows, scenario, args))
+                    print(json.dumps(run), flush=True)
+                    results.append(run)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "workers": args.workers,
+            "response_cache": not args.no_cache,
+            "scenarios": {name: SCENARIOS[name] for name in scenarios},
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(args.baseline.read_text())["results"], args.tolerance
+        )
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
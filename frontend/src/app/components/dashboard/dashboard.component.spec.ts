@@ -1,8 +1,8 @@
 import { TestBed } from '@angular/core/testing';
 import { DashboardComponent } from './dashboard.component';
 import { CommonModule } from '@angular/common';
-import { TodosService, TodoList, Todo } from '../../services/todos.service';
-import { of } from 'rxjs';
+import { TodosService, TodoList, Todo, TodoEvent } from '../../services/todos.service';
+import { NEVER, of, Subject } from 'rxjs';
 
 describe('DashboardComponent', () => {
   let mockService: Partial<TodosService>;
@@ -17,7 +17,8 @@ describe('DashboardComponent', () => {
 
   beforeEach(async () => {
     mockService = {
-      list: () => of(list)
+      list: () => of(list),
+      events: () => NEVER,
     } as unknown as TodosService;
 
     await TestBed.configureTestingModule({
@@ -56,6 +57,7 @@ describe('DashboardComponent', () => {
         // Simulate single page (no pagination)
         return of({ ...list, has_more: false, next_cursor: null });
       },
+      events: () => NEVER,
     } as unknown as TodosService;
 
     await TestBed.resetTestingModule();
@@ -96,6 +98,7 @@ describe('DashboardComponent', () => {
         }
         return of(page2);
       },
+      events: () => NEVER,
     } as unknown as TodosService;
 
     await TestBed.resetTestingModule();
@@ -113,4 +116,35 @@ describe('DashboardComponent', () => {
     expect(calls[0].cursor).toBeUndefined();
     expect(calls[1].cursor).toBe('2');
   });
+
+  it('updates counts from pushed events', async () => {
+    const changes = new Subject<TodoEvent>();
+    mockService = {
+      list: () => of(list),
+      events: () => changes,
+    } as unknown as TodosService;
+
+    await TestBed.resetTestingModule();
+    await TestBed.configureTestingModule({
+      imports: [CommonModule, DashboardComponent],
+      providers: [{ provide: TodosService, useValue: mockService }],
+    }).compileComponents();
+
+    const fixture = TestBed.createComponent(DashboardComponent);
+    const comp = fixture.componentInstance;
+    await comp.ngOnInit();
+
+    changes.next({ type: 'created', id: 5, todo: { id: 5, title: 'e', completed: true } });
+    expect(comp.total).toBe(5);
+    expect(comp.completed).toBe(2);
+
+    changes.next({ type: 'deleted', id: 1 });
+    expect(comp.deleted).toBe(2);
+
+    changes.next({ type: 'restored', id: 4, todo: { id: 4, title: 'd', completed: false } });
+    expect(comp.deleted).toBe(1);
+
+    comp.ngOnDestroy();
+    expect(changes.observed).toBe(false);
+  });
 });
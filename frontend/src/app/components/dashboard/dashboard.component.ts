@@ -1,7 +1,7 @@
-import { Component, ChangeDetectorRef } from '@angular/core';
+import { Component, ChangeDetectorRef, OnDestroy } from '@angular/core';
 import { CommonModule } from '@angular/common';
-import { TodosService, Todo, TodoList } from '../../services/todos.service';
-import { firstValueFrom } from 'rxjs';
+import { TodosService, Todo, TodoEvent, TodoList } from '../../services/todos.service';
+import { firstValueFrom, Subscription } from 'rxjs';
 
 @Component({
   selector: 'app-dashboard',
@@ -10,7 +10,7 @@ import { firstValueFrom } from 'rxjs';
   templateUrl: './dashboard.component.html',
   styleUrls: ['./dashboard.component.css']
 })
-export class DashboardComponent {
+export class DashboardComponent implements OnDestroy {
   loading = true;
   errorMessage: string | null = null;
   lastStatus: string | null = null;
@@ -18,11 +18,23 @@ export class DashboardComponent {
   completed = 0;
   deleted = 0;
   overdue = 0;
+  private items = new Map<number, Todo>();
+  private changes?: Subscription;
 
   constructor(private todos: TodosService, private cdr: ChangeDetectorRef) {}
 
   async ngOnInit() {
     console.log('[Dashboard] ngOnInit called');
+    await this.load();
+    // Keep the counts current from the change stream instead of re-listing on a timer
+    this.changes = this.todos.events().subscribe((event) => this.apply(event));
+  }
+
+  ngOnDestroy() {
+    this.changes?.unsubscribe();
+  }
+
+  private async load() {
     try {
       let items: Todo[] = [];
       let cursor: string | undefined = undefined;
@@ -47,11 +59,8 @@ export class DashboardComponent {
           break;
         }
       }
-      this.total = items.length;
-      this.completed = items.filter(t => t.completed).length;
-      this.deleted = items.filter(t => !!t.deleted_at).length;
-      const now = new Date();
-      this.overdue = items.filter(t => !!t.due_at && new Date(t.due_at) < now && !t.completed && !t.deleted_at).length;
+      this.items = new Map(items.map(t => [t.id, t]));
+      this.recount();
       console.log('[Dashboard] Aggregation complete', {
         total: this.total,
         completed: this.completed,
@@ -68,4 +77,33 @@ export class DashboardComponent {
       try { this.cdr.detectChanges(); } catch {}
     }
   }
+
+  private apply(event: TodoEvent) {
+    if (event.type === 'reset') {
+      // Missed events could not be replayed: aggregate from scratch
+      void this.load();
+      return;
+    }
+    const id = event.id as number;
+    const existing = this.items.get(id);
+    if (event.type === 'deleted') {
+      if (existing) {
+        this.items.set(id, { ...existing, deleted_at: new Date().toISOString() });
+      }
+    } else if (event.todo) {
+      const deleted_at = event.type === 'restored' ? null : existing?.deleted_at ?? null;
+      this.items.set(id, { ...existing, ...event.todo, deleted_at });
+    }
+    this.recount();
+    try { this.cdr.detectChanges(); } catch {}
+  }
+
+  private recount() {
+    const items = [...this.items.values()];
+    this.total = items.length;
+    this.completed = items.filter(t => t.completed).length;
+    this.deleted = items.filter(t => !!t.deleted_at).length;
+    const now = new Date();
+    this.overdue = items.filter(t => !!t.due_at && new Date(t.due_at) < now && !t.completed && !t.deleted_at).length;
+  }
 }
@@ -12,9 +12,20 @@ export interface Todo {
   deleted_at?: string | null;
 }
 
+/** A change pushed by `GET /todos/events`; `deleted` and `reset` carry no todo. */
+export type TodoEventType = 'created' | 'updated' | 'deleted' | 'restored' | 'reset';
+
+export interface TodoEvent {
+  type: TodoEventType;
+  id?: number;
+  todo?: Todo;
+}
+
+const TODO_EVENT_TYPES: TodoEventType[] = ['created', 'updated', 'deleted', 'restored', 'reset'];
+
 export interface TodoList {
   items: Todo[];
-  total: number;
+  total: number | null;
   limit?: number | null;
   offset?: number | null;
   next_cursor?: string | null;
@@ -35,6 +46,8 @@ export class TodosService {
     sort_due?: boolean;
     include_deleted?: boolean;
     cursor?: string;
+    sort?: 'id' | 'due_at' | 'created_at';
+    order?: 'asc' | 'desc';
   } = {}): Observable<TodoList> {
     let httpParams = new HttpParams();
     Object.entries(params).forEach(([k, v]) => {
@@ -64,4 +77,23 @@ export class TodosService {
   restore(id: number): Observable<Todo> {
     return this.http.post<Todo>(`${this.base}/todos/${id}/restore`, {});
   }
+
+  /**
+   * Live todo changes over Server-Sent Events. EventSource reconnects on its own and
+   * resumes with Last-Event-ID; a `reset` event means changes were missed, so re-list.
+   */
+  events(): Observable<TodoEvent> {
+    return new Observable<TodoEvent>((subscriber) => {
+      const source = new EventSource(`${this.base}/todos/events`);
+      TODO_EVENT_TYPES.forEach((type) =>
+        source.addEventListener(type, (e: MessageEvent) => {
+          const data = JSON.parse(e.data);
+          subscriber.next(
+            type === 'deleted' || type === 'reset' ? { type, id: data.id } : { type, id: data.id, todo: data }
+          );
+        })
+      );
+      return () => source.close();
+    });
+  }
 }
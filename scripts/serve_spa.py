@@ -1,26 +1,281 @@
 #!/usr/bin/env python3
 import argparse
+import email.utils
+import functools
+import gzip
+import hashlib
 import http.client
+import mimetypes
 import os
+import re
+import select
 import sys
+import threading
 import urllib.parse
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from collections.abc import Iterator
+from dataclasses import dataclass
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 
-parser = argparse.ArgumentParser()
-parser.add_argument("--dir", default="frontend/dist/todo-frontend/browser")
-parser.add_argument("--port", type=int, default=4200)
-args = parser.parse_args()
+try:
+    import brotli
+except ImportError:  # optional: without it assets are precompressed with gzip only
+    brotli = None
+
+# Per-connection headers (RFC 9110 section 7.6.1); never forwarded in either direction
+HOP_BY_HOP_HEADERS = frozenset(
+    {
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+    }
+)
+# 100-continue is answered by this server; the backend always gets the body right away
+SKIPPED_REQUEST_HEADERS = HOP_BY_HOP_HEADERS | {"host", "expect"}
+SKIPPED_RESPONSE_HEADERS = HOP_BY_HOP_HEADERS
+# Request bodies up to this size are read before forwarding, so the request can be
+# retried when a pooled connection turns out to be closed; larger ones are streamed
+BUFFERED_BODY_LIMIT = 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+# Raised when the backend closed a keep-alive connection between requests
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+# Angular output hashing: main-5F3A9C1B.js, chunk-ABC12345.js, media/logo-1A2B3C4D.svg
+FINGERPRINTED_RE = re.compile(r"[.-](?=[A-Za-z]*[0-9])[0-9A-Za-z]{8,}\.[0-9A-Za-z]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Unhashed files (index.html, favicon.ico, ...) are revalidated with their ETag
+REVALIDATE_CACHE_CONTROL = "no-cache"
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/xml",
+    "image/svg+xml",
+)
+# Smaller files are not worth a Content-Encoding; larger ones are served from disk
+MIN_COMPRESS_BYTES = 1024
+MAX_CACHED_FILE_BYTES = 8 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    content_type: str
+    cache_control: str
+    last_modified: str
+    # Content-Encoding ("identity", "br", "gzip") -> (body, strong ETag)
+    representations: dict[str, tuple[bytes, str]]
+
+    @classmethod
+    def load(cls, path: str, url_path: str) -> "StaticAsset":
+        with open(path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        fingerprinted = FINGERPRINTED_RE.search(url_path) is not None
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        representations = {"identity": (body, f'"{digest}"')}
+        if len(body) >= MIN_COMPRESS_BYTES and content_type.startswith(COMPRESSIBLE_TYPES):
+            encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                encoded["br"] = brotli.compress(body, quality=11)
+            for encoding, data in encoded.items():
+                if len(data) < len(body):
+                    # Each encoding is a distinct representation with its own strong ETag
+                    representations[encoding] = (data, f'"{digest}-{encoding}"')
+        return cls(
+            content_type=content_type,
+            cache_control=IMMUTABLE_CACHE_CONTROL if fingerprinted else REVALIDATE_CACHE_CONTROL,
+            last_modified=email.utils.formatdate(os.path.getmtime(path), usegmt=True),
+            representations=representations,
+        )
+
+    @property
+    def negotiated(self) -> bool:
+        return len(self.representations) > 1
+
+    def choose(self, accept_encoding: str | None) -> str:
+        """Pick the smallest representation the client accepts (q > 0)."""
+        accepted = parse_accept_encoding(accept_encoding)
+        choices = [
+            encoding
+            for encoding in self.representations
+            if encoding != "identity" and accepted.get(encoding, accepted.get("*", 0.0)) > 0
+        ]
+        if not choices:
+            return "identity"
+        return min(choices, key=lambda encoding: len(self.representations[encoding][0]))
+
+
+def parse_accept_encoding(header: str | None) -> dict[str, float]:
+    accepted: dict[str, float] = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                continue
+        accepted[coding] = quality
+    return accepted
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison, as If-None-Match requires (RFC 9110 section 13.1.2)
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class StaticCache:
+    """Every file of the SPA build, read and precompressed once at startup.
 
-os.chdir(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", args.dir)))
+    Files are looked up by URL path. Restart the server after rebuilding the
+    frontend; files added since startup fall through to the index.html route.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.assets: dict[str, StaticAsset] = {}
+        for directory, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(directory, name)
+                if os.path.getsize(path) > MAX_CACHED_FILE_BYTES:
+                    continue
+                url_path = "/" + os.path.relpath(path, root).replace(os.sep, "/")
+                self.assets[url_path] = StaticAsset.load(path, url_path)
+        self.index = self.assets.get("/index.html")
+
+    def get(self, url_path: str) -> StaticAsset | None:
+        if url_path.endswith("/"):
+            url_path += "index.html"
+        return self.assets.get(url_path)
+
+    def summary(self) -> str:
+        identity = sum(len(a.representations["identity"][0]) for a in self.assets.values())
+        smallest = sum(
+            min(len(body) for body, _ in a.representations.values()) for a in self.assets.values()
+        )
+        encodings = "br+gzip" if brotli is not None else "gzip"
+        return (
+            f"{len(self.assets)} files, {identity // 1024} KiB ({smallest // 1024} KiB {encodings})"
+        )
+
+
+class BackendPool:
+    """Bounded pool of persistent (keep-alive) connections to the API backend.
+
+    At most ``size`` requests are proxied at once; others wait up to ``timeout``
+    seconds for a free connection. ``size=0`` opens a new connection per request.
+    Event streams bypass the pool (see ``SPAHandler.proxy_request``).
+    """
+
+    def __init__(self, host: str, port: int, size: int, timeout: float) -> None:
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size) if size > 0 else None
+
+    def connect(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        """Return a connection and whether it was reused from the pool."""
+        if self._slots is not None and not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("all backend connections are busy")
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self.connect(), False
+            if not _is_dropped(conn):
+                return conn, True
+            conn.close()
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable and self._slots is not None:
+            with self._lock:
+                self._idle.append(conn)
+        else:
+            conn.close()
+        if self._slots is not None:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+def _is_dropped(conn: http.client.HTTPConnection) -> bool:
+    # An idle connection only becomes readable when the peer has closed it
+    if conn.sock is None:
+        return True
+    readable, _, _ = select.select([conn.sock], [], [], 0)
+    return bool(readable)
+
+
+class SPAHTTPServer(ThreadingHTTPServer):
+    """``ThreadingHTTPServer`` carrying the backend pool and the static cache.
+
+    Every connection gets its own thread, so idle keep-alive connections and open
+    event streams never delay other clients; only backend connections are bounded,
+    by the ``BackendPool``.
+    """
+
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        handler: type,
+        backend: BackendPool,
+        static: StaticCache | None,
+    ) -> None:
+        super().__init__(address, handler)
+        self.backend = backend
+        self.static = static
+
+    def server_close(self):
+        super().server_close()
+        self.backend.close()
 
 
 class SPAHandler(SimpleHTTPRequestHandler):
+    # HTTP/1.1 so browsers keep connections open between asset requests
+    protocol_version = "HTTP/1.1"
+    # Seconds an idle keep-alive connection (and its thread) is kept open
+    timeout = 5
+    # Headers and body go out in separate writes; without TCP_NODELAY a kept-alive
+    # connection stalls on delayed ACKs
+    disable_nagle_algorithm = True
+
     def do_GET(self):
         # Proxy API requests to backend
         if self.path.startswith("/api"):
             self.proxy_request()
             return
 
+        if self.serve_cached(send_body=True):
+            return
         path = self.translate_path(self.path)
         if os.path.exists(path) and not os.path.isdir(path):
             return super().do_GET()
@@ -28,6 +283,53 @@ class SPAHandler(SimpleHTTPRequestHandler):
         self.path = "/index.html"
         return super().do_GET()
 
+    def do_HEAD(self):
+        if self.path.startswith("/api"):
+            self.proxy_request()
+            return
+        if self.serve_cached(send_body=False):
+            return
+        path = self.translate_path(self.path)
+        if not os.path.exists(path) or os.path.isdir(path):
+            self.path = "/index.html"
+        return super().do_HEAD()
+
+    def serve_cached(self, send_body: bool) -> bool:
+        """Answer from the static cache; ``False`` leaves the request to the disk path."""
+        static: StaticCache | None = self.server.static
+        if static is None:
+            return False
+        url_path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        asset = static.get(url_path)
+        if asset is None:
+            path = self.translate_path(self.path)
+            if os.path.isfile(path):
+                return False  # too large to cache, or added after startup
+            # fallback to index.html for client-side routing
+            asset = static.index
+            if asset is None:
+                return False
+        encoding = asset.choose(self.headers.get("Accept-Encoding"))
+        body, etag = asset.representations[encoding]
+        not_modified = etag_matches(self.headers.get("If-None-Match"), etag)
+        if not_modified:
+            self.send_response(304)
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", asset.content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Last-Modified", asset.last_modified)
+            if encoding != "identity":
+                self.send_header("Content-Encoding", encoding)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", asset.cache_control)
+        if asset.negotiated:
+            self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        if send_body and not not_modified:
+            self.wfile.write(body)
+        return True
+
     def do_POST(self):
         if self.path.startswith("/api"):
             self.proxy_request()
@@ -53,50 +355,180 @@ class SPAHandler(SimpleHTTPRequestHandler):
         return super().do_PATCH()
 
     def proxy_request(self):
-        backend_host = os.environ.get("TODO_BACKEND_HOST", "127.0.0.1")
-        backend_port = int(os.environ.get("TODO_BACKEND_PORT", "8000"))
+        pool: BackendPool = self.server.backend
         parsed = urllib.parse.urlparse(self.path)
-        conn = http.client.HTTPConnection(backend_host, backend_port, timeout=10)
+        # rewrite /api prefix to backend root (match `proxy.conf.json` behavior)
+        backend_path = parsed.path
+        if backend_path.startswith("/api"):
+            backend_path = backend_path[len("/api") :]
+            if not backend_path:
+                backend_path = "/"
+        target = backend_path + (("?" + parsed.query) if parsed.query else "")
+        # forward headers
+        headers = {
+            k: v
+            for k, v in self.headers.items()
+            if k.lower() not in SKIPPED_REQUEST_HEADERS and k.lower() != "x-forwarded-for"
+        }
+        # The backend sees every request from this proxy; pass on the real client
+        # address (uvicorn trusts X-Forwarded-For from 127.0.0.1) for per-IP rate limits
+        forwarded = self.headers.get("X-Forwarded-For")
+        client = self.client_address[0]
+        headers["X-Forwarded-For"] = f"{forwarded}, {client}" if forwarded else client
+        # Event streams stay open for as long as the client listens, so they get a
+        # connection of their own instead of holding one of the pool's
+        event_stream = "text/event-stream" in self.headers.get("Accept", "")
+        headers_sent = False
+        reusable = False
+        conn = None
         try:
-            length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(length) if length else None
-            # forward headers
-            headers = {k: v for k, v in self.headers.items() if k.lower() != "host"}
-            # rewrite /api prefix to backend root (match `proxy.conf.json` behavior)
-            backend_path = parsed.path
-            if backend_path.startswith("/api"):
-                backend_path = backend_path[len("/api") :]
-                if not backend_path:
-                    backend_path = "/"
-            conn.request(
-                self.command,
-                backend_path + (("?" + parsed.query) if parsed.query else ""),
-                body,
-                headers,
-            )
-            resp = conn.getresponse()
-            self.send_response(resp.status)
-            for h, v in resp.getheaders():
-                # skip transfer-encoding to avoid chunked issues
-                if h.lower() in ("transfer-encoding", "content-encoding"):
-                    continue
-                self.send_header(h, v)
-            self.end_headers()
-            data = resp.read()
-            if data:
-                self.wfile.write(data)
+            body = self.request_body()
+            conn, reused = (pool.connect(), False) if event_stream else pool.acquire()
+            try:
+                conn.request(self.command, target, body, headers)
+                resp = conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                # The backend closed an idle connection; retry once on a fresh one
+                # unless the body was streamed and cannot be sent again
+                if not reused or not (body is None or isinstance(body, bytes)):
+                    raise
+                conn.close()
+                conn = pool.connect()
+                conn.request(self.command, target, body, headers)
+                resp = conn.getresponse()
+            headers_sent = True
+            reusable = self.relay_response(resp)
         except Exception as e:
-            self.send_response(502)
-            self.end_headers()
-            self.wfile.write(str(e).encode("utf-8"))
+            # Whatever is left of the client's request or our response is unusable
+            self.close_connection = True
             sys.stderr.write(f"Proxy error: {e}\n")
+            if not headers_sent:
+                status = 502
+                if isinstance(e, TimeoutError):
+                    # No free pool connection, or the backend itself timed out
+                    status = 503 if conn is None else 504
+                message = str(e).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+                self.send_header("Content-Length", str(len(message)))
+                self.end_headers()
+                self.wfile.write(message)
         finally:
-            conn.close()
+            if event_stream and conn is not None:
+                conn.close()
+            elif conn is not None:
+                pool.release(conn, reusable)
 
+    def request_body(self) -> bytes | Iterator[bytes] | None:
+        """Small bodies as bytes; large or chunked uploads as an iterator of chunks."""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            # http.client re-encodes an iterator without Content-Length as chunked
+            return self._read_chunked()
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        if length <= BUFFERED_BODY_LIMIT:
+            return self.rfile.read(length)
+        return self._read_length(length)
 
-server = HTTPServer(("127.0.0.1", args.port), SPAHandler)
-print(f"Serving SPA on http://127.0.0.1:{args.port}/ from {os.getcwd()}")
-try:
-    server.serve_forever()
-except KeyboardInterrupt:
-    server.server_close()
+    def _read_length(self, length: int) -> Iterator[bytes]:
+        while length > 0:
+            chunk = self.rfile.read(min(length, STREAM_CHUNK_SIZE))
+            if not chunk:
+                raise ConnectionError("client closed the connection mid-body")
+            length -= len(chunk)
+            yield chunk
+
+    def _read_chunked(self) -> Iterator[bytes]:
+        while True:
+            size = int(self.rfile.readline().split(b";", 1)[0], 16)
+            if size == 0:
+                # Skip trailers up to the blank line that ends the body
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            yield from self._read_length(size)
+            self.rfile.readline()
+
+    def relay_response(self, resp: http.client.HTTPResponse) -> bool:
+        """Stream ``resp`` to the client; return whether its connection can be reused."""
+        # Not send_response(): the backend's own Server and Date headers are forwarded
+        self.send_response_only(resp.status, resp.reason)
+        self.log_request(resp.status)
+        no_body = self.command == "HEAD" or resp.status in (204, 304) or resp.status < 200
+        length = resp.getheader("Content-Length")
+        chunked = not no_body and length is None and self.request_version == "HTTP/1.1"
+        for h, v in resp.getheaders():
+            if h.lower() in SKIPPED_RESPONSE_HEADERS:
+                continue
+            self.send_header(h, v)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        elif length is None and not no_body:
+            # HTTP/1.0 client and no length: the body ends when the connection closes
+            self.close_connection = True
+        self.end_headers()
+        if not no_body:
+            # read1 returns whatever has arrived, so event streams are relayed as they come
+            while chunk := resp.read1(STREAM_CHUNK_SIZE):
+                if chunked:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                else:
+                    self.wfile.write(chunk)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        # The body is fully read; closing the response lets the connection send again
+        resp.close()
+        return not resp.will_close
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", default="frontend/dist/todo-frontend/browser")
+    parser.add_argument("--port", type=int, default=4200)
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=16,
+        help="Backend requests proxied at once over keep-alive connections (0 = unbounded, "
+        "one connection per request)",
+    )
+    parser.add_argument(
+        "--no-static-cache",
+        action="store_true",
+        help="Read files from disk on every request (e.g. while rebuilding the frontend)",
+    )
+    parser.add_argument(
+        "--backend-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds to wait for the backend (longer than the SSE heartbeat)",
+    )
+    args = parser.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", args.dir))
+    backend = BackendPool(
+        os.environ.get("TODO_BACKEND_HOST", "127.0.0.1"),
+        int(os.environ.get("TODO_BACKEND_PORT", "8000")),
+        args.pool_size,
+        args.backend_timeout,
+    )
+    static = None if args.no_static_cache else StaticCache(root)
+    handler = functools.partial(SPAHandler, directory=root)
+    server = SPAHTTPServer(("127.0.0.1", args.port), handler, backend, static)
+    print(
+        f"Serving SPA on http://127.0.0.1:{args.port}/ from {root} "
+        f"({backend.size} backend connections, "
+        f"static cache: {static.summary() if static is not None else 'off'})",
+        flush=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
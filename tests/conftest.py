@@ -1,5 +1,9 @@
 import pytest
 
+from app.auth import api_keys
+from app.db import init_db
+from app.ratelimit import rate_limiter
+
 
 @pytest.fixture(autouse=True)
 def clear_todo_api_key_env(monkeypatch: pytest.MonkeyPatch):
@@ -8,3 +12,14 @@ def clear_todo_api_key_env(monkeypatch: pytest.MonkeyPatch):
     Auth-specific tests can enable it explicitly via monkeypatch.setenv.
     """
     monkeypatch.delenv("TODO_API_KEY", raising=False)
+    monkeypatch.delenv("TODO_API_KEYS_FILE", raising=False)
+    # Keys load once per process; drop them so the test's environment is read afresh
+    api_keys.unload()
+    # Every test client shares one address; start each test with full buckets
+    rate_limiter.reset()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrate_schema() -> None:
+    """Apply migrations once, as the app lifespan does (ASGITransport skips lifespan)."""
+    init_db()
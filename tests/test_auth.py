@@ -1,7 +1,16 @@
+import asyncio
+import hashlib
+import os
+import signal
+from typing import Any
+
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from app import auth, main
+from app.auth import ApiKeyStore, api_keys, hash_key, parse_key_file, watch_key_file
 from app.main import app
+from app.routers.metrics import get_registry
 
 
 @pytest.mark.asyncio
@@ -48,3 +57,131 @@ async def test_read_endpoints_remain_open(monkeypatch: pytest.MonkeyPatch):
         assert r.status_code == 200
         r = await ac.get("/")
         assert r.status_code == 200
+
+
+def _write_keys(path, **keys: str) -> None:
+    path.write_text(
+        "# identity  sha256(key)\n"
+        + "".join(f"{identity} {hash_key(key)}\n" for identity, key in keys.items())
+    )
+
+
+@pytest.mark.asyncio
+async def test_key_file_identities_are_counted(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    key_file = tmp_path / "keys"
+    _write_keys(key_file, ci="ci-key", mobile="mobile-key")
+    monkeypatch.setenv("TODO_API_KEYS_FILE", str(key_file))
+    monkeypatch.setenv("TODO_API_KEY", "legacy")
+    registry = get_registry()
+
+    def count(name: str, **labels: str) -> float:
+        return registry.get_sample_value(name, labels) or 0.0
+
+    before = {
+        identity: count("todo_api_key_requests_total", identity=identity)
+        for identity in ("ci", "mobile", "default")
+    }
+    invalid = count("todo_api_key_rejected_total", reason="invalid")
+    missing = count("todo_api_key_rejected_total", reason="missing")
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for key in ("ci-key", "ci-key", "mobile-key", "legacy"):
+            r = await ac.post("/todos/", headers={"X-API-Key": key}, json={"title": key})
+            assert r.status_code == 201
+        r = await ac.post("/todos/", headers={"X-API-Key": hash_key("ci-key")}, json={})
+        assert r.status_code == 401
+        assert (await ac.post("/todos/", json={"title": "anon"})).status_code == 401
+    assert count("todo_api_key_requests_total", identity="ci") == before["ci"] + 2
+    assert count("todo_api_key_requests_total", identity="mobile") == before["mobile"] + 1
+    assert count("todo_api_key_requests_total", identity="default") == before["default"] + 1
+    assert count("todo_api_key_rejected_total", reason="invalid") == invalid + 1
+    assert count("todo_api_key_rejected_total", reason="missing") == missing + 1
+
+
+def test_verified_keys_skip_hashing_until_reload(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    key_file = tmp_path / "keys"
+    _write_keys(key_file, ci="ci-key")
+    monkeypatch.setenv("TODO_API_KEYS_FILE", str(key_file))
+    store = ApiKeyStore(cache_size=1)
+    hashed: list[bytes] = []
+    sha256 = hashlib.sha256
+
+    def counting_sha256(data: bytes = b"") -> Any:
+        hashed.append(data)
+        return sha256(data)
+
+    monkeypatch.setattr(auth.hashlib, "sha256", counting_sha256)
+    assert store.verify("ci-key") == "ci"
+    hashed.clear()
+    assert store.verify("ci-key") == "ci"
+    assert hashed == []
+    assert store.verify("wrong") is None
+    assert store.verify("wrong") is None
+    assert hashed == [b"wrong", b"wrong"]
+
+    # Revoking the key takes effect on reload, even though it was cached
+    _write_keys(key_file, mobile="mobile-key")
+    assert store.reload() == 1
+    assert store.verify("ci-key") is None
+    assert store.verify("mobile-key") == "mobile"
+
+
+def test_bad_key_file_keeps_previous_keys(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    key_file = tmp_path / "keys"
+    _write_keys(key_file, ci="ci-key")
+    monkeypatch.setenv("TODO_API_KEYS_FILE", str(key_file))
+    store = ApiKeyStore(cache_size=16)
+    assert store.verify("ci-key") == "ci"
+
+    key_file.write_text("ci not-a-digest\n")
+    with pytest.raises(ValueError, match="line 1: not a SHA-256 hex digest"):
+        store.reload()
+    assert store.reload_or_log() is False
+    key_file.unlink()
+    with pytest.raises(OSError):
+        store.reload()
+    assert store.verify("ci-key") == "ci"
+
+    with pytest.raises(ValueError, match="line 2: duplicate key"):
+        parse_key_file(f"a {hash_key('k')}\nb {hash_key('k')}\n")
+
+
+@pytest.mark.asyncio
+async def test_watcher_reloads_changed_key_file(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    key_file = tmp_path / "keys"
+    _write_keys(key_file, ci="ci-key")
+    monkeypatch.setenv("TODO_API_KEYS_FILE", str(key_file))
+    store = ApiKeyStore(cache_size=16)
+    assert store.verify("ci-key") == "ci"
+    task = asyncio.create_task(watch_key_file(store, interval=0.01))
+    try:
+        _write_keys(key_file, ci="rotated-key")
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if not store.file_changed():
+                break
+        assert store.verify("rotated-key") == "ci"
+        assert store.verify("ci-key") is None
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+
+@pytest.mark.asyncio
+async def test_sighup_reloads_keys(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    key_file = tmp_path / "keys"
+    _write_keys(key_file, ci="ci-key")
+    monkeypatch.setenv("TODO_API_KEYS_FILE", str(key_file))
+    monkeypatch.setattr(main, "PURGE_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(main, "API_KEYS_RELOAD_INTERVAL", 0)
+    async with app.router.lifespan_context(app):
+        assert api_keys.verify("ci-key") == "ci"
+        _write_keys(key_file, ops="ops-key")
+        os.kill(os.getpid(), signal.SIGHUP)
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if api_keys.verify("ops-key") == "ops":
+                break
+        assert api_keys.verify("ops-key") == "ops"
+        assert api_keys.verify("ci-key") is None
@@ -0,0 +1,131 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.db import reset_db
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_update_delete():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post(
+            "/todos/bulk",
+            json=[{"title": f"B{i}", "priority": "low"} for i in range(5)],
+        )
+        assert r.status_code == 200
+        body = r.json()
+        assert body["succeeded"] == 5 and body["failed"] == 0
+        ids = [item["id"] for item in body["items"]]
+        assert [item["index"] for item in body["items"]] == list(range(5))
+        assert all(item["status"] == 201 for item in body["items"])
+
+        r = await ac.get(f"/todos/{ids[0]}")
+        assert r.json()["title"] == "B0"
+
+        r = await ac.patch(
+            "/todos/bulk",
+            json=[
+                {"id": ids[0], "completed": True},
+                {"id": ids[1], "title": "renamed", "priority": "high"},
+                {"id": 999999, "completed": True},
+            ],
+        )
+        assert r.status_code == 200
+        body = r.json()
+        assert body["succeeded"] == 2 and body["failed"] == 1
+        assert [item["status"] for item in body["items"]] == [200, 200, 404]
+
+        r = await ac.get(f"/todos/{ids[0]}")
+        assert r.json()["completed"] is True and r.json()["title"] == "B0"
+        r = await ac.get(f"/todos/{ids[1]}")
+        assert r.json()["title"] == "renamed" and r.json()["priority"] == "high"
+
+        r = await ac.request("DELETE", "/todos/bulk", json=[ids[2], ids[3], 424242])
+        assert r.status_code == 200
+        assert [item["status"] for item in r.json()["items"]] == [204, 204, 404]
+
+        r = await ac.get("/todos/")
+        assert r.json()["total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_rejects_naive_due_at_per_item():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post(
+            "/todos/bulk",
+            json=[
+                {"title": "ok", "due_at": "2030-01-01T00:00:00Z"},
+                {"title": "naive", "due_at": "2030-01-01T00:00:00"},
+                {"title": "no due date"},
+            ],
+        )
+        assert r.status_code == 200
+        body = r.json()
+        assert body["succeeded"] == 2 and body["failed"] == 1
+        assert [item["status"] for item in body["items"]] == [201, 400, 201]
+        assert body["items"][1] == {
+            "index": 1,
+            "id": None,
+            "status": 400,
+            "detail": "due_at: must include a timezone offset",
+        }
+        ids = [body["items"][0]["id"], body["items"][2]["id"]]
+        r = await ac.get("/todos/")
+        assert [t["title"] for t in r.json()["items"]] == ["ok", "no due date"]
+
+        r = await ac.patch(
+            "/todos/bulk",
+            json=[
+                {"id": ids[0], "due_at": "2031-01-01T00:00:00"},
+                {"id": ids[1], "due_at": "2031-01-01T00:00:00+02:00", "completed": True},
+            ],
+        )
+        assert r.status_code == 200
+        assert [item["status"] for item in r.json()["items"]] == [400, 200]
+        r = await ac.get(f"/todos/{ids[0]}")
+        assert r.json()["due_at"].startswith("2030-01-01")
+        r = await ac.get(f"/todos/{ids[1]}")
+        assert r.json()["completed"] is True
+
+
+@pytest.mark.asyncio
+async def test_bulk_batch_limits(monkeypatch: pytest.MonkeyPatch):
+    from app.routers import todos
+
+    monkeypatch.setattr(todos, "BULK_MAX_ITEMS", 2)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/todos/bulk", json=[])
+        assert r.status_code == 400
+        assert r.json()["detail"] == "bulk batch must not be empty"
+        r = await ac.post("/todos/bulk", json=[{"title": "x"}] * 3)
+        assert r.status_code == 400
+        assert r.json()["detail"] == "bulk batch must contain <= 2 items"
+
+
+@pytest.mark.asyncio
+async def test_bulk_requires_api_key(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("TODO_API_KEY", "secret")
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/todos/bulk", json=[{"title": "x"}])
+        assert r.status_code == 401
+        r = await ac.post("/todos/bulk", json=[{"title": "x"}], headers={"X-API-Key": "secret"})
+        assert r.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_bulk_metrics_recorded():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/bulk", json=[{"title": "m1"}, {"title": "m2"}])
+        r = await ac.get("/metrics")
+    assert 'todo_bulk_batch_size_count{operation="create"}' in r.text
+    assert 'todo_bulk_duration_seconds_count{operation="create"}' in r.text
@@ -0,0 +1,113 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app.db import engine, reset_db
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+async def _changes(ac: AsyncClient, since: int, limit: int = 100) -> dict:
+    r = await ac.get("/todos/changes", params={"since": since, "limit": limit})
+    assert r.status_code == 200
+    return r.json()
+
+
+@pytest.mark.asyncio
+async def test_changes_return_latest_rows_and_tombstones_in_version_order():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        a = (await ac.post("/todos/", json={"title": "a"})).json()["id"]
+        b = (await ac.post("/todos/", json={"title": "b"})).json()["id"]
+        initial = await _changes(ac, 0)
+        assert [item["id"] for item in initial["items"]] == [a, b]
+        assert initial["has_more"] is False
+        since = initial["next_since"]
+        assert since == initial["items"][-1]["version"]
+        assert all(item["updated_at"] for item in initial["items"])
+
+        assert (await _changes(ac, since))["items"] == []
+        await ac.put(f"/todos/{a}", json={"completed": True})
+        await ac.delete(f"/todos/{b}")
+        delta = await _changes(ac, since)
+        assert [(item["id"], item["completed"]) for item in delta["items"]] == [
+            (a, True),
+            (b, False),
+        ]
+        assert delta["items"][0]["deleted_at"] is None
+        assert delta["items"][1]["deleted_at"] is not None
+        versions = [item["version"] for item in delta["items"]]
+        assert since < versions[0] < versions[1] == delta["next_since"]
+
+        # Each row appears once, at its latest version
+        full = await _changes(ac, 0)
+        assert [item["id"] for item in full["items"]] == [a, b]
+
+        await ac.post(f"/todos/{b}/restore")
+        restored = await _changes(ac, delta["next_since"])
+        assert [(item["id"], item["deleted_at"]) for item in restored["items"]] == [(b, None)]
+
+
+@pytest.mark.asyncio
+async def test_changes_paging_and_bulk_writes():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        created = await ac.post("/todos/bulk", json=[{"title": f"t{i}"} for i in range(5)])
+        ids = [item["id"] for item in created.json()["items"]]
+        seen: list[int] = []
+        since = 0
+        while True:
+            page = await _changes(ac, since, limit=2)
+            seen.extend(item["id"] for item in page["items"])
+            since = page["next_since"]
+            if not page["has_more"]:
+                break
+        assert seen == ids
+
+        await ac.patch("/todos/bulk", json=[{"id": ids[3], "title": "renamed"}])
+        await ac.request("DELETE", "/todos/bulk", json=[ids[0]])
+        delta = await _changes(ac, since)
+        assert [item["id"] for item in delta["items"]] == [ids[3], ids[0]]
+        assert delta["items"][0]["title"] == "renamed"
+        assert delta["items"][1]["deleted_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_versions_are_not_reused_after_hard_delete():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = (await ac.post("/todos/", json={"title": "gone"})).json()["id"]
+        last_version = (await _changes(ac, 0))["next_since"]
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM todo WHERE id = :id"), {"id": first})
+        await ac.post("/todos/", json={"title": "new"})
+        delta = await _changes(ac, last_version)
+        assert [item["title"] for item in delta["items"]] == ["new"]
+        assert delta["next_since"] > last_version
+
+
+@pytest.mark.asyncio
+async def test_changes_validation_and_etag():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/todos/changes", params={"since": -1})
+        assert r.status_code == 400
+        assert r.json()["detail"] == "since must be >= 0"
+        r = await ac.get("/todos/changes", params={"limit": 0})
+        assert r.status_code == 400
+
+        r1 = await ac.get("/todos/changes", params={"since": 0})
+        r2 = await ac.get(
+            "/todos/changes", params={"since": 0}, headers={"If-None-Match": r1.headers["etag"]}
+        )
+        assert r2.status_code == 304
+        await ac.post("/todos/", json={"title": "x"})
+        r3 = await ac.get(
+            "/todos/changes", params={"since": 0}, headers={"If-None-Match": r1.headers["etag"]}
+        )
+        assert r3.status_code == 200
+        assert len(r3.json()["items"]) == 1
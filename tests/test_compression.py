@@ -0,0 +1,188 @@
+import asyncio
+import gzip
+import json
+import zlib
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+
+from app import compression
+from app.compression import CompressionMiddleware, choose_encoding
+from app.db import reset_db
+from app.main import app
+from app.routers.metrics import get_registry
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+async def _call(asgi, headers: list[tuple[bytes, bytes]], path: str = "/") -> list[dict]:
+    messages: list[dict] = []
+    never = asyncio.Event()
+
+    async def receive() -> dict:
+        await never.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    await asgi(scope, receive, send)
+    return messages
+
+
+def _headers(start: dict) -> dict[str, str]:
+    return {name.decode(): value.decode() for name, value in start["headers"]}
+
+
+def test_choose_encoding_honours_quality_and_server_order():
+    encodings = ("br", "gzip")
+    assert choose_encoding("gzip, br", encodings) == "br"
+    assert choose_encoding("gzip;q=1, br;q=0.5", encodings) == "gzip"
+    assert choose_encoding("br;q=0, *", encodings) == "gzip"
+    assert choose_encoding("identity", encodings) is None
+    assert choose_encoding(None, encodings) is None
+    assert choose_encoding("*;q=0", encodings) is None
+
+
+@pytest.mark.asyncio
+async def test_large_list_page_is_gzipped_and_counted():
+    registry = get_registry()
+    labels = {"encoding": "gzip"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/bulk", json=[{"title": f"todo number {i}"} for i in range(200)])
+        raw_before = (
+            registry.get_sample_value("http_response_uncompressed_bytes_total", labels) or 0
+        )
+        sent_before = registry.get_sample_value("http_response_compressed_bytes_total", labels) or 0
+        r = await ac.get("/todos/", params={"limit": 200}, headers={"Accept-Encoding": "gzip"})
+        plain = await ac.get(
+            "/todos/", params={"limit": 200}, headers={"Accept-Encoding": "identity"}
+        )
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert int(r.headers["content-length"]) == r.num_bytes_downloaded
+    assert r.json() == plain.json()
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+    assert r.num_bytes_downloaded * 4 < len(plain.content)
+    raw = registry.get_sample_value("http_response_uncompressed_bytes_total", labels)
+    sent = registry.get_sample_value("http_response_compressed_bytes_total", labels)
+    assert raw == raw_before + len(plain.content)
+    assert sent == sent_before + r.num_bytes_downloaded
+
+
+@pytest.mark.asyncio
+async def test_not_modified_repeats_vary():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/bulk", json=[{"title": f"todo number {i}"} for i in range(50)])
+        headers = {"Accept-Encoding": "gzip"}
+        r = await ac.get("/todos/", headers=headers)
+        assert r.headers["vary"] == "Accept-Encoding"
+        r = await ac.get("/todos/", headers={**headers, "If-None-Match": r.headers["etag"]})
+    assert r.status_code == 304
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in r.headers
+
+
+@pytest.mark.asyncio
+async def test_small_and_non_allowlisted_responses_are_not_compressed():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/health/live", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in r.headers
+        r = await ac.get("/metrics", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-type"].startswith("text/plain; version=")
+        assert r.headers["content-encoding"] == "gzip"
+
+    image = Response(b"\x89PNG" + bytes(4096), media_type="image/png")
+    messages = await _call(CompressionMiddleware(image), [(b"accept-encoding", b"gzip")])
+    assert "content-encoding" not in _headers(messages[0])
+    assert "vary" not in _headers(messages[0])
+
+
+@pytest.mark.asyncio
+async def test_streamed_export_is_compressed_chunk_by_chunk(monkeypatch: pytest.MonkeyPatch):
+    from app.routers import todos
+
+    monkeypatch.setattr(todos, "EXPORT_BATCH_SIZE", 50)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/bulk", json=[{"title": f"export {i}"} for i in range(200)])
+        plain = await ac.get("/todos/export", headers={"Accept-Encoding": "identity"})
+
+    messages = await _call(
+        app, [(b"host", b"test"), (b"accept-encoding", b"gzip")], path="/todos/export"
+    )
+    start_headers = _headers(messages[0])
+    assert start_headers["content-encoding"] == "gzip"
+    assert "content-length" not in start_headers
+    bodies = [m["body"] for m in messages[1:] if m["body"]]
+    # One flushed chunk per batch of 50 rows, decodable on arrival, then the gzip trailer
+    assert len(bodies) == 5
+    decoder = zlib.decompressobj(31)
+    assert json.loads(decoder.decompress(bodies[0]).splitlines()[0])["title"] == "export 0"
+    assert gzip.decompress(b"".join(bodies)) == plain.content
+
+
+@pytest.mark.asyncio
+async def test_event_streams_and_encoded_responses_pass_through():
+    async def events():
+        yield b"data: " + b"x" * 4096 + b"\n\n"
+
+    stream = StreamingResponse(events(), media_type="text/event-stream")
+    middleware = CompressionMiddleware(stream, content_types="text/event-stream,text/plain")
+    messages = await _call(middleware, [(b"accept-encoding", b"gzip")])
+    assert "content-encoding" not in _headers(messages[0])
+    assert messages[1]["body"].startswith(b"data: xxx")
+
+    encoded = PlainTextResponse(
+        gzip.compress(b"y" * 4096), headers={"Content-Encoding": "gzip", "ETag": '"abc"'}
+    )
+    messages = await _call(CompressionMiddleware(encoded), [(b"accept-encoding", b"gzip")])
+    assert _headers(messages[0])["etag"] == '"abc"'
+    assert gzip.decompress(messages[1]["body"]) == b"y" * 4096
+
+
+@pytest.mark.asyncio
+async def test_compression_weakens_strong_etags_and_can_be_disabled():
+    response = PlainTextResponse("z" * 4096, headers={"ETag": '"v1"'})
+    messages = await _call(CompressionMiddleware(response), [(b"accept-encoding", b"gzip")])
+    assert _headers(messages[0])["etag"] == 'W/"v1"'
+    messages = await _call(
+        CompressionMiddleware(response, encodings=""), [(b"accept-encoding", b"gzip")]
+    )
+    assert "content-encoding" not in _headers(messages[0])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", ["br", "zstd"])
+async def test_optional_encodings(encoding: str):
+    module = compression.brotli if encoding == "br" else compression.zstd
+    if module is None:
+        pytest.skip(f"{encoding} support is not installed")
+    response = PlainTextResponse("w" * 8192)
+    messages = await _call(
+        CompressionMiddleware(response), [(b"accept-encoding", f"{encoding}, gzip".encode())]
+    )
+    assert _headers(messages[0])["content-encoding"] == encoding
+    assert len(messages[1]["body"]) < 8192
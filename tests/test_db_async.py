@@ -0,0 +1,72 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import db
+from app.db import reset_db
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+async def async_mode(monkeypatch: pytest.MonkeyPatch):
+    reset_db()
+    monkeypatch.setattr(db, "DB_MODE", "async")
+    yield
+    # Pooled aiosqlite connections are bound to this test's event loop
+    await db.dispose_async_engine()
+
+
+@pytest.mark.asyncio
+async def test_async_engine_applies_profile_pragmas():
+    async with db.get_async_engine().connect() as conn:
+        mode = await conn.exec_driver_sql("PRAGMA journal_mode")
+        assert str(mode.scalar()).lower() == "wal"
+        timeout = await conn.exec_driver_sql("PRAGMA busy_timeout")
+        assert timeout.scalar() == db.engine_profile.busy_timeout_ms
+
+
+@pytest.mark.asyncio
+async def test_crud_and_list_in_async_mode():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/todos/", json={"title": "async", "priority": "high"})
+        assert r.status_code == 201
+        tid = r.json()["id"]
+
+        r = await ac.put(f"/todos/{tid}", json={"completed": True})
+        assert r.status_code == 200
+        assert r.json()["completed"] is True
+
+        r = await ac.post("/todos/bulk", json=[{"title": "a1"}, {"title": "a2"}])
+        assert r.json()["succeeded"] == 2
+
+        r = await ac.get("/todos/?completed=false")
+        assert r.json()["total"] == 2
+
+        r = await ac.delete(f"/todos/{tid}")
+        assert r.status_code == 204
+        r = await ac.get(f"/todos/{tid}")
+        assert r.status_code == 200
+        r = await ac.post(f"/todos/{tid}/restore")
+        assert r.status_code == 200
+
+        r = await ac.get("/todos/999999")
+        assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_export_streams_in_async_mode():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/bulk", json=[{"title": f"x{i}"} for i in range(3)])
+        r = await ac.get("/todos/export", params={"format": "csv"})
+    assert r.status_code == 200
+    assert r.text.splitlines()[1:] == [f"x{i},false,,,{i + 1}" for i in range(3)]
+
+
+def test_runner_without_stream_cannot_be_constructed():
+    class RunOnly(db.DbRunner):
+        async def run(self, fn, *args, **kwargs):
+            return fn(None, *args, **kwargs)
+
+    with pytest.raises(TypeError, match="stream"):
+        RunOnly()  # type: ignore[abstract]
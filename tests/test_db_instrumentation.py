@@ -0,0 +1,77 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.db import engine, reset_db, statement_labels
+from app.main import app
+from app.routers.metrics import get_registry
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+def _sample(name: str, **labels: str) -> float:
+    return get_registry().get_sample_value(name, labels) or 0.0
+
+
+def test_statement_labels():
+    assert statement_labels("SELECT count(*) AS count_1 \nFROM todo WHERE x") == ("select", "todo")
+    assert statement_labels("INSERT INTO todo (title) VALUES (?)") == ("insert", "todo")
+    assert statement_labels('UPDATE "todo" SET completed=?') == ("update", "todo")
+    assert statement_labels("PRAGMA journal_mode") == ("pragma", "none")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["sync", "async"])
+async def test_statements_are_timed_counted_and_sized(mode, monkeypatch):
+    monkeypatch.setattr(db, "DB_MODE", mode)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        ids = [(await ac.post("/todos/", json={"title": f"i{i}"})).json()["id"] for i in range(3)]
+
+        page = _sample("db_query_duration_seconds_count", operation="select_page", table="todo")
+        count = _sample("db_query_duration_seconds_count", operation="select_count", table="todo")
+        rows = _sample("db_query_rows_sum", statement="select", table="todo")
+        by_id = _sample("db_query_duration_seconds_count", operation="select_by_id", table="todo")
+        r = await ac.get("/todos/", params={"limit": 10})
+        assert len(r.json()["items"]) == 3
+        # Previously untimed: the lookup inside update_todo
+        await ac.put(f"/todos/{ids[0]}", json={"completed": True})
+
+    assert _sample("db_query_duration_seconds_count", operation="select_page", table="todo") == (
+        page + 1
+    )
+    assert _sample("db_query_duration_seconds_count", operation="select_count", table="todo") == (
+        count + 1
+    )
+    # count(*) returns one row, the page three
+    assert _sample("db_query_rows_sum", statement="select", table="todo") >= rows + 4
+    assert _sample("db_query_duration_seconds_count", operation="select_by_id", table="todo") == (
+        by_id + 1
+    )
+    await db.dispose_async_engine()
+
+
+@pytest.mark.asyncio
+async def test_queries_per_request_histogram():
+    labels = {"method": "GET", "path": "/todos/"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/", json={"title": "q"})
+        before_sum = _sample("http_request_db_queries_sum", **labels)
+        before_count = _sample("http_request_db_queries_count", **labels)
+        await ac.get("/todos/", params={"limit": 7})  # count + page
+        await ac.get("/todos/", params={"limit": 7})  # served from the response cache
+    assert _sample("http_request_db_queries_count", **labels) == before_count + 2
+    assert _sample("http_request_db_queries_sum", **labels) == before_sum + 2
+
+
+def test_failed_statement_counts_db_error():
+    before = _sample("db_errors_total", operation="select", table="missing_table")
+    with pytest.raises(OperationalError), engine.connect() as conn:
+        conn.execute(text("SELECT * FROM missing_table"))
+    assert _sample("db_errors_total", operation="select", table="missing_table") == before + 1
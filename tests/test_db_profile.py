@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import text
+
+from app.db import EngineProfile, create_db_engine, engine
+
+
+def _pragma(conn, name: str):
+    return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_app_engine_applies_tuned_pragmas():
+    with engine.connect() as conn:
+        assert str(_pragma(conn, "journal_mode")).lower() == "wal"
+        assert _pragma(conn, "synchronous") == 1  # NORMAL
+        assert _pragma(conn, "temp_store") == 2  # MEMORY
+        assert _pragma(conn, "busy_timeout") == 5000
+        assert _pragma(conn, "cache_size") == -64 * 1024
+
+
+def test_profile_from_env_overrides(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    monkeypatch.setenv("TODO_DB_SYNCHRONOUS", "FULL")
+    monkeypatch.setenv("TODO_DB_BUSY_TIMEOUT_MS", "250")
+    monkeypatch.setenv("TODO_DB_POOL_SIZE", "3")
+    profile = EngineProfile.from_env()
+    assert profile.synchronous == "FULL"
+    assert profile.busy_timeout_ms == 250
+    assert profile.pool_size == 3
+    assert profile.journal_mode == "WAL"
+
+    eng = create_db_engine(f"sqlite:///{tmp_path / 'p.db'}", profile)
+    with eng.connect() as conn:
+        assert _pragma(conn, "synchronous") == 2  # FULL
+        assert _pragma(conn, "busy_timeout") == 250
+    assert eng.pool.size() == 3  # type: ignore[attr-defined]
+
+
+def test_sqlite_default_profile_sets_no_pragmas(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("TODO_DB_PROFILE", "sqlite-default")
+    profile = EngineProfile.from_env()
+    assert profile.pragmas() == []
@@ -0,0 +1,205 @@
+import asyncio
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.db import reset_db
+from app.events import EventBroadcaster, events
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+def _parse(frames: bytes) -> list[tuple[str, dict]]:
+    parsed = []
+    for block in frames.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in fields:
+            parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+async def _open_stream(headers: list[tuple[bytes, bytes]] | None = None):
+    """Drive GET /todos/events over raw ASGI (httpx's ASGITransport buffers whole bodies)."""
+    disconnect = asyncio.Event()
+    sent: list[dict] = []
+    body = bytearray()
+
+    async def receive() -> dict:
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+        body.extend(message.get("body", b""))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/todos/events",
+        "raw_path": b"/todos/events",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"test"), *(headers or [])],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    subscribers = len(events)
+    task = asyncio.create_task(app(scope, receive, send))
+    for _ in range(500):
+        if len(events) > subscribers:
+            break
+        await asyncio.sleep(0.002)
+    return task, disconnect, sent, body
+
+
+async def _wait_for(body: bytearray, marker: bytes) -> None:
+    for _ in range(500):
+        if marker in body:
+            return
+        await asyncio.sleep(0.002)
+    raise AssertionError(f"{marker!r} not received: {bytes(body)!r}")
+
+
+@pytest.mark.asyncio
+async def test_stream_pushes_write_events():
+    task, disconnect, sent, body = await _open_stream()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        todo_id = (await ac.post("/todos/", json={"title": "a", "priority": "low"})).json()["id"]
+        await ac.put(f"/todos/{todo_id}", json={"completed": True})
+        await ac.delete(f"/todos/{todo_id}")
+        await ac.post(f"/todos/{todo_id}/restore")
+        bulk = await ac.post("/todos/bulk", json=[{"title": "b"}, {"title": "c"}])
+        bulk_ids = [item["id"] for item in bulk.json()["items"]]
+        await ac.patch("/todos/bulk", json=[{"id": bulk_ids[0], "title": "b2"}])
+        await ac.request("DELETE", "/todos/bulk", json=bulk_ids)
+    await _wait_for(body, b'event: deleted\ndata: {"id":%d}' % bulk_ids[1])
+    disconnect.set()
+    await asyncio.wait_for(task, 1)
+
+    start = sent[0]
+    assert start["status"] == 200
+    headers = dict(start["headers"])
+    assert headers[b"content-type"].startswith(b"text/event-stream")
+    assert headers[b"cache-control"] == b"no-cache, no-transform"
+    assert body.startswith(b"retry: ")
+    assert _parse(bytes(body)) == [
+        (
+            "created",
+            {"id": todo_id, "title": "a", "completed": False, "due_at": None, "priority": "low"},
+        ),
+        (
+            "updated",
+            {"id": todo_id, "title": "a", "completed": True, "due_at": None, "priority": "low"},
+        ),
+        ("deleted", {"id": todo_id}),
+        (
+            "restored",
+            {"id": todo_id, "title": "a", "completed": True, "due_at": None, "priority": "low"},
+        ),
+        (
+            "created",
+            {"id": bulk_ids[0], "title": "b", "completed": False, "due_at": None, "priority": None},
+        ),
+        (
+            "created",
+            {"id": bulk_ids[1], "title": "c", "completed": False, "due_at": None, "priority": None},
+        ),
+        (
+            "updated",
+            {
+                "id": bulk_ids[0],
+                "title": "b2",
+                "completed": False,
+                "due_at": None,
+                "priority": None,
+            },
+        ),
+        ("deleted", {"id": bulk_ids[0]}),
+        ("deleted", {"id": bulk_ids[1]}),
+    ]
+    # The stream unsubscribed when the client went away
+    assert len(events) == 0
+
+
+@pytest.mark.asyncio
+async def test_last_event_id_header_resumes_stream():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        task, disconnect, _, body = await _open_stream()
+        await ac.post("/todos/", json={"title": "seen"})
+        await _wait_for(body, b"event: created")
+        disconnect.set()
+        await task
+        last_id = next(
+            line.split(": ", 1)[1] for line in body.decode().splitlines() if line.startswith("id: ")
+        )
+
+        await ac.post("/todos/", json={"title": "missed"})
+        task, disconnect, _, body = await _open_stream([(b"last-event-id", last_id.encode())])
+        await _wait_for(body, b"missed")
+        disconnect.set()
+        await task
+    assert [data["title"] for _, data in _parse(bytes(body))] == ["missed"]
+
+
+@pytest.mark.asyncio
+async def test_replay_buffer_and_reset():
+    broadcaster = EventBroadcaster(replay_size=3, queue_size=10)
+    for i in range(1, 6):
+        broadcaster.publish("created", b'{"id":%d}' % i)
+
+    async def first_frames(last_event_id: str | None, count: int) -> bytes:
+        stream = broadcaster.stream(last_event_id)
+        frames = b"".join([await anext(stream) for _ in range(count)])
+        await stream.aclose()
+        return frames
+
+    # ids 3..5 are buffered: resuming after 2 replays exactly those
+    replayed = await first_frames(broadcaster.event_id(2), 4)
+    assert [data["id"] for _, data in _parse(replayed)] == [3, 4, 5]
+    # Pushed out of the buffer, unknown instance, or from the future: re-list
+    for stale in (broadcaster.event_id(1), "other-3", broadcaster.event_id(9), "garbage"):
+        frames = await first_frames(stale, 2)
+        assert _parse(frames) == [("reset", {})]
+        assert f"id: {broadcaster.event_id(5)}" in frames.decode()
+    assert len(broadcaster) == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_disconnected():
+    broadcaster = EventBroadcaster(replay_size=10, queue_size=2)
+    slow = broadcaster.stream(None)
+    fast = broadcaster.stream(None)
+    await anext(slow)
+    await anext(fast)
+    broadcaster.publish("created", b'{"id":1}')
+    assert b'{"id":1}' in await anext(fast)
+    for i in range(2, 5):
+        broadcaster.publish("created", b'{"id":%d}' % i)
+        assert b'{"id":%d}' % i in await anext(fast)
+    # The slow stream's queue overflowed: it ends and its client resumes via Last-Event-ID
+    with pytest.raises(StopAsyncIteration):
+        await anext(slow)
+    assert len(broadcaster) == 1
+    await fast.aclose()
+
+
+@pytest.mark.asyncio
+async def test_idle_stream_sends_keep_alive_and_close_ends_it():
+    broadcaster = EventBroadcaster(replay_size=10, queue_size=10)
+    stream = broadcaster.stream(None, heartbeat=0.01)
+    assert (await anext(stream)).startswith(b"retry: ")
+    assert await anext(stream) == b": keep-alive\n\n"
+    broadcaster.close()
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    assert len(broadcaster) == 0
@@ -0,0 +1,138 @@
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.db import reset_db
+from app.main import app
+from app.routers import todos
+from app.routers.metrics import get_registry
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+async def _seed(ac: AsyncClient) -> list[int]:
+    r = await ac.post(
+        "/todos/bulk",
+        json=[
+            {"title": "alpha", "priority": "high", "due_at": "2030-01-02T03:04:05Z"},
+            {"title": "beta, with comma", "completed": True},
+            {"title": 'gamma "quoted"'},
+            {"title": "delta"},
+            {"title": "epsilon", "priority": "low"},
+        ],
+    )
+    ids = [item["id"] for item in r.json()["items"]]
+    await ac.delete(f"/todos/{ids[3]}")
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_matches_list_and_filters(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(todos, "EXPORT_BATCH_SIZE", 2)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        ids = await _seed(ac)
+        listed = (await ac.get("/todos/", params={"limit": 200})).json()["items"]
+
+        r = await ac.get("/todos/export")
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "application/x-ndjson"
+        assert r.headers["content-disposition"] == 'attachment; filename="todos.ndjson"'
+        assert r.text.endswith("\n")
+        assert [json.loads(line) for line in r.text.splitlines()] == listed
+
+        r = await ac.get("/todos/export", params={"include_deleted": True})
+        assert [json.loads(line)["id"] for line in r.text.splitlines()] == ids
+        r = await ac.get("/todos/export", params={"completed": False, "priority": "low"})
+        assert [json.loads(line)["title"] for line in r.text.splitlines()] == ["epsilon"]
+        r = await ac.get("/todos/export", params={"q": "gam"})
+        assert [json.loads(line)["id"] for line in r.text.splitlines()] == [ids[2]]
+
+
+@pytest.mark.asyncio
+async def test_export_csv():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        ids = await _seed(ac)
+        r = await ac.get("/todos/export", params={"format": "csv"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [row["id"] for row in rows] == [str(i) for i in (ids[0], ids[1], ids[2], ids[4])]
+    assert rows[0] == {
+        "title": "alpha",
+        "completed": "false",
+        "due_at": "2030-01-02T03:04:05Z",
+        "priority": "high",
+        "id": str(ids[0]),
+    }
+    assert rows[1]["title"] == "beta, with comma"
+    assert rows[1]["completed"] == "true"
+    assert rows[2]["title"] == 'gamma "quoted"'
+    assert rows[2]["due_at"] == rows[2]["priority"] == ""
+
+
+@pytest.mark.asyncio
+async def test_export_empty_and_invalid_format():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/todos/export")
+        assert r.status_code == 200
+        assert r.content == b""
+        r = await ac.get("/todos/export", params={"format": "csv"})
+        assert r.text == "title,completed,due_at,priority,id\n"
+        r = await ac.get("/todos/export", params={"format": "xml"})
+        assert r.status_code == 400
+        assert r.json()["detail"] == "format must be ndjson|csv"
+
+
+@pytest.mark.asyncio
+async def test_export_sends_one_chunk_per_batch_and_records_bytes(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(todos, "EXPORT_BATCH_SIZE", 2)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await _seed(ac)
+
+    chunks: list[bytes] = []
+    never = asyncio.Event()
+
+    async def receive() -> dict:
+        # The client stays connected for the whole response
+        await never.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append(message["body"])
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/todos/export",
+        "raw_path": b"/todos/export",
+        "query_string": b"format=csv",
+        "root_path": "",
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    registry = get_registry()
+    before = registry.get_sample_value("http_response_size_bytes_sum", {"status": "200"}) or 0.0
+    await app(scope, receive, send)
+    after = registry.get_sample_value("http_response_size_bytes_sum", {"status": "200"})
+    # Header, then 4 live rows in batches of 2
+    assert len(chunks) == 3
+    assert chunks[0] == b"title,completed,due_at,priority,id\n"
+    assert after == before + sum(len(chunk) for chunk in chunks)
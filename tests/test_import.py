@@ -0,0 +1,194 @@
+import json
+from collections.abc import AsyncIterator
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.db import reset_db
+from app.events import events
+from app.main import app
+from app.routers import todos
+from app.routers.metrics import get_registry
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+def _ndjson(*records: object) -> bytes:
+    return b"".join(json.dumps(record).encode() + b"\n" for record in records)
+
+
+async def _titles(ac: AsyncClient) -> list[str]:
+    r = await ac.get("/todos/", params={"limit": 200})
+    return [item["title"] for item in r.json()["items"]]
+
+
+@pytest.mark.asyncio
+async def test_import_ndjson():
+    body = _ndjson(
+        {"title": "alpha", "priority": "high", "due_at": "2030-01-02T03:04:05Z"},
+        {"title": "beta", "completed": True},
+    )
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.get("/todos/")  # warm the list cache
+        r = await ac.post("/todos/import", content=body)
+        assert r.status_code == 200
+        result = r.json()
+        assert result["imported"] == 2
+        assert result["rejected"] == 0
+        assert result["errors"] == []
+        assert result["chunks"] == 1
+        assert result["rows_per_second"] > 0
+        items = (await ac.get("/todos/")).json()["items"]
+    assert [(i["title"], i["completed"], i["priority"]) for i in items] == [
+        ("alpha", False, "high"),
+        ("beta", True, None),
+    ]
+    assert items[0]["due_at"] == "2030-01-02T03:04:05Z"
+
+
+@pytest.mark.asyncio
+async def test_import_reports_bad_lines_and_keeps_good_ones(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(todos, "IMPORT_MAX_LINE_BYTES", 64)
+    body = b"\n".join(
+        [
+            b'{"title": "ok1"}',
+            b"{not json",
+            b'{"completed": true}',
+            b"",
+            b'{"title": "naive", "due_at": "2030-01-01T00:00:00"}',
+            b'{"title": "\xff"}',
+            b'{"title": "' + b"x" * 100 + b'"}',
+            b'{"title": "ok2"}\r',
+        ]
+    )
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/todos/import", content=body)
+        result = r.json()
+        assert result["imported"] == 2
+        assert result["rejected"] == 5
+        assert result["errors_truncated"] is False
+        lines = {error["line"]: error["detail"] for error in result["errors"]}
+        assert sorted(lines) == [2, 3, 5, 6, 7]
+        assert lines[3] == "title: Field required"
+        assert lines[5] == "due_at: must include a timezone offset"
+        assert lines[6] == "invalid UTF-8"
+        assert lines[7] == "line exceeds 64 bytes"
+        assert await _titles(ac) == ["ok1", "ok2"]
+
+
+@pytest.mark.asyncio
+async def test_import_caps_listed_errors(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(todos, "IMPORT_MAX_ERRORS", 2)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/todos/import", content=b"x\n" * 5)
+    result = r.json()
+    assert result["rejected"] == 5
+    assert [error["line"] for error in result["errors"]] == [1, 2]
+    assert result["errors_truncated"] is True
+
+
+@pytest.mark.asyncio
+async def test_import_csv_round_trips_export():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post(
+            "/todos/bulk",
+            json=[
+                {"title": "alpha", "priority": "high", "due_at": "2030-01-02T03:04:05Z"},
+                {"title": "beta, with comma", "completed": True},
+                {"title": 'gamma "quoted"\nsecond line'},
+            ],
+        )
+        exported = (await ac.get("/todos/export", params={"format": "csv"})).content
+        before = (await ac.get("/todos/")).json()["items"]
+        reset_db()
+        r = await ac.post("/todos/import", params={"format": "csv"}, content=exported)
+        assert r.json()["imported"] == 3
+        after = (await ac.get("/todos/")).json()["items"]
+    assert after == before
+
+
+@pytest.mark.asyncio
+async def test_import_csv_errors_and_bom():
+    body = (
+        "﻿title,priority\n"
+        "one,low\n"
+        '"two\nlines",\n'
+        "three,low,extra\n"
+        ",high\n"
+        '"unterminated\n'
+    ).encode()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/todos/import", params={"format": "csv"}, content=body)
+        result = r.json()
+        assert result["imported"] == 2
+        # Empty cells are missing values: optional fields default, a blank title is rejected
+        assert [(e["line"], e["detail"]) for e in result["errors"]] == [
+            (5, "expected 2 fields, got 3"),
+            (6, "title: Field required"),
+            (7, "unterminated quoted field"),
+        ]
+        items = (await ac.get("/todos/")).json()["items"]
+    assert [(i["title"], i["priority"]) for i in items] == [("one", "low"), ("two\nlines", None)]
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_bad_format_header_and_chunk_size():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/todos/import", params={"format": "xml"}, content=b"")
+        assert r.status_code == 400
+        assert r.json()["detail"] == "format must be ndjson|csv"
+        r = await ac.post("/todos/import", params={"chunk_size": 0}, content=b"")
+        assert r.status_code == 400
+        r = await ac.post("/todos/import", params={"format": "csv"}, content=b"name\nx\n")
+        assert r.status_code == 400
+        assert r.json()["detail"] == "CSV header must include a title column"
+        r = await ac.post("/todos/import", content=b"")
+        assert r.json()["imported"] == 0
+
+
+@pytest.mark.asyncio
+async def test_import_streams_body_in_chunks():
+    async def body() -> AsyncIterator[bytes]:
+        data = _ndjson(*({"title": f"t{i}"} for i in range(7)))
+        # Split mid-line to exercise reassembly across reads
+        for start in range(0, len(data), 10):
+            yield data[start : start + 10]
+
+    registry = get_registry()
+    before = registry.get_sample_value("todo_bulk_batch_size_count", {"operation": "import"}) or 0.0
+    seq = events._seq
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/todos/import", params={"chunk_size": 3}, content=body())
+        result = r.json()
+        assert result["imported"] == 7
+        assert result["chunks"] == 3
+        assert await _titles(ac) == [f"t{i}" for i in range(7)]
+    after = registry.get_sample_value("todo_bulk_batch_size_count", {"operation": "import"})
+    assert after == before + 3
+    # A single reset event rather than one per row
+    assert events._seq == seq + 1
+    assert events._replay[-1].frame.split(b"\n")[1] == b"event: reset"
+
+
+@pytest.mark.asyncio
+async def test_import_requires_api_key(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("TODO_API_KEY", "secret")
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.post("/todos/import", content=_ndjson({"title": "x"}))
+        assert r.status_code == 401
+        r = await ac.post(
+            "/todos/import", content=_ndjson({"title": "x"}), headers={"X-API-Key": "secret"}
+        )
+        assert r.status_code == 200
+        assert r.json()["imported"] == 1
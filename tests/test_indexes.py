@@ -0,0 +1,97 @@
+import itertools
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+from app.db import engine, reset_db
+from app.main import app
+
+FILTERS = {
+    "completed": "false",
+    "priority": "high",
+    "overdue": "true",
+}
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+def _plan(statement: str, parameters: object) -> list[str]:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[3] for row in rows]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "combo",
+    [
+        combo
+        for n in range(len(FILTERS) + 1)
+        for combo in itertools.combinations(sorted(FILTERS), n)
+    ],
+)
+@pytest.mark.parametrize("sort", ["id", "due_at"])
+async def test_live_filter_combinations_use_indexes(combo: tuple[str, ...], sort: str):
+    params = {name: FILTERS[name] for name in combo}
+    captured: list[tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            r = await ac.get("/todos/", params={**params, "sort": sort})
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+    assert r.status_code == 200
+
+    # Both the COUNT(*) and the page query must search an index, never scan the table
+    assert len(captured) == 2
+    for statement, parameters in captured:
+        plan = _plan(statement, parameters)
+        lookups = [step for step in plan if step.startswith(("SCAN", "SEARCH"))]
+        assert lookups, plan
+        assert all(step.startswith("SEARCH") and "INDEX" in step for step in lookups), plan
+
+
+def test_partial_indexes_exist():
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            "SELECT name, sql FROM sqlite_master WHERE type='index' AND name LIKE 'ix_todo_live_%'"
+        ).fetchall()
+    assert {name for name, _ in rows} == {
+        "ix_todo_live_completed_due_at",
+        "ix_todo_live_priority_due_at",
+        "ix_todo_live_completed_priority_due_at",
+    }
+    assert all("WHERE deleted_at IS NULL" in sql for _, sql in rows)
+
+
+@pytest.mark.asyncio
+async def test_changes_feed_searches_version_index():
+    captured: list[tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            r = await ac.get("/todos/changes", params={"since": 10})
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+    assert r.status_code == 200
+    # The other SELECT reads the purge horizon from todo_sync by primary key
+    [(statement, parameters)] = [(s, p) for s, p in captured if "todo_sync" not in s]
+    plan = _plan(statement, parameters)
+    assert any("ix_todo_version" in step and step.startswith("SEARCH") for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
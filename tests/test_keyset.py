@@ -0,0 +1,118 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+from app.db import engine, reset_db
+from app.main import app
+
+DUE_DATES = [
+    "2030-01-01T00:00:00+00:00",
+    None,
+    "2020-06-01T00:00:00+00:00",
+    "2030-01-01T00:00:00+00:00",
+    None,
+    "2025-03-01T00:00:00+00:00",
+    None,
+    "2020-06-01T00:00:00+00:00",
+]
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+async def _seed(ac: AsyncClient) -> list[dict]:
+    created = []
+    for i, due in enumerate(DUE_DATES):
+        r = await ac.post("/todos/", json={"title": f"k{i}", "due_at": due})
+        assert r.status_code == 201
+        created.append(r.json())
+    return created
+
+
+async def _walk(ac: AsyncClient, params: dict) -> list[int]:
+    ids: list[int] = []
+    r = await ac.get("/todos/", params={**params, "limit": 3})
+    assert r.status_code == 200
+    page = r.json()
+    ids += [t["id"] for t in page["items"]]
+    while page["has_more"]:
+        r = await ac.get("/todos/", params={**params, "limit": 3, "cursor": page["next_cursor"]})
+        assert r.status_code == 200
+        page = r.json()
+        assert page["offset"] is None
+        ids += [t["id"] for t in page["items"]]
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_cursor_walk_matches_full_ordering_for_every_sort():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        created = await _seed(ac)
+        by_id = sorted(t["id"] for t in created)
+        # SQLite orders NULLs first ascending; ties break on id
+        by_due = [
+            t["id"]
+            for t in sorted(
+                created, key=lambda t: (t["due_at"] is not None, t["due_at"] or "", t["id"])
+            )
+        ]
+        expected = {"id": by_id, "due_at": by_due, "created_at": by_id}
+        for sort, asc_ids in expected.items():
+            assert await _walk(ac, {"sort": sort}) == asc_ids
+            assert await _walk(ac, {"sort": sort, "order": "desc"}) == asc_ids[::-1]
+        # sort_due remains an alias for sort=due_at and now supports cursors
+        assert await _walk(ac, {"sort_due": True}) == by_due
+
+
+@pytest.mark.asyncio
+async def test_cursor_must_match_sort_order():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await _seed(ac)
+        r = await ac.get("/todos/", params={"sort": "due_at", "limit": 2})
+        cursor = r.json()["next_cursor"]
+        r = await ac.get("/todos/", params={"sort": "created_at", "cursor": cursor})
+        assert r.status_code == 400
+        assert r.json()["detail"] == "cursor does not match sort order"
+        r = await ac.get("/todos/", params={"sort": "due_at", "order": "desc", "cursor": cursor})
+        assert r.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort", ["id", "due_at", "created_at"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+async def test_cursor_pages_use_index_seeks(sort: str, order: str):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await _seed(ac)
+        params = {"sort": sort, "order": order, "limit": 2, "include_total": False}
+        r = await ac.get("/todos/", params=params)
+        cursor = r.json()["next_cursor"]
+
+        captured: list[tuple[str, object]] = []
+
+        def capture(conn, cursor_, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                captured.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            r = await ac.get("/todos/", params={**params, "cursor": cursor})
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        assert r.status_code == 200
+
+    assert captured
+    with engine.connect() as conn:
+        for statement, parameters in captured:
+            plan = [
+                row[3]
+                for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            ]
+            assert not any("TEMP B-TREE" in step for step in plan), plan
+            assert all(
+                "USING" in step for step in plan if step.startswith(("SCAN", "SEARCH"))
+            ), plan
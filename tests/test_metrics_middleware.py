@@ -0,0 +1,66 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import generate_latest
+
+from app.db import reset_db
+from app.main import app
+from app.routers.metrics import MetricsMiddleware, get_registry
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+def _sample(name: str, labels: dict[str, str]) -> float:
+    value = get_registry().get_sample_value(name, labels)
+    return value or 0.0
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labeled_by_route_template():
+    labels = {"method": "GET", "path": "/todos/{todo_id}", "status": "200"}
+    before = _sample("http_requests_total", labels)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        todo = (await ac.post("/todos/", json={"title": "m"})).json()
+        await ac.get(f"/todos/{todo['id']}")
+        await ac.get(f"/todos/{todo['id']}")
+        missing = await ac.get("/todos/424242")
+    assert missing.status_code == 404
+    assert _sample("http_requests_total", labels) - before == 2
+    assert _sample("http_errors_total", {"method": "GET", "status_class": "4xx"}) >= 1
+    assert "/todos/{todo_id}" in generate_latest(get_registry()).decode()
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_bytes_and_cached_children():
+    chunks = [b"a" * 100, b"b" * 250, b"c" * 7]
+    inner = FastAPI()
+
+    @inner.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def body():
+            for chunk in chunks:
+                yield chunk
+
+        return StreamingResponse(body(), media_type="text/plain")
+
+    middleware = MetricsMiddleware(inner)
+    labels = {"status": "200"}
+    sum_before = _sample("http_response_size_bytes_sum", labels)
+    count_before = _sample("http_response_size_bytes_count", labels)
+    transport = ASGITransport(app=middleware)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for _ in range(3):
+            r = await ac.get("/stream")
+            assert len(r.content) == 357
+        await ac.get("/nope")
+        await ac.get("/nope-again")
+
+    assert _sample("http_response_size_bytes_sum", labels) - sum_before == 3 * 357
+    assert _sample("http_response_size_bytes_count", labels) - count_before == 3
+    # One cached entry for the matched route; unmatched paths are not cached
+    assert list(middleware._children) == [("GET", "/stream", 200)]
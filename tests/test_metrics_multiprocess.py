@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+WORKER = textwrap.dedent("""
+    import sys
+    from app.routers.metrics import (
+        mark_process_dead, observe_response_size, record_db_timing, record_metrics,
+    )
+    n = int(sys.argv[1])
+    for _ in range(n):
+        record_metrics("GET", "/todos/", 200, 0.01)
+        record_db_timing("select_page", "todo", 0.002)
+        observe_response_size(200, 100)
+    mark_process_dead()
+    """)
+
+SCRAPE = textwrap.dedent("""
+    from fastapi.testclient import TestClient
+    from app.routers.metrics import router
+    from fastapi import FastAPI
+    app = FastAPI()
+    app.include_router(router)
+    print(TestClient(app).get("/metrics").text)
+    """)
+
+
+def _run(code: str, env: dict[str, str], *args: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def _value(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found")
+
+
+def test_scrape_aggregates_all_worker_processes(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    _run(WORKER, env, "3")
+    _run(WORKER, env, "4")
+    assert len(list(tmp_path.glob("*.db"))) >= 2  # one set of mmap files per worker
+
+    text = _run(SCRAPE, env)
+    assert _value(text, 'http_requests_total{method="GET",path="/todos/",status="200"}') == 7
+    count = 'db_query_duration_seconds_count{operation="select_page",table="todo"}'
+    assert _value(text, count) == 7
+    assert _value(text, 'http_response_size_bytes_sum{status="200"}') == 700
@@ -0,0 +1,83 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, event, text
+
+from app.db import engine
+from app.main import app
+from app.migrations import LATEST_VERSION, SCHEMA_VERSION_TABLE, migrate
+
+
+def test_migrate_fresh_database(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert migrate(eng) == LATEST_VERSION
+    # Second run is a no-op
+    assert migrate(eng) == LATEST_VERSION
+    with eng.connect() as conn:
+        versions = conn.execute(text(f"SELECT version FROM {SCHEMA_VERSION_TABLE}")).fetchall()
+    assert [v[0] for v in versions] == list(range(1, LATEST_VERSION + 1))
+
+
+def test_migrate_legacy_database_adds_columns(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with eng.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE todo (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, "
+                "completed BOOLEAN NOT NULL, created_at DATETIME NOT NULL)"
+            )
+        )
+    migrate(eng)
+    with eng.connect() as conn:
+        cols = {row[1] for row in conn.execute(text("PRAGMA table_info('todo')"))}
+    assert {"due_at", "priority", "deleted_at", "updated_at", "version"} <= cols
+
+
+def test_migrate_backfills_row_versions(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with eng.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE todo (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, "
+                "completed BOOLEAN NOT NULL, created_at DATETIME NOT NULL)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO todo (id, title, completed, created_at) VALUES "
+                "(1, 'a', 0, '2025-01-01 00:00:00.000000'), "
+                "(5, 'b', 0, '2025-01-02 00:00:00.000000')"
+            )
+        )
+    migrate(eng)
+    with eng.begin() as conn:
+        rows = conn.execute(text("SELECT id, version, updated_at FROM todo ORDER BY id")).all()
+        assert rows == [(1, 1, "2025-01-01 00:00:00.000000"), (5, 5, "2025-01-02 00:00:00.000000")]
+        conn.execute(
+            text("INSERT INTO todo (title, completed, created_at) VALUES ('c', 0, '2025')")
+        )
+        conn.execute(text("UPDATE todo SET completed = 1 WHERE id = 1"))
+        rows = conn.execute(text("SELECT id, version, updated_at FROM todo ORDER BY id")).all()
+    assert [(row[0], row[1]) for row in rows] == [(1, 7), (5, 5), (6, 6)]
+    # Trigger timestamps use the same text format SQLAlchemy writes
+    assert len(rows[0][2]) == len("2025-01-01 00:00:00.000000")
+
+
+@pytest.mark.asyncio
+async def test_request_handlers_do_not_inspect_schema():
+    statements: list[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            r = await ac.post("/todos/", json={"title": "no schema checks"})
+            assert r.status_code == 201
+            r = await ac.get("/todos/")
+            assert r.status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert statements
+    assert not any("sqlite_master" in s or "PRAGMA table_info" in s for s in statements)
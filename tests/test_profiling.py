@@ -0,0 +1,131 @@
+import logging
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import db
+from app.db import reset_db
+from app.main import app
+from app.routers.metrics import get_registry
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+def _timings(header: str) -> dict[str, float]:
+    result = {}
+    for part in header.split(", "):
+        name, *params = part.split(";")
+        dur = next(p for p in params if p.startswith("dur="))
+        result[name] = float(dur[4:])
+    return result
+
+
+@pytest.mark.asyncio
+async def test_profile_header_returns_server_timing_breakdown():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/", json={"title": "p"})
+        plain = await ac.get("/todos/", params={"limit": 3})
+        assert "server-timing" not in plain.headers
+
+        r = await ac.get("/todos/", params={"limit": 4}, headers={"X-Profile": "1"})
+        assert r.status_code == 200
+        header = r.headers["server-timing"]
+        timings = _timings(header)
+        assert set(timings) == {"db", "validation", "app", "serialization", "middleware", "total"}
+        assert "db;dur=" in header and 'desc="2 queries"' in header
+        assert all(value >= 0 for value in timings.values())
+        parts = sum(v for k, v in timings.items() if k != "total")
+        assert parts <= timings["total"] + 0.01
+
+        # Validation failures are profiled too
+        r = await ac.get("/todos/not-a-number", headers={"X-Profile": "1"})
+        assert r.status_code == 422
+        assert _timings(r.headers["server-timing"])["validation"] > 0
+
+
+@pytest.mark.asyncio
+async def test_profiling_requires_api_key_when_configured(monkeypatch):
+    monkeypatch.setenv("TODO_API_KEY", "secret")
+    registry = get_registry()
+    labels = {"identity": "default"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/todos/", headers={"X-Profile": "1"})
+        assert r.status_code == 200
+        assert "server-timing" not in r.headers
+        # Protected routes still answer 401 from their own dependency
+        r = await ac.post("/todos/", headers={"X-Profile": "1"}, json={"title": "p"})
+        assert r.status_code == 401
+        assert r.json()["detail"] == "Invalid or missing API key"
+
+        r = await ac.get("/todos/", headers={"X-Profile": "1", "X-API-Key": "secret"})
+        assert r.status_code == 200
+        assert "server-timing" in r.headers
+
+        before = registry.get_sample_value("todo_api_key_requests_total", labels) or 0
+        r = await ac.post(
+            "/todos/", headers={"X-Profile": "1", "X-API-Key": "secret"}, json={"title": "p"}
+        )
+        assert r.status_code == 201
+        assert "server-timing" in r.headers
+        # The key is verified (and counted) once, by the route
+        assert registry.get_sample_value("todo_api_key_requests_total", labels) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log_includes_plan_and_redacted_params(monkeypatch, caplog):
+    monkeypatch.setattr(db, "SLOW_QUERY_MS", 1e-6)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        todo = (await ac.post("/todos/", json={"title": "secret title"})).json()
+        with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+            await ac.get(f"/todos/{todo['id']}")
+
+    records = [r for r in caplog.records if r.name == "app.slow_query"]
+    lookup = next(r for r in records if "select_by_id" in r.getMessage())
+    assert "FROM todo" in lookup.sql
+    assert lookup.params == ["<int>"]
+    assert any("USING INTEGER PRIMARY KEY" in step for step in lookup.plan)
+    assert lookup.duration_ms > 0
+
+    monkeypatch.setattr(db, "SLOW_QUERY_PARAMS", "show")
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            await ac.put(f"/todos/{todo['id']}", json={"title": "renamed"})
+    update = next(
+        r for r in caplog.records if r.getMessage().startswith("slow query") and "UPDATE" in r.sql
+    )
+    assert "renamed" in update.params
+
+
+@pytest.mark.asyncio
+async def test_slow_query_plans_are_not_counted_as_queries(monkeypatch, caplog):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/", json={"title": "p"})
+        monkeypatch.setattr(db, "SLOW_QUERY_MS", 1e-6)
+        with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+            r = await ac.get("/todos/", headers={"X-Profile": "1"})
+    assert any(r.plan for r in caplog.records if r.name == "app.slow_query")
+    assert 'desc="2 queries"' in r.headers["server-timing"]
+    families = {m.name: m for m in get_registry().collect()}
+    statements = {s.labels.get("statement") for s in families["db_query_rows"].samples}
+    assert "explain" not in statements
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log_summarizes_executemany_params(monkeypatch, caplog):
+    monkeypatch.setattr(db, "SLOW_QUERY_MS", 1e-6)
+    monkeypatch.setattr(db, "SLOW_QUERY_PARAMS", "show")
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+            await ac.post("/todos/bulk", json=[{"title": f"bulk {i}"} for i in range(3)])
+    insert = next(r for r in caplog.records if r.name == "app.slow_query" and "INSERT" in r.sql)
+    # One summary instead of every row's values, even with params shown
+    assert insert.params == "<3 parameter sets>"
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import sqlite3
+from datetime import UTC, datetime, timedelta
+from typing import Any, cast
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, text, update
+from sqlmodel import Session
+
+from app.db import engine, reset_db
+from app.main import app
+from app.migrations import migrate
+from app.models.todo import Todo
+from app.purge import (
+    compact,
+    convert_to_incremental_vacuum,
+    enable_incremental_vacuum,
+    purge_tombstones,
+    run_purge_loop,
+)
+from app.routers.metrics import get_registry
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+def _backdate_deletion(ids: list[int], days: int) -> None:
+    with Session(engine) as session:
+        session.execute(
+            update(Todo)
+            .where(cast(Any, Todo.id).in_(ids))
+            .values(deleted_at=datetime.now(UTC) - timedelta(days=days))
+        )
+        session.commit()
+
+
+async def _seed_tombstones(ac: AsyncClient) -> list[int]:
+    r = await ac.post("/todos/bulk", json=[{"title": f"task{i}"} for i in range(5)])
+    ids = [item["id"] for item in r.json()["items"]]
+    await ac.request("DELETE", "/todos/bulk", json=ids[:3])
+    _backdate_deletion(ids[:2], days=60)
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_purge_hard_deletes_expired_tombstones_in_batches():
+    registry = get_registry()
+    before = registry.get_sample_value("todo_purge_rows_total") or 0.0
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        ids = await _seed_tombstones(ac)
+        listed = await ac.get("/todos/", params={"include_deleted": True})
+        assert len(listed.json()["items"]) == 5
+
+        result = await purge_tombstones(retention=timedelta(days=30), batch_size=1)
+        assert (result.rows, result.batches) == (2, 2)
+
+        # The cached listing was invalidated
+        r = await ac.get("/todos/", params={"include_deleted": True})
+        assert [item["id"] for item in r.json()["items"]] == ids[2:]
+        assert (await ac.get(f"/todos/{ids[0]}")).status_code == 404
+        # The FTS delete trigger removed the purged titles
+        r = await ac.get("/todos/search", params={"q": "task", "include_deleted": True})
+        assert sorted(item["id"] for item in r.json()["items"]) == ids[2:]
+
+        assert (await purge_tombstones(retention=timedelta(days=30))).rows == 0
+    assert registry.get_sample_value("todo_purge_rows_total") == before + 2
+    assert (registry.get_sample_value("todo_purge_runs_total", {"result": "ok"}) or 0) >= 2
+
+
+@pytest.mark.asyncio
+async def test_changes_reject_since_older_than_purge_horizon():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/", json={"title": "first"})
+        stale = (await ac.get("/todos/changes")).json()["next_since"]
+        await _seed_tombstones(ac)
+        current = (await ac.get("/todos/changes")).json()["next_since"]
+        await purge_tombstones(retention=timedelta(days=30))
+
+        r = await ac.get("/todos/changes", params={"since": stale})
+        assert r.status_code == 410
+        assert r.json()["detail"] == "since is older than the purge horizon; re-sync from since=0"
+        full = await ac.get("/todos/changes", params={"since": 0})
+        assert full.status_code == 200
+        assert len(full.json()["items"]) == 4
+        r = await ac.get("/todos/changes", params={"since": current})
+        assert r.status_code == 200
+        assert r.json()["items"] == []
+
+
+def test_compact_reclaims_free_pages(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'compact.db'}")
+    with eng.begin() as conn:
+        conn.execute(text("CREATE TABLE blob (data TEXT)"))
+        conn.execute(text("INSERT INTO blob VALUES (:data)"), [{"data": "x" * 2000}] * 200)
+    assert enable_incremental_vacuum(eng) is True
+    assert enable_incremental_vacuum(eng) is False
+    with eng.begin() as conn:
+        conn.execute(text("DELETE FROM blob"))
+        free = conn.execute(text("PRAGMA freelist_count")).scalar_one()
+        pages = conn.execute(text("PRAGMA page_count")).scalar_one()
+    assert free > 20
+    assert compact(eng, 20) == 20
+    assert compact(eng, 0) == 0
+    assert compact(eng, 10_000) == free - 20
+    with eng.connect() as conn:
+        assert conn.execute(text("PRAGMA page_count")).scalar_one() == pages - free
+    eng.dispose()
+
+
+@pytest.mark.asyncio
+async def test_conversion_on_a_locked_database_is_logged_not_raised(tmp_path, caplog):
+    path = tmp_path / "locked.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE blob (data TEXT)")
+    eng = create_engine(f"sqlite:///{path}", connect_args={"timeout": 0.05})
+    # Another worker mid-VACUUM, or any writer holding the lock
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN EXCLUSIVE")
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.purge"):
+            assert await convert_to_incremental_vacuum(eng) is False
+        assert "auto_vacuum=INCREMENTAL" in caplog.text
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert await convert_to_incremental_vacuum(eng) is True
+    eng.dispose()
+
+
+def test_new_databases_start_with_incremental_vacuum(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    migrate(eng)
+    with eng.connect() as conn:
+        assert conn.execute(text("PRAGMA auto_vacuum")).scalar_one() == 2
+    assert enable_incremental_vacuum(eng) is False
+    eng.dispose()
+
+
+@pytest.mark.asyncio
+async def test_purge_loop_runs_until_cancelled():
+    registry = get_registry()
+    before = registry.get_sample_value("todo_purge_runs_total", {"result": "ok"}) or 0.0
+    task = asyncio.create_task(run_purge_loop(interval=0.01))
+    for _ in range(200):
+        await asyncio.sleep(0.01)
+        if (
+            registry.get_sample_value("todo_purge_runs_total", {"result": "ok"}) or 0
+        ) >= before + 2:
+            break
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert registry.get_sample_value("todo_purge_runs_total", {"result": "ok"}) >= before + 2
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import PlainTextResponse
+
+from app.auth import hash_key
+from app.main import app
+from app.ratelimit import RateLimiter, RateLimitMiddleware, TokenBucket, rate_limiter
+from app.routers.metrics import get_registry
+
+
+def _rejected(reason: str) -> float:
+    return get_registry().get_sample_value("todo_requests_rejected_total", {"reason": reason}) or 0
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_at_rate_up_to_burst():
+    bucket = TokenBucket(rate=2, burst=3, now=0.0)
+    assert [bucket.take(0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0.0
+    # Idle time never builds up more than the burst
+    assert [bucket.take(100.0) for _ in range(4)][-1] == pytest.approx(0.5)
+
+
+def test_limiter_keeps_separate_budgets_and_bounds_clients():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        read_rate=1, read_burst=2, write_rate=0, write_burst=0, max_clients=2, clock=clock
+    )
+    assert limiter.acquire("ip:a", "read") == 0.0
+    assert limiter.acquire("ip:a", "read") == 0.0
+    assert limiter.acquire("ip:a", "read") == pytest.approx(1.0)
+    assert limiter.acquire("ip:b", "read") == 0.0
+    # A write budget of 0 is unlimited and tracks nothing
+    assert all(limiter.acquire("ip:a", "write") == 0.0 for _ in range(10))
+    assert len(limiter) == 2
+    limiter.acquire("ip:c", "read")
+    assert len(limiter) == 2
+    # "ip:a" was the least recently seen and got evicted with its empty bucket
+    assert limiter.acquire("ip:a", "read") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_writes_are_limited_per_client_with_retry_after(
+    monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    key_file = tmp_path / "keys"
+    key_file.write_text(f"ci {hash_key('ci-key')}\nops {hash_key('ops-key')}\n")
+    monkeypatch.setenv("TODO_API_KEYS_FILE", str(key_file))
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "clock", clock)
+    monkeypatch.setitem(rate_limiter.budgets, "write", (0.5, 2))
+    before = _rejected("write_rate_limit")
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+
+        async def create(key: str) -> int:
+            r = await ac.post("/todos/", headers={"X-API-Key": key}, json={"title": key})
+            return r.status_code
+
+        assert [await create("ci-key") for _ in range(2)] == [201, 201]
+        r = await ac.post("/todos/", headers={"X-API-Key": "ci-key"}, json={"title": "x"})
+        assert r.status_code == 429
+        assert r.headers["retry-after"] == "2"
+        assert r.json() == {"detail": "Rate limit exceeded"}
+        # Reads have their own budget, and other keys their own buckets
+        assert (await ac.get("/todos/", headers={"X-API-Key": "ci-key"})).status_code == 200
+        assert await create("ops-key") == 201
+        # Made-up keys share the caller's address bucket instead of getting fresh ones
+        assert [await create(f"guess-{i}") for i in range(3)] == [401, 401, 429]
+        clock.now += 2
+        assert await create("ci-key") == 201
+    assert _rejected("write_rate_limit") == before + 2
+
+
+@pytest.mark.asyncio
+async def test_rejections_share_one_path_label(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(rate_limiter.budgets, "read", (0.001, 5))
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        statuses = [(await ac.get(f"/todos/{i}")).status_code for i in range(50)]
+    assert statuses.count(429) == 45
+    families = {m.name: m for m in get_registry().collect()}
+    paths = {
+        sample.labels["path"]
+        for sample in families["http_requests"].samples
+        if sample.name == "http_requests_total" and sample.labels["status"] == "429"
+    }
+    assert paths == {"<rejected>"}
+
+
+@pytest.mark.asyncio
+async def test_in_flight_cap_sheds_load_with_503():
+    release = asyncio.Event()
+    entered = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        if scope["path"] == "/slow":
+            entered.set()
+            await release.wait()
+        await PlainTextResponse("ok")(scope, receive, send)
+
+    limiter = RateLimiter(read_rate=0, write_rate=0)
+    before = _rejected("in_flight_limit")
+    transport = ASGITransport(app=RateLimitMiddleware(slow_app, limiter=limiter, max_in_flight=1))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        slow = asyncio.create_task(ac.get("/slow"))
+        await entered.wait()
+        r = await ac.get("/fast")
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "1"
+        # Probes and long-lived event streams do not need a slot
+        assert (await ac.get("/health/ready")).status_code == 200
+        assert (await ac.get("/todos/events")).status_code == 200
+        release.set()
+        assert (await slow).status_code == 200
+        assert (await ac.get("/fast")).status_code == 200
+    assert _rejected("in_flight_limit") == before + 1
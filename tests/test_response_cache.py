@@ -0,0 +1,149 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlmodel import Session
+
+from app.cache import ResponseCache, response_cache
+from app.db import DATABASE_URL, data_version_reader, engine, reset_db
+from app.main import app
+from app.models.todo import Todo
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+def _metric(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+@pytest.mark.asyncio
+async def test_list_etag_returns_304_until_a_write_bumps_version():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/", json={"title": "a"})
+        r1 = await ac.get("/todos/", params={"limit": 10})
+        assert r1.status_code == 200
+        etag = r1.headers["etag"]
+        assert etag.startswith('W/"')
+
+        r2 = await ac.get("/todos/", params={"limit": 10}, headers={"If-None-Match": etag})
+        assert r2.status_code == 304
+        assert r2.content == b""
+        assert r2.headers["etag"] == etag
+
+        # Different parameters get a different tag
+        r3 = await ac.get("/todos/", params={"limit": 5}, headers={"If-None-Match": etag})
+        assert r3.status_code == 200
+
+        await ac.post("/todos/", json={"title": "b"})
+        r4 = await ac.get("/todos/", params={"limit": 10}, headers={"If-None-Match": etag})
+        assert r4.status_code == 200
+        assert r4.headers["etag"] != etag
+        assert [t["title"] for t in r4.json()["items"]] == ["a", "b"]
+        assert r4.json()["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_is_cached_and_invalidated_by_every_write():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        todo = (await ac.post("/todos/", json={"title": "a"})).json()
+        url = f"/todos/{todo['id']}"
+        first = await ac.get(url)
+        assert first.json() == todo
+        assert len(response_cache) == 1
+        again = await ac.get(url)
+        assert again.content == first.content
+        assert again.headers["etag"] == first.headers["etag"]
+
+        writes = [
+            lambda: ac.put(url, json={"completed": True}),
+            lambda: ac.delete(url),
+            lambda: ac.post(f"{url}/restore"),
+            lambda: ac.patch("/todos/bulk", json=[{"id": todo["id"], "title": "bulk"}]),
+            lambda: ac.request("DELETE", "/todos/bulk", json=[todo["id"]]),
+            lambda: ac.post("/todos/bulk", json=[{"title": "c"}]),
+        ]
+        for write in writes:
+            etag = (await ac.get(url)).headers["etag"]
+            assert (await write()).status_code < 300
+            assert len(response_cache) == 0
+            r = await ac.get(url, headers={"If-None-Match": etag})
+            assert r.status_code == 200
+
+        assert r.json()["title"] == "bulk"
+        assert (await ac.get("/todos/999999")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used_and_reports_metrics(monkeypatch):
+    monkeypatch.setattr(response_cache, "max_entries", 2)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        ids = [(await ac.post("/todos/", json={"title": f"t{i}"})).json()["id"] for i in range(3)]
+        before = (await ac.get("/metrics")).text
+
+        await ac.get(f"/todos/{ids[0]}")
+        await ac.get(f"/todos/{ids[1]}")
+        await ac.get(f"/todos/{ids[0]}")  # hit, ids[0] becomes most recent
+        await ac.get(f"/todos/{ids[2]}")  # evicts ids[1]
+        etag = (await ac.get(f"/todos/{ids[0]}")).headers["etag"]  # still cached
+        await ac.get(f"/todos/{ids[0]}", headers={"If-None-Match": etag})
+
+        after = (await ac.get("/metrics")).text
+
+    def delta(name: str) -> float:
+        return _metric(after, name) - _metric(before, name)
+
+    route = 'route="/todos/{todo_id}"'
+    assert delta(f"response_cache_misses_total{{{route}}}") == 3
+    assert delta(f"response_cache_hits_total{{{route}}}") == 2
+    assert delta(f"response_cache_not_modified_total{{{route}}}") == 1
+    assert delta('response_cache_evictions_total{reason="lru"}') == 1
+
+
+@pytest.mark.asyncio
+async def test_overdue_listing_is_not_cached():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/", json={"title": "late", "due_at": "2000-01-01T00:00:00+00:00"})
+        r = await ac.get("/todos/", params={"overdue": "true"})
+        assert r.status_code == 200
+        assert r.json()["total"] == 1
+        assert "etag" not in r.headers
+        assert len(response_cache) == 0
+
+
+def test_writes_in_one_worker_invalidate_another_workers_cache():
+    # Two caches with their own data_version connections stand in for two workers
+    workers = [ResponseCache(8, data_version_reader(DATABASE_URL)) for _ in range(2)]
+    key = ("list", 10)
+
+    def write(writer: ResponseCache, title: str) -> None:
+        with Session(engine) as session:
+            session.add(Todo(title=title))
+            session.commit()
+        writer.invalidate()  # what the write routes do, in the writing worker only
+
+    for writer, reader in (workers, workers[::-1]):
+        for cache in workers:
+            cache.put(key, cache.version, b"[]")
+        etag = reader.get(key, "/todos/").etag
+        write(writer, f"written by worker {workers.index(writer)}")
+        assert reader.not_modified(key, etag, "/todos/") is None
+        assert reader.get(key, "/todos/") is None
+        assert writer.get(key, "/todos/") is None
+
+
+def test_put_skips_bodies_read_before_another_workers_commit():
+    cache = ResponseCache(8, data_version_reader(DATABASE_URL))
+    version = cache.version
+    with Session(engine) as session:
+        session.add(Todo(title="committed elsewhere mid-read"))
+        session.commit()
+    cache.put(("list", 10), version, b"[]")
+    assert len(cache) == 0
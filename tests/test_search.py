@@ -0,0 +1,130 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app.db import engine, reset_db
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+async def _create(ac: AsyncClient, title: str, **fields) -> dict:
+    r = await ac.post("/todos/", json={"title": title, **fields})
+    assert r.status_code == 201
+    return r.json()
+
+
+@pytest.mark.asyncio
+async def test_search_prefix_match_and_relevance_order():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await _create(ac, "buy groceries")
+        best = await _create(ac, "groceries groceries list")
+        await _create(ac, "walk the dog")
+        await _create(ac, "Grocery run")
+
+        r = await ac.get("/todos/search", params={"q": "grocer"})
+        assert r.status_code == 200
+        data = r.json()
+        titles = [t["title"] for t in data["items"]]
+        assert set(titles) == {"buy groceries", "groceries groceries list", "Grocery run"}
+        assert data["items"][0]["id"] == best["id"]
+        assert data["total"] == 3
+
+        r = await ac.get("/todos/search", params={"q": "groceries list"})
+        assert [t["id"] for t in r.json()["items"]] == [best["id"]]
+
+
+@pytest.mark.asyncio
+async def test_search_combines_with_filters_and_skips_deleted():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        done = await _create(ac, "report draft", completed=True)
+        open_high = await _create(ac, "report final", priority="high")
+        gone = await _create(ac, "report old")
+        await ac.delete(f"/todos/{gone['id']}")
+
+        r = await ac.get("/todos/search", params={"q": "report"})
+        assert {t["id"] for t in r.json()["items"]} == {done["id"], open_high["id"]}
+
+        r = await ac.get("/todos/search", params={"q": "report", "completed": "true"})
+        assert [t["id"] for t in r.json()["items"]] == [done["id"]]
+
+        r = await ac.get("/todos/search", params={"q": "report", "priority": "high"})
+        assert [t["id"] for t in r.json()["items"]] == [open_high["id"]]
+
+        r = await ac.get("/todos/search", params={"q": "report", "include_deleted": "true"})
+        assert r.json()["total"] == 3
+
+        # Same match expression is available as a filter on the regular listing
+        r = await ac.get("/todos/", params={"q": "report", "completed": "false"})
+        assert [t["id"] for t in r.json()["items"]] == [open_high["id"]]
+        assert r.json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_search_cursor_pagination_covers_all_matches_once():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for i in range(7):
+            await _create(ac, "task " + "alpha " * (i % 3 + 1) + str(i))
+        await _create(ac, "unrelated")
+
+        full = await ac.get("/todos/search", params={"q": "alpha", "limit": 50})
+        expected = [t["id"] for t in full.json()["items"]]
+        assert len(expected) == 7
+
+        seen: list[int] = []
+        params = {"q": "alpha", "limit": 3}
+        r = await ac.get("/todos/search", params=params)
+        page = r.json()
+        seen += [t["id"] for t in page["items"]]
+        while page["has_more"]:
+            r = await ac.get("/todos/search", params={**params, "cursor": page["next_cursor"]})
+            assert r.status_code == 200
+            page = r.json()
+            seen += [t["id"] for t in page["items"]]
+        assert seen == expected
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_title_updates_and_hard_deletes():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        todo = await _create(ac, "paint fence")
+        r = await ac.put(f"/todos/{todo['id']}", json={"title": "repair roof"})
+        assert r.status_code == 200
+
+        assert (await ac.get("/todos/search", params={"q": "fence"})).json()["items"] == []
+        hits = (await ac.get("/todos/search", params={"q": "roof"})).json()["items"]
+        assert [t["id"] for t in hits] == [todo["id"]]
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM todo WHERE id = :id"), {"id": todo["id"]})
+        assert (
+            conn.execute(text("SELECT count(*) FROM todo_fts WHERE todo_fts MATCH 'roof'")).scalar()
+            == 0
+        )
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_empty_query_and_foreign_cursor():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/todos/search", params={"q": "  -- "})
+        assert r.status_code == 400
+        assert r.json()["detail"] == "q must contain at least one word"
+
+        # FTS5 syntax in user input is treated as plain words, not operators
+        r = await ac.get("/todos/search", params={"q": 'NEAR(" OR title:x'})
+        assert r.status_code == 200
+
+        await _create(ac, "a1")
+        await _create(ac, "a2")
+        page = (await ac.get("/todos/", params={"limit": 1, "sort": "created_at"})).json()
+        r = await ac.get("/todos/search", params={"q": "a1", "cursor": page["next_cursor"]})
+        assert r.status_code == 400
+        assert r.json()["detail"] == "cursor does not match sort order"
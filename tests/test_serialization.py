@@ -0,0 +1,34 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.db import reset_db
+from app.main import app
+from app.schemas.todo import TodoList
+
+
+@pytest.fixture(autouse=True)
+def _reset_db() -> None:
+    reset_db()
+
+
+@pytest.mark.asyncio
+async def test_list_page_bytes_match_response_model_serialization():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/todos/", json={"title": "plain"})
+        await ac.post(
+            "/todos/",
+            json={"title": "ünïcode ✓", "due_at": "2030-01-01T12:30:00+00:00", "priority": "high"},
+        )
+        for params in ({}, {"sort": "created_at", "limit": 1}, {"overdue": "false"}):
+            r = await ac.get("/todos/", params=params)
+            assert r.status_code == 200
+            assert r.headers["content-type"] == "application/json"
+            expected = TodoList.model_validate(r.json()).model_dump_json().encode()
+            assert r.content == expected
+            # Only the public fields are emitted, even when the cursor needs created_at
+            assert set(r.json()["items"][0]) == {"id", "title", "completed", "due_at", "priority"}
+
+        todo = r.json()["items"][0]
+        r = await ac.get(f"/todos/{todo['id']}")
+        assert r.json() == todo
@@ -119,14 +119,14 @@ async def test_cursor_pagination_basic():
         assert page2["offset"] is None
         ids2 = [t["id"] for t in page2["items"]]
         assert all(i > int(cursor) for i in ids2)
-        # Optionally continue if has_more
+        # Continue with the opaque next_cursor while has_more
         nc = page2.get("next_cursor")
         if nc:
             r = await ac.get(f"/todos/?limit=2&cursor={nc}")
             assert r.status_code == 200
             page3 = r.json()
             ids3 = [t["id"] for t in page3["items"]]
-            assert all(i > int(nc) for i in ids3)
+            assert all(i > max(ids2) for i in ids3)
 
 
 @pytest.mark.asyncio
@@ -233,3 +233,89 @@ async def test_filter_completed():
         data = r.json()
         assert data["total"] == 2
         assert all(item["completed"] is True for item in data["items"])
+
+
+@pytest.mark.asyncio
+async def test_total_is_counted_in_sql_and_can_be_skipped():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for i in range(3):
+            await ac.post("/todos/", json={"title": f"N{i}", "completed": i == 0})
+        r = await ac.get("/todos/?limit=1&completed=false")
+        assert r.status_code == 200
+        assert r.json()["total"] == 2
+        assert len(r.json()["items"]) == 1
+
+        r = await ac.get("/todos/?limit=1&include_total=false")
+        assert r.status_code == 200
+        assert r.json()["total"] is None
+        assert len(r.json()["items"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_approximate_total_reads_maintained_counts():
+    from sqlalchemy import text
+
+    from app.db import engine
+    from app.routers import todos
+
+    todos._count_cache.clear()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+
+        async def totals(params: str) -> tuple[int, int]:
+            approx = await ac.get(f"/todos/?count_mode=approximate&{params}")
+            exact = await ac.get(f"/todos/?{params}")
+            return approx.json()["total"], exact.json()["total"]
+
+        await ac.post(
+            "/todos/bulk",
+            json=[{"title": f"C{i}", "priority": ["low", "high", None][i % 3]} for i in range(9)],
+        )
+        ids = [t["id"] for t in (await ac.get("/todos/")).json()["items"]]
+        await ac.put(
+            f"/todos/{ids[0]}", json={"title": "C0", "completed": True, "priority": "high"}
+        )
+        await ac.delete(f"/todos/{ids[1]}")
+        await ac.delete(f"/todos/{ids[2]}")
+        await ac.post(f"/todos/{ids[2]}/restore")
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM todo WHERE id = :id"), {"id": ids[3]})
+        for params in (
+            "",
+            "include_deleted=true",
+            "completed=true",
+            "completed=false&priority=high",
+            "priority=low&include_deleted=true",
+        ):
+            approx, exact = await totals(params)
+            assert approx == exact, params
+        assert await totals("") == (7, 7)
+
+        # Filters the counts cannot answer fall back to a count cached for the TTL
+        assert await totals("q=C4") == (1, 1)
+        await ac.post("/todos/", json={"title": "C4 again"})
+        assert await totals("q=C4") == (1, 2)
+
+        r = await ac.get("/todos/?count_mode=bogus")
+        assert r.status_code == 400
+        assert r.json()["detail"] == "count_mode must be exact|approximate"
+
+
+def test_count_cache_evicts_safely_across_threads(monkeypatch: pytest.MonkeyPatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.routers import todos
+
+    todos._count_cache.clear()
+    monkeypatch.setattr(todos, "COUNT_CACHE_MAX_ENTRIES", 4)
+
+    def churn(worker: int) -> None:
+        for i in range(2000):
+            key = (worker, i % 16)
+            todos._store_count(key, i)
+            todos._cached_count(key)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(churn, range(8)))
+    assert len(todos._count_cache) <= 4
@@ -32,12 +32,27 @@ async def test_list_offset_negative_returns_400():
 
 
 @pytest.mark.asyncio
-async def test_cursor_incompatible_with_sort_due_returns_400():
+async def test_legacy_id_cursor_with_sort_due_returns_400():
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         r = await ac.get("/todos/", params={"cursor": "10", "sort_due": True})
     assert r.status_code == 400
-    assert r.json().get("detail") == "cursor is incompatible with sort_due"
+    assert r.json().get("detail") == "invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_invalid_sort_and_order_return_400():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        r = await ac.get("/todos/", params={"sort": "title"})
+        assert r.status_code == 400
+        assert r.json().get("detail") == "sort must be id|due_at|created_at"
+        r = await ac.get("/todos/", params={"order": "up"})
+        assert r.status_code == 400
+        assert r.json().get("detail") == "order must be asc|desc"
+        r = await ac.get("/todos/", params={"cursor": "not-a-cursor!"})
+        assert r.status_code == 400
+        assert r.json().get("detail") == "invalid cursor"
 
 
 @pytest.mark.asyncio